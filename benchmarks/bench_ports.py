@@ -0,0 +1,110 @@
+"""Microbenchmarks for port specification parsing.
+
+"cold" clears the parse/compile caches first; "warm" is the best of
+--repeat runs with caches populated (as in a long-running process).
+
+Run with:
+    python benchmarks/bench_ports.py [--repeat N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boxofports.ports import (  # noqa: E402
+    _normalize_port,
+    compile_port_spec,
+    format_ports_for_api,
+    parse_port_spec,
+)
+from boxofports.portset import PortSet, _parse_port_id  # noqa: E402
+
+PORTS = 25_000  # x 4 slots = 100k ports
+
+STATUS = {
+    "max-ports": PORTS,
+    "max-slots": 4,
+    "status": [
+        {"port": f"{port}{slot}", "st": "3" if port % 3 else "12"}
+        for port in range(1, PORTS + 1)
+        for slot in "AB"
+    ],
+}
+
+ALPHA_LIST = ",".join(f"{port}{slot}" for port in range(1, PORTS + 1) for slot in "ABCD")
+DECIMAL_LIST = ",".join(f"{port}.{slot:02d}" for port in range(1, PORTS + 1) for slot in range(1, 5))
+
+
+def clear_caches() -> None:
+    """Drop memoized results so each run measures cold parsing."""
+    compile_port_spec.cache_clear()
+    _normalize_port.cache_clear()
+    _parse_port_id.cache_clear()
+
+
+def bench_alpha_range():
+    return parse_port_spec(f"1A-{PORTS}D")
+
+
+def bench_numeric_range():
+    return parse_port_spec(f"1-{PORTS * 4}")
+
+
+def bench_alpha_list():
+    return parse_port_spec(ALPHA_LIST)
+
+
+def bench_decimal_list():
+    return parse_port_spec(DECIMAL_LIST)
+
+
+def bench_format_decimal():
+    return format_ports_for_api(ALPHA_LIST.split(","), "decimal")
+
+
+def bench_algebra():
+    return parse_port_spec("registered&slot:A,!5000-6000", status=STATUS)
+
+
+def bench_portset_ops():
+    left = PortSet.full(PORTS, 4, slots=[1, 2])
+    right = PortSet.full(PORTS, 4, slots=[2, 3])
+    return len((left | right) - (left & right))
+
+
+BENCHMARKS = [
+    ("alpha range 1A-25000D", bench_alpha_range),
+    ("numeric range 1-100000", bench_numeric_range),
+    ("100k alpha list", bench_alpha_list),
+    ("100k decimal list", bench_decimal_list),
+    ("format 100k decimal", bench_format_decimal),
+    ("algebra over 100k ports", bench_algebra),
+    ("PortSet union/diff 100k", bench_portset_ops),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark")
+    args = parser.parse_args()
+
+    print(f"{'benchmark':<28} {'cold (ms)':>10} {'warm (ms)':>10}")
+    for name, func in BENCHMARKS:
+        clear_caches()
+        start = time.perf_counter()
+        func()
+        cold = (time.perf_counter() - start) * 1000
+
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, (time.perf_counter() - start) * 1000)
+        print(f"{name:<28} {cold:>10.1f} {best:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
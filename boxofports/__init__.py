@@ -21,10 +21,21 @@ Features:
 """
 
 from .__version__ import (
-    __version__,
     __author__,
     __author_email__ as __email__,
     __license__,
     # optional: other metadata you want public
 )
 __all__ = ["__version__", "__author__", "__email__", "__license__"]
+
+# Importing the submodule bound its module object to this name; drop it so
+# __getattr__ below serves the version string
+globals().pop("__version__", None)
+
+
+def __getattr__(name: str):
+    # __version__ reads package metadata, so it is looked up on first access
+    if name == "__version__":
+        from .__version__ import _resolve_version
+        return _resolve_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,17 +1,32 @@
 """Version information for BoxOfPorts."""
 
-from importlib.metadata import PackageNotFoundError, version as _pkg_version
 import os
+from functools import lru_cache
+
 
 # --- canonical version (from package metadata or fallback) --------------------
-try:
-    __version__ = _pkg_version("boxofports")
-except PackageNotFoundError:
-    # Optional fallback if you later enable setuptools-scm write_to
+# Resolved on first use: importlib.metadata costs tens of milliseconds at
+# startup and most commands never print the version.
+@lru_cache(maxsize=1)
+def _resolve_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version as _pkg_version
+
     try:
-        from ._generated_version import __version__  # type: ignore
-    except Exception:
-        __version__ = "0.0.0"
+        return _pkg_version("boxofports")
+    except PackageNotFoundError:
+        # Optional fallback if you later enable setuptools-scm write_to
+        try:
+            from ._generated_version import __version__  # type: ignore
+            return __version__
+        except Exception:
+            return "0.0.0"
+
+
+def __getattr__(name: str):
+    if name == "__version__":
+        return _resolve_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # --- static project metadata ---------------------------------------------------
 __title__ = "BoxOfPorts"
@@ -36,7 +51,7 @@ __inspiration__ = "And it's just a box of ports. I don't know who put it there"
 def get_version_info() -> dict:
     """Get comprehensive version information."""
     return {
-        "version": __version__,
+        "version": _resolve_version(),
         "title": __title__,
         "command": __command__,
         "description": __description__,
@@ -50,12 +65,12 @@ def get_version_info() -> dict:
 
 def get_version_string() -> str:
     """Get formatted version string for display."""
-    return f"{__title__} v{__version__} (API v{__api_version__})"
+    return f"{__title__} v{_resolve_version()} (API v{__api_version__})"
 
 def get_full_version_info() -> str:
     """Get full version information for --version output."""
     return f"""
-{__title__} version {__version__}
+{__title__} version {_resolve_version()}
 
 {__description__}
 Command: {__command__}
@@ -6,6 +6,8 @@ from typing import Any
 
 from pydantic import BaseModel, Field, validator
 
+from .portset import PortId
+
 
 # Status and Error Codes
 class SMSStatusCode(IntEnum):
@@ -414,10 +416,10 @@ class SMSMessage(BaseModel):
     def _format_port(port: str) -> str:
         """Convert port format from '1.01' to '1A' style."""
         if '.' in port:
-            # Convert decimal format to letter format
-            slot, port_num = port.split('.')
-            port_letter = chr(ord('A') + int(port_num) - 1)
-            return f"{slot}{port_letter}"
+            try:
+                return PortId.parse(port).alpha
+            except ValueError:
+                return port
         return port
 
     @staticmethod
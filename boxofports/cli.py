@@ -1,37 +1,58 @@
 """CLI interface for BoxOfPorts using Typer."""
 
 import hashlib
+import io
 import random
+import sys
+import threading
+from dataclasses import replace
 from pathlib import Path
 
 import typer
 from rich.console import Console
-from rich.table import Table
+from typer.core import TyperGroup
 
 from .__version__ import get_full_version_info
 from .config import EjoinConfig, config_manager, parse_host_port
-from .http import EjoinHTTPError, create_sync_client
-from .ports import format_ports_for_api, parse_port_spec
-from .store import get_store, initialize_store
-from .table_export import (
-    get_imei_columns,
-    get_inbox_delivery_reports_columns,
-    get_inbox_messages_columns,
-    get_profiles_columns,
-    get_sms_send_results_columns,
-    get_sms_send_tasks_columns,
-    handle_table_export,
-    imei_data_to_export_data,
-    messages_to_export_data,
-    profiles_to_export_data,
-    render_and_export_table,
-    sms_results_to_export_data,
-    sms_tasks_to_export_data,
-)
-from .templating import parse_template_variables, render_sms_template
-from .splash import show_welcome_message
+
+# Same as profiling.PROFILE_MODES; repeated so startup need not import it
+PROFILE_MODES = ("cpu", "wall", "alloc")
+
+
+class RootGroup(TyperGroup):
+    """Root command group.
+
+    A bare --profile means --profile=cpu rather than taking the next word
+    as its mode, and the invoked command path is kept for profile reports.
+    """
+
+    def parse_args(self, ctx, args):
+        args = list(args)
+        value_options = {
+            opt for param in self.get_params(ctx)
+            if not getattr(param, "is_flag", True) for opt in param.opts
+        }
+        index = 0
+        while index < len(args) and args[index].startswith("-") and args[index] != "--":
+            if args[index] == "--profile":
+                if index + 1 >= len(args) or args[index + 1] not in PROFILE_MODES:
+                    args[index] = "--profile=cpu"
+                    index += 1
+                    continue
+            index += 2 if args[index] in value_options else 1
+
+        words, command = [], self
+        for word in args[index:]:
+            command = command.get_command(ctx, word) if hasattr(command, "get_command") else None
+            if command is None:
+                break
+            words.append(word)
+        ctx.meta["boxofports.command"] = " ".join(words)
+        return super().parse_args(ctx, args)
+
 
 app = typer.Typer(
+    cls=RootGroup,
     help="BoxOfPorts - SMS Gateway Management CLI for EJOIN Router Operators",
     no_args_is_help=False,
     invoke_without_command=True
@@ -41,12 +62,20 @@ ops_app = typer.Typer(help="Device operations")
 status_app = typer.Typer(help="Status monitoring")
 inbox_app = typer.Typer(help="Inbox management")
 config_app = typer.Typer(help="Profile and configuration management")
+report_app = typer.Typer(help="Delivery analytics from local history")
+db_app = typer.Typer(help="Local database maintenance")
+export_app = typer.Typer(help="Stream local history to files")
+daemon_app = typer.Typer(help="Resident process for fast repeated commands")
 
 app.add_typer(sms_app, name="sms")
 app.add_typer(ops_app, name="ops")
 app.add_typer(status_app, name="status")
 app.add_typer(inbox_app, name="inbox")
 app.add_typer(config_app, name="config")
+app.add_typer(report_app, name="report")
+app.add_typer(db_app, name="db")
+app.add_typer(export_app, name="export")
+app.add_typer(daemon_app, name="daemon")
 
 console = Console()
 
@@ -56,8 +85,16 @@ def get_config_or_exit(ctx: typer.Context) -> EjoinConfig:
     
     Provides helpful guidance if no configuration is available.
     """
+    from .splash import show_welcome_message
+    from .store import initialize_store
+
+    targets = ctx.obj.get('targets') or []
+    if len(targets) > 1 and 'target' not in ctx.obj:
+        run_for_each_target(ctx, targets)
+
     try:
-        config = config_manager.get_config()
+        # Copy so CLI overrides never leak into the shared profile
+        config = replace(config_manager.get_config(ctx.obj.get('target')))
 
         # Override with CLI options if provided
         cli_host = ctx.obj.get('cli_host')
@@ -76,10 +113,8 @@ def get_config_or_exit(ctx: typer.Context) -> EjoinConfig:
         if cli_password:
             config.password = cli_password
 
-        # Initialize store if not already done
-        if 'store_initialized' not in ctx.obj:
-            initialize_store(config.db_path)
-            ctx.obj['store_initialized'] = True
+        # Reuses the open store unless this profile uses another database
+        initialize_store(config.db_path)
 
         return config
 
@@ -110,6 +145,211 @@ def get_config_or_exit(ctx: typer.Context) -> EjoinConfig:
         raise typer.Exit(1)
 
 
+def active_profile(ctx: typer.Context) -> str | None:
+    """Profile a command runs against: its --target gateway or the current one."""
+    return ctx.obj.get('target') or config_manager.get_current_profile()
+
+
+class _ThreadOutput(io.TextIOBase):
+    """Text stream that buffers the writes of capturing threads.
+
+    Threads that called capture() write to their own buffer; every other
+    thread writes straight through to the wrapped stream.
+    """
+
+    def __init__(self, stream):
+        super().__init__()
+        self._stream = stream
+        self._buffers: dict[int, io.StringIO] = {}
+
+    def capture(self) -> io.StringIO:
+        buffer = self._buffers[threading.get_ident()] = io.StringIO()
+        return buffer
+
+    def release(self) -> None:
+        self._buffers.pop(threading.get_ident(), None)
+
+    def write(self, text: str) -> int:
+        buffer = self._buffers.get(threading.get_ident())
+        return (buffer if buffer is not None else self._stream).write(text)
+
+    def flush(self) -> None:
+        if threading.get_ident() not in self._buffers:
+            self._stream.flush()
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        # Buffered output is shown later, so spinners never animate
+        return threading.get_ident() not in self._buffers and self._stream.isatty()
+
+    @property
+    def encoding(self) -> str:
+        return getattr(self._stream, "encoding", None) or "utf-8"
+
+
+def _run_on_target(ctx: typer.Context, name: str) -> bool:
+    """Invoke the command for one gateway in its own context; True on success."""
+    target_ctx = typer.Context(
+        ctx.command, parent=ctx.parent, info_name=ctx.info_name, obj={**ctx.obj, 'target': name},
+    )
+    try:
+        with target_ctx:
+            target_ctx.invoke(ctx.command.callback, **ctx.params)
+    except typer.Exit as e:
+        return not e.exit_code
+    except typer.Abort:
+        console.print(f"[red]{name}: aborted[/red]")
+        return False
+    except Exception as e:
+        console.print(f"[red]{name}: {e}[/red]")
+        return False
+    return True
+
+
+def _run_captured(ctx: typer.Context, name: str, stdout: _ThreadOutput, stderr: _ThreadOutput) -> tuple[bool, str, str]:
+    out, err = stdout.capture(), stderr.capture()
+    try:
+        ok = _run_on_target(ctx, name)
+    finally:
+        stdout.release()
+        stderr.release()
+    return ok, out.getvalue(), err.getvalue()
+
+
+def run_for_each_target(ctx: typer.Context, targets: list[str]) -> None:
+    """Run the invoked command once per targeted gateway, then exit.
+
+    Up to --parallel gateways run at once, each on a worker thread with
+    its own copy of the context; current_profile on disk is never
+    touched. Each gateway's output is buffered and printed under its
+    heading, in target order, as soon as it and the gateways before it
+    are done. Parallel runs give prompts no input, so they abort; with
+    --parallel 1 gateways run one after another and prompts are asked.
+    Exits non-zero if the command failed on any gateway.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from . import table_export
+
+    failed = []
+    parallel = min(ctx.obj.get('parallel') or 1, len(targets))
+    if parallel <= 1:
+        for name in targets:
+            console.rule(f"[bold cyan]{name}[/bold cyan]")
+            if not _run_on_target(ctx, name):
+                failed.append(name)
+    else:
+        saved_streams = (sys.stdin, sys.stdout, sys.stderr)
+        consoles = {id(c): c for c in (console, table_export.console)}.values()
+        saved_files = [(c, c._file) for c in consoles]
+        stdout, stderr = _ThreadOutput(sys.stdout), _ThreadOutput(sys.stderr)
+        try:
+            sys.stdin, sys.stdout, sys.stderr = io.StringIO(), stdout, stderr
+            for c, file in saved_files:
+                # Consoles bound to a stream (as in the daemon) follow it
+                if file is saved_streams[1]:
+                    c.file = stdout
+            with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="boxofports-target") as pool:
+                runs = [pool.submit(_run_captured, ctx, name, stdout, stderr) for name in targets]
+                for name, run in zip(targets, runs, strict=True):
+                    ok, out, err = run.result()
+                    console.rule(f"[bold cyan]{name}[/bold cyan]")
+                    stdout.write(out)
+                    stderr.write(err)
+                    stdout.flush()
+                    if not ok:
+                        failed.append(name)
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = saved_streams
+            for c, file in saved_files:
+                c.file = file
+
+    console.rule()
+    if failed:
+        console.print(f"[red]Failed on {len(failed)} of {len(targets)} gateways: {', '.join(failed)}[/red]")
+        raise typer.Exit(1)
+    console.print(f"[green]Completed on {len(targets)} gateways[/green]")
+    raise typer.Exit(0)
+
+
+def print_metrics_summary(recorder) -> None:
+    """Stop recording and print a latency table to stderr."""
+    from rich.table import Table
+
+    from . import metrics
+
+    metrics.remove_hook(recorder)
+    err_console = Console(stderr=True)
+    histograms = recorder.histograms()
+    if not histograms:
+        err_console.print("[dim]No requests, database transactions or template renders were recorded[/dim]")
+        return
+
+    table = Table(title="Metrics")
+    table.add_column("Metric", style="cyan", overflow="fold")
+    table.add_column("Labels", overflow="fold")
+    for column in ("Count", "p50", "p90", "p99", "Max"):
+        table.add_column(column, justify="right")
+
+    for name, labels, histogram in histograms:
+        if name.endswith("_seconds"):
+            def fmt(value):
+                return f"{value * 1000:.1f}ms"
+        else:
+            def fmt(value):
+                return f"{value:,.0f}"
+        table.add_row(
+            name.removeprefix("boxofports_"),
+            " ".join(f"{key}={value}" for key, value in labels.items()),
+            str(histogram.count),
+            fmt(histogram.percentile(50)),
+            fmt(histogram.percentile(90)),
+            fmt(histogram.percentile(99)),
+            fmt(histogram.max),
+        )
+    err_console.print(table)
+
+    retries = sum(value for name, _, value in recorder.counters() if name == "boxofports_http_retries_total")
+    if retries:
+        err_console.print(f"Retries: [yellow]{retries:g}[/yellow]")
+
+
+def print_profile_report(report) -> None:
+    """Print the hottest entries of a profile report to stderr."""
+    from rich.table import Table
+
+    err_console = Console(stderr=True)
+    table = Table(title=f"Profile ({report.mode})")
+    for index, column in enumerate(report.columns):
+        if index == 0:
+            table.add_column(column, style="cyan", overflow="fold")
+        else:
+            table.add_column(column, justify="left" if column == "Source" else "right")
+    for row in report.rows:
+        table.add_row(*row)
+    err_console.print(table)
+    err_console.print(f"[dim]{report.summary}[/dim]")
+    for path in [report.path, *report.extra_paths]:
+        err_console.print(f"📄 {path}")
+
+
+def resolve_ports(config: EjoinConfig, ports: str) -> list[str]:
+    """Parse a port specification, consulting device status when needed.
+
+    Selectors like "all", "registered" or "slot:B" are resolved against the
+    (cached) device status so bulk operations only target real ports.
+    """
+    from .http import create_sync_client
+    from .ports import needs_device_status, parse_port_spec
+
+    status = None
+    if needs_device_status(ports):
+        status = create_sync_client(config).get_status()
+    return parse_port_spec(ports, status=status)
+
+
 def version_callback(value: bool):
     """Print version information and exit."""
     if value:
@@ -124,7 +364,22 @@ def main(
     port: int | None = typer.Option(None, "--port", help="Device port"),
     user: str | None = typer.Option(None, "--user", help="Device username"),
     password: str | None = typer.Option(None, "--pass", "--password", help="Device password"),
+    target: str | None = typer.Option(
+        None, "--target", envvar="BOXOFPORTS_TARGET",
+        help="Gateways to run on: profile names or globs, tag:NAME, group:NAME, key=value ('!' excludes, '&' intersects)",
+    ),
+    parallel: int = typer.Option(
+        8, "--parallel", envvar="BOXOFPORTS_PARALLEL", min=1,
+        help="With --target, gateways to run at once; output is shown per gateway when it finishes (1 runs them in turn and allows prompts)",
+    ),
     verbose: bool = typer.Option(False, "-v", "--verbose", help="Enable verbose logging"),
+    metrics_summary: bool = typer.Option(
+        False, "--metrics", help="Print request, database and template timings to stderr when the command ends",
+    ),
+    profile: str | None = typer.Option(
+        None, "--profile", metavar="[cpu|wall|alloc]",
+        help="Profile the command (default cpu), print the hottest functions and save a report under ~/.boxofports/profiles",
+    ),
     version: bool | None = typer.Option(None, "--version", callback=version_callback, is_eager=True, help="Show version information"),
 ):
     """BoxOfPorts - SMS Gateway Management CLI for EJOIN Router Operators."""
@@ -136,13 +391,32 @@ def main(
     ctx.obj['cli_port'] = port
     ctx.obj['cli_user'] = user
     ctx.obj['cli_password'] = password
+    ctx.obj['parallel'] = parallel
+
+    if metrics_summary:
+        from . import metrics
+
+        recorder = metrics.MetricsRegistry()
+        metrics.add_hook(recorder)
+        ctx.call_on_close(lambda: print_metrics_summary(recorder))
+
+    if profile:
+        if profile not in PROFILE_MODES:
+            raise typer.BadParameter(f"expected one of: {', '.join(PROFILE_MODES)}", param_hint="--profile")
+        from .profiling import CommandProfiler
+
+        profiler = CommandProfiler(profile, command=ctx.meta.get("boxofports.command", ""))
+        profiler.start()
+        ctx.call_on_close(lambda: print_profile_report(profiler.stop()))
 
     # Commands that don't need gateway configuration
     command_name = ctx.invoked_subcommand
-    config_free_commands = {'completion', 'config', 'help-tree', 'welcome'}
+    config_free_commands = {'completion', 'config', 'daemon', 'help-tree', 'welcome'}
 
     # If no subcommand provided, show welcome message
     if command_name is None:
+        from .splash import show_welcome_message
+
         # Show the beautiful splash screen with random tagline
         show_welcome_message(console)
         
@@ -195,6 +469,21 @@ def main(
         console.print("[dim]🎵 Ready to let your signals ripple through the network? 🎵[/dim]")
         raise typer.Exit(0)
 
+    if target:
+        from .inventory import TargetError
+
+        try:
+            targets = config_manager.resolve_targets(target)
+        except TargetError as e:
+            console.print(f"[red]Invalid target: {e}[/red]")
+            raise typer.Exit(1) from e
+        if not targets:
+            console.print(f"[red]Target '{target}' matched no gateways[/red]")
+            raise typer.Exit(1)
+        ctx.obj['targets'] = targets
+        if len(targets) == 1:
+            ctx.obj['target'] = targets[0]
+
     if command_name in config_free_commands:
         # These commands work without gateway config
         return
@@ -219,6 +508,18 @@ def sms_send(
     json_export: bool = typer.Option(False, "--json", help="Export table data as JSON to stdout"),
 ):
     """Send test SMS with template support and per-port routing."""
+    from .http import EjoinHTTPError, create_sync_client
+    from .ports import format_ports_for_api
+    from .store import get_store
+    from .table_export import (
+        get_sms_send_results_columns,
+        get_sms_send_tasks_columns,
+        render_and_export_table,
+        sms_results_to_export_data,
+        sms_tasks_to_export_data,
+    )
+    from .templating import parse_template_variables, render_sms_template
+
     config = get_config_or_exit(ctx)
 
     try:
@@ -226,11 +527,11 @@ def sms_send(
         device_alias = config.device_alias or config.host
 
         # Parse ports and template variables
-        port_list = parse_port_spec(ports)
+        port_list = resolve_ports(config, ports)
         template_vars = parse_template_variables(vars) if vars else {}
         
         # Prepare profile-based template variables
-        current_profile_name = config_manager.get_current_profile()
+        current_profile_name = active_profile(ctx)
         profile_template_vars = {
             'devicename': device_alias,
             'profilename': current_profile_name or 'default',
@@ -281,7 +582,7 @@ def sms_send(
                     )
 
         # Prepare task data for display and export
-        current_profile = config_manager.get_current_profile()
+        current_profile = active_profile(ctx)
         task_data = sms_tasks_to_export_data(tasks, device_alias=device_alias)
         
         # Show preview table with centralized rendering
@@ -361,6 +662,53 @@ def sms_spray(
     ctx.invoke(sms_send, to=to, text=text, ports=ports, repeat=1, intvl_ms=intvl_ms, timeout=30, vars=[], dry_run=False, sort=sort, csv=csv, json_export=json_export)
 
 
+@sms_app.command("reports")
+def sms_reports(
+    ctx: typer.Context,
+    source: str = typer.Argument("-", help="File of status-report JSON posted by the gateway ('-' for stdin)"),
+):
+    """Record task send reports so `report ports` can use them.
+
+    The gateway POSTs status-report messages to the task's sr_url; feed
+    the bodies here, one JSON document per line or a single document.
+    """
+    import json
+    import sqlite3
+    import sys
+
+    from pydantic import ValidationError
+
+    from .api_models import SMSStatusReport
+    from .store import get_store
+
+    config = get_config_or_exit(ctx)
+
+    try:
+        text = sys.stdin.read() if source == "-" else Path(source).read_text()
+        try:
+            documents = [json.loads(text)] if text.strip() else []
+        except ValueError:
+            documents = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+        reports = []
+        for document in documents:
+            for item in document if isinstance(document, list) else [document]:
+                reports.extend(SMSStatusReport.model_validate(item).rpts)
+    except (OSError, ValueError, ValidationError) as e:
+        console.print(f"[red]Could not read status reports: {e}[/red]")
+        raise typer.Exit(1) from e
+
+    store = get_store()
+    recorded = results = 0
+    for report in reports:
+        try:
+            results += store.save_task_report(report, device_ip=config.host)
+            recorded += 1
+        except sqlite3.IntegrityError:
+            console.print(f"[yellow]Skipping report for task {report.tid}: not sent from this database[/yellow]")
+    console.print(f"[green]✓ Recorded {recorded} task reports ({results} new delivery results)[/green]")
+
+
 @status_app.command("subscribe")
 def status_subscribe(
     ctx: typer.Context,
@@ -372,6 +720,8 @@ def status_subscribe(
     NOTE: This REPLACES any existing webhook subscription.
     The device can only send notifications to ONE callback URL at a time.
     """
+    from .http import EjoinHTTPError, create_sync_client
+
     config = get_config_or_exit(ctx)
 
     try:
@@ -404,10 +754,13 @@ def ops_lock(
     ports: str = typer.Option(..., "--ports", "--port", help="Ports to lock (supports CSV files)"),
 ):
     """Lock specified ports."""
+    from .http import create_sync_client
+    from .ports import format_ports_for_api
+
     config = get_config_or_exit(ctx)
 
     try:
-        port_list = parse_port_spec(ports)
+        port_list = resolve_ports(config, ports)
         client = create_sync_client(config)
 
         request_data = {
@@ -417,6 +770,7 @@ def ops_lock(
         }
 
         response = client.post_json("/goip_send_cmd.html", json=request_data)
+        client.invalidate_status()
         console.print(f"[green]Ports locked in — {', '.join(port_list)}[/green]")
 
     except Exception as e:
@@ -430,10 +784,13 @@ def ops_unlock(
     ports: str = typer.Option(..., "--ports", "--port", help="Ports to unlock (supports CSV files)"),
 ):
     """Unlock specified ports."""
+    from .http import create_sync_client
+    from .ports import format_ports_for_api
+
     config = get_config_or_exit(ctx)
 
     try:
-        port_list = parse_port_spec(ports)
+        port_list = resolve_ports(config, ports)
         client = create_sync_client(config)
 
         request_data = {
@@ -443,6 +800,7 @@ def ops_unlock(
         }
 
         response = client.post_json("/goip_send_cmd.html", json=request_data)
+        client.invalidate_status()
         console.print(f"[green]Unlock command sent to ports: {', '.join(port_list)}[/green]")
 
     except Exception as e:
@@ -470,6 +828,10 @@ def ops_set_imei(
     
     Both --ports and --imeis support CSV files with appropriate columns.
     """
+    from rich.table import Table
+
+    from .http import create_sync_client
+
     config = get_config_or_exit(ctx)
 
     try:
@@ -482,7 +844,7 @@ def ops_set_imei(
 
         # Parse ports using the standard port parsing system
         try:
-            port_list = parse_port_spec(ports)
+            port_list = resolve_ports(config, ports)
         except Exception as e:
             console.print(f"[red]Invalid port specification: {e}[/red]")
             raise typer.Exit(1)
@@ -629,6 +991,14 @@ def ops_get_imei(
     json_export: bool = typer.Option(False, "--json", help="Export table data as JSON to stdout"),
 ):
     """Get IMEI values for specified ports — check the cellular signatures."""
+    from .http import create_sync_client
+    from .ports import parse_port_spec
+    from .table_export import (
+        get_imei_columns,
+        imei_data_to_export_data,
+        render_and_export_table,
+    )
+
     config = get_config_or_exit(ctx)
     device_alias = config.device_alias or config.host
 
@@ -646,7 +1016,7 @@ def ops_get_imei(
         if response.get("code") == 0:
             # Parse the response to extract IMEI values
             port_imeis = response.get("ports", {})
-            current_profile = config_manager.get_current_profile()
+            current_profile = active_profile(ctx)
             
             # Prepare data for export - use both found and requested ports
             all_port_imeis = {}
@@ -789,6 +1159,8 @@ def completion():
 @app.command("welcome")
 def welcome():
     """Show welcome message with onboarding guidance."""
+    from .splash import show_welcome_message
+
     # Show the beautiful splash screen with random tagline
     show_welcome_message(console)
     
@@ -873,6 +1245,16 @@ def help_tree():
     console.print("├── [yellow]📊 status[/yellow] [dim](Status Monitoring)[/dim]")
     console.print("│   └── [green]subscribe[/green]             [dim]— Subscribe to status notifications[/dim]")
     console.print("│")
+    console.print("├── [yellow]📈 report[/yellow] [dim](Delivery Analytics)[/dim]")
+    console.print("│   ├── [green]ports[/green]                 [dim]— Per-port send/delivery success rates[/dim]")
+    console.print("│   └── [green]health[/green]                [dim]— Port status changes and flapping SIMs[/dim]")
+    console.print("│")
+    console.print("├── [yellow]🗄 db[/yellow] [dim](Local Database)[/dim]")
+    console.print("│   ├── [green]stats[/green]                 [dim]— Row counts and recent activity[/dim]")
+    console.print("│   ├── [green]check[/green]                 [dim]— Verify/rebuild materialized counters[/dim]")
+    console.print("│   ├── [green]cleanup[/green]               [dim]— Batched retention of old history[/dim]")
+    console.print("│   └── [green]vacuum[/green]                [dim]— Reclaim free space on disk[/dim]")
+    console.print("│")
     console.print("└── [yellow]⚙️ config[/yellow] [dim](Profile & Configuration Management)[/dim]")
     console.print("    ├── [green]add-profile[/green]          [dim]— Add new server profile[/dim]")
     console.print("    ├── [green]list[/green]                 [dim]— List all configured profiles[/dim]")
@@ -899,6 +1281,8 @@ def help_tree():
 @app.command("test-connection")
 def test_connection(ctx: typer.Context):
     """Test connection to the EJOIN device."""
+    from .http import EjoinHTTPError, create_sync_client
+
     config = get_config_or_exit(ctx)
 
     try:
@@ -970,12 +1354,19 @@ def config_add_profile(
 
 @config_app.command("list")
 def config_list_profiles(
+    ctx: typer.Context,
     sort: str | None = typer.Option(None, "--sort", help="Sort by column numbers, e.g. '2,5d,1a'. Use 'a' & 'd' for ascending/descending."),
     csv: bool = typer.Option(False, "--csv", help="Export table data as CSV to stdout"),
     json_export: bool = typer.Option(False, "--json", help="Export table data as JSON to stdout"),
 ):
-    """List all configured profiles."""
-    profiles = config_manager.list_profiles()
+    """List all configured profiles (only the --target gateways if given)."""
+    from .table_export import (
+        get_profiles_columns,
+        profiles_to_export_data,
+        render_and_export_table,
+    )
+
+    profiles = ctx.obj.get('targets') or config_manager.list_profiles()
     current = config_manager.get_current_profile()
 
     if not profiles:
@@ -995,6 +1386,7 @@ def config_list_profiles(
                 "device_alias": profile_config.device_alias,
                 "host_port": f"{profile_config.host}:{profile_config.port}",
                 "username": profile_config.username,
+                "tags": profile_config.tags,
                 "status": status
             })
 
@@ -1057,6 +1449,12 @@ def config_show_profile(
     console.print(f"Username: {profile_config.username}")
     console.print(f"Password: {'*' * len(profile_config.password)}")
     console.print(f"Base URL: {profile_config.base_url}")
+    rate = f"{profile_config.rate_limit:g}/s" if profile_config.rate_limit else "no cap"
+    console.print(f"Rate Limit: {rate}, Max Concurrency: {profile_config.max_concurrency}")
+    if profile_config.tags:
+        console.print(f"Tags: {', '.join(profile_config.tags)}")
+    for key, value in profile_config.attributes.items():
+        console.print(f"Attribute: {key}={value}")
 
     if name == config_manager.get_current_profile():
         console.print("[blue]→ This is the current active profile[/blue]")
@@ -1100,6 +1498,8 @@ def config_edit_profile(
     user: str | None = typer.Option(None, "--user", help="Device username"),
     password: str | None = typer.Option(None, "--password", help="Device password"),
     alias: str | None = typer.Option(None, "--alias", help="Device alias to display in tables/exports"),
+    rate_limit: float | None = typer.Option(None, "--rate-limit", help="Max requests per second to the device (0 = no cap)"),
+    max_concurrency: int | None = typer.Option(None, "--max-concurrency", help="Ceiling for concurrent requests to the device"),
 ):
     """Edit the currently active profile — fine-tune your cosmic connection."""
     current_profile = config_manager.get_current_profile()
@@ -1131,6 +1531,8 @@ def config_edit_profile(
         new_user = current_config.username
         new_password = current_config.password
         new_alias = current_config.device_alias
+        new_rate_limit = current_config.rate_limit
+        new_max_concurrency = current_config.max_concurrency
 
         # Apply changes if provided
         if host is not None:
@@ -1161,6 +1563,16 @@ def config_edit_profile(
             if alias != current_config.device_alias:
                 changes.append(f"Device Alias: {current_config.device_alias} → {new_alias}")
 
+        if rate_limit is not None:
+            new_rate_limit = rate_limit
+            if rate_limit != current_config.rate_limit:
+                changes.append(f"Rate Limit: {current_config.rate_limit:g}/s → {new_rate_limit:g}/s")
+
+        if max_concurrency is not None:
+            new_max_concurrency = max_concurrency
+            if max_concurrency != current_config.max_concurrency:
+                changes.append(f"Max Concurrency: {current_config.max_concurrency} → {new_max_concurrency}")
+
         # Check if any changes were made
         if not changes:
             console.print(f"[yellow]No changes specified for profile '{current_profile}'[/yellow]")
@@ -1172,20 +1584,16 @@ def config_edit_profile(
         for change in changes:
             console.print(f"  {change}")
 
-        # Create updated configuration
-        updated_config = EjoinConfig(
+        # Create updated configuration, preserving all other settings
+        updated_config = replace(
+            current_config,
             host=new_host,
             port=new_port,
             username=new_user,
             password=new_password,
             device_alias=new_alias,
-            # Preserve other settings
-            connect_timeout=current_config.connect_timeout,
-            read_timeout=current_config.read_timeout,
-            max_retries=current_config.max_retries,
-            db_path=current_config.db_path,
-            webhook_host=current_config.webhook_host,
-            webhook_port=current_config.webhook_port,
+            rate_limit=new_rate_limit,
+            max_concurrency=new_max_concurrency,
         )
 
         # Save the updated profile
@@ -1201,6 +1609,99 @@ def config_edit_profile(
         raise typer.Exit(1)
 
 
+@config_app.command("tag")
+def config_tag_profile(
+    name: str = typer.Argument(..., help="Profile name"),
+    tags: list[str] = typer.Argument(..., help="Tags to add (or remove with --remove)"),
+    remove: bool = typer.Option(False, "--remove", "-r", help="Remove the tags instead of adding them"),
+):
+    """Tag a profile for --target selection (e.g. 'tag:prod')."""
+    if remove:
+        found = config_manager.update_inventory(name, remove_tags=tags)
+    else:
+        found = config_manager.update_inventory(name, add_tags=tags)
+    if not found:
+        console.print(f"[red]Profile '{name}' not found[/red]")
+        raise typer.Exit(1)
+
+    current_tags = config_manager.get_profile_config(name).tags
+    console.print(f"[green]✓ Tags for '{name}': {', '.join(current_tags) or '(none)'}[/green]")
+
+
+@config_app.command("set-attr")
+def config_set_attributes(
+    name: str = typer.Argument(..., help="Profile name"),
+    assignments: list[str] = typer.Argument(..., help="Attributes as key=value (an empty value removes the key)"),
+):
+    """Set per-gateway attributes for --target selection (e.g. 'site=nyc')."""
+    from .inventory import TargetError, parse_attributes
+
+    try:
+        attributes = parse_attributes(assignments)
+    except TargetError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1) from e
+
+    if not config_manager.update_inventory(name, attributes=attributes):
+        console.print(f"[red]Profile '{name}' not found[/red]")
+        raise typer.Exit(1)
+
+    current = config_manager.get_profile_config(name).attributes
+    shown = ', '.join(f"{key}={value}" for key, value in current.items())
+    console.print(f"[green]✓ Attributes for '{name}': {shown or '(none)'}[/green]")
+
+
+@config_app.command("group")
+def config_group(
+    name: str = typer.Argument(..., help="Group name"),
+    selector: str | None = typer.Argument(None, help="Target selector defining the members (omit to show the group)"),
+    remove: bool = typer.Option(False, "--remove", "-r", help="Remove the group"),
+):
+    """Define, show or remove a named group of gateways."""
+    from .inventory import TargetError
+
+    if remove:
+        if not config_manager.remove_group(name):
+            console.print(f"[red]Group '{name}' not found[/red]")
+            raise typer.Exit(1)
+        console.print(f"[green]✓ Removed group '{name}'[/green]")
+        return
+
+    try:
+        if selector is not None:
+            config_manager.set_group(name, selector)
+        elif name not in config_manager.list_groups():
+            console.print(f"[red]Group '{name}' not found[/red]")
+            raise typer.Exit(1)
+        members = config_manager.resolve_targets(f"group:{name}")
+    except TargetError as e:
+        console.print(f"[red]Invalid group: {e}[/red]")
+        raise typer.Exit(1) from e
+
+    action = "✓ Saved group" if selector is not None else "Group"
+    console.print(f"[green]{action} '{name}' = {config_manager.list_groups()[name]}[/green]")
+    console.print(f"  {len(members)} gateways: {', '.join(members) or '(none)'}")
+
+
+@config_app.command("groups")
+def config_list_groups():
+    """List named groups and how many gateways each selects."""
+    from .inventory import TargetError
+
+    groups = config_manager.list_groups()
+    if not groups:
+        console.print("[yellow]No groups defined yet[/yellow]")
+        console.print("Use 'boxofports config group <name> <selector>' to create one")
+        return
+
+    for name, selector in groups.items():
+        try:
+            count = str(len(config_manager.resolve_targets(f"group:{name}")))
+        except TargetError as e:
+            count = f"[red]error: {e}[/red]"
+        console.print(f"[cyan]{name}[/cyan] = {selector}  [dim]({count} gateways)[/dim]")
+
+
 @config_app.command("current")
 def config_current_profile():
     """Show the current active profile."""
@@ -1240,6 +1741,7 @@ def inbox_list(
     status: int | None = typer.Option(None, "--status", help="Filter delivery reports by status code (0, 128, 132, 134, etc.)"),
     json_output: bool = typer.Option(False, "--json", help="Output as JSON"),
     sort: str | None = typer.Option(None, "--sort", help="Sort by column numbers, e.g. '6d,4,2'. Use 'a' & 'd' for ascending/descending."),
+    head: int = typer.Option(0, "--head", help="Show only the first N rows after sorting (0=all)"),
     csv: bool = typer.Option(False, "--csv", help="Export table data as CSV to stdout"),
     json_export: bool = typer.Option(False, "--json-export", help="Export table data as JSON to stdout"),
 ):
@@ -1248,6 +1750,16 @@ def inbox_list(
 
     from .api_models import MessageType, SMSInboxFilter
     from .inbox import SMSInboxService
+    from .ports import parse_port_spec
+    from .store import get_store
+    from .table_export import (
+        get_inbox_delivery_reports_columns,
+        get_inbox_messages_columns,
+        message_export_row,
+        messages_to_export_data,
+        render_and_export_table,
+        stream_table_export,
+    )
 
     config = get_config_or_exit(ctx)
     device_alias = config.device_alias or config.host
@@ -1304,6 +1816,7 @@ def inbox_list(
 
         # Get messages
         all_messages = inbox_service.get_messages(start_id=start_id, count=count)
+        get_store().save_delivery_reports(all_messages, device_ip=config.host)
         messages = inbox_service.filter_messages(all_messages, filter_criteria)
 
         if json_output:
@@ -1331,21 +1844,34 @@ def inbox_list(
 
         # Check if we have any delivery reports to determine table layout
         has_delivery_reports = any(msg.is_delivery_report for msg in messages)
-        current_profile = config_manager.get_current_profile()
+        current_profile = active_profile(ctx)
         
         # Determine message type for export formatting and column selection
         export_message_type = "standard"
         if has_delivery_reports and all(msg.is_delivery_report for msg in messages):
             export_message_type = "delivery_reports"
 
-        # Convert messages to export data format
-        messages_export_data = messages_to_export_data(messages, export_message_type, device_alias=device_alias)
-        
         # Select appropriate columns based on message type
         if export_message_type == "delivery_reports":
             columns = get_inbox_delivery_reports_columns()
         else:
             columns = get_inbox_messages_columns()
+
+        if console_only_mode:
+            # Export rows are built as they are written, never as one list
+            stream_table_export(
+                columns,
+                messages,
+                lambda msg: message_export_row(msg, export_message_type, device_alias),
+                sort_option=sort,
+                export_csv=csv,
+                export_json=json_export,
+                limit=head,
+            )
+            return
+
+        # Convert messages to export data format
+        messages_export_data = messages_to_export_data(messages, export_message_type, device_alias=device_alias)
         
         # Show table with centralized rendering
         inbox_console_only = render_and_export_table(
@@ -1358,7 +1884,8 @@ def inbox_list(
             csv_filename=None,
             json_filename=None,
             export_csv=csv,
-            export_json=json_export
+            export_json=json_export,
+            limit=head
         )
 
         # Show summary if not in console-only export mode
@@ -1383,11 +1910,19 @@ def inbox_search(
     count: int = typer.Option(0, "--count", help="Max messages to search (0=all)"),
     show_details: bool = typer.Option(False, "--details", help="Show full message details"),
     sort: str | None = typer.Option(None, "--sort", help="Sort by column numbers, e.g. '6d,5a'. Use 'a' & 'd' for ascending/descending."),
+    head: int = typer.Option(0, "--head", help="Show only the first N rows after sorting (0=all)"),
     csv: bool = typer.Option(False, "--csv", help="Export table data as CSV to stdout"),
     json_export: bool = typer.Option(False, "--json-export", help="Export table data as JSON to stdout"),
 ):
     """Search for messages containing specific text."""
     from .inbox import SMSInboxService
+    from .table_export import (
+        get_inbox_messages_columns,
+        message_export_row,
+        messages_to_export_data,
+        render_and_export_table,
+        stream_table_export,
+    )
 
     config = get_config_or_exit(ctx)
     device_alias = config.device_alias or config.host
@@ -1419,9 +1954,19 @@ def inbox_search(
                 console.print(f"  Content: {msg.content}")
                 if msg.contains_keywords:
                     console.print(f"  Keywords: {', '.join(msg.contains_keywords)}")
+        elif console_only_mode:
+            stream_table_export(
+                get_inbox_messages_columns(),
+                messages,
+                lambda msg: message_export_row(msg, "search", device_alias),
+                sort_option=sort,
+                export_csv=csv,
+                export_json=json_export,
+                limit=head,
+            )
         else:
             # Show compact table with centralized rendering
-            current_profile = config_manager.get_current_profile()
+            current_profile = active_profile(ctx)
             messages_export_data = messages_to_export_data(messages, "search", device_alias=device_alias)
             
             # Export search results table if requested (only when showing table, not details)
@@ -1435,7 +1980,8 @@ def inbox_search(
                 csv_filename=None,
                 json_filename=None,
                 export_csv=csv,
-                export_json=json_export
+                export_json=json_export,
+                limit=head
             )
 
             # Only show message count if not in console-only export mode
@@ -1460,6 +2006,13 @@ def inbox_stop(
     import json
 
     from .inbox import SMSInboxService
+    from .table_export import (
+        get_inbox_messages_columns,
+        message_export_row,
+        messages_to_export_data,
+        render_and_export_table,
+        stream_table_export,
+    )
 
     config = get_config_or_exit(ctx)
     device_alias = config.device_alias or config.host
@@ -1490,8 +2043,19 @@ def inbox_stop(
             console.print(json.dumps(json_data, indent=2))
             return
 
+        if console_only_mode:
+            stream_table_export(
+                get_inbox_messages_columns(),
+                messages,
+                lambda msg: message_export_row(msg, "stop", device_alias),
+                sort_option=sort,
+                export_csv=csv,
+                export_json=json_export,
+            )
+            return
+
         # Show table with centralized rendering
-        current_profile = config_manager.get_current_profile()
+        current_profile = active_profile(ctx)
         messages_export_data = messages_to_export_data(messages, "stop", device_alias=device_alias)
         
         render_console_only = render_and_export_table(
@@ -1635,5 +2199,442 @@ def inbox_show(
         raise typer.Exit(1)
 
 
+# ==============================================================================
+# Delivery Analytics Commands
+# ==============================================================================
+
+@report_app.command("ports")
+def report_ports(
+    ctx: typer.Context,
+    hours: int = typer.Option(24, "--hours", help="Look back this many hours (0=all history)"),
+    sort: str | None = typer.Option(None, "--sort", help="Sort by column numbers, e.g. '8,2'. Use 'a' & 'd' for ascending/descending."),
+    csv: bool = typer.Option(False, "--csv", help="Export table data as CSV to stdout"),
+    json_export: bool = typer.Option(False, "--json", help="Export table data as JSON to stdout"),
+):
+    """Per-port send and delivery success rates from recorded results."""
+    import time
+
+    from .store import get_store
+    from .table_export import (
+        get_report_ports_columns,
+        port_stats_to_export_data,
+        render_and_export_table,
+    )
+
+    config = get_config_or_exit(ctx)
+    device_alias = config.device_alias or config.host
+
+    try:
+        since_ts = int(time.time()) - hours * 3600 if hours > 0 else 0
+        stats = get_store().get_port_delivery_stats(since_ts=since_ts, device_ip=config.host)
+
+        if not stats:
+            if not (csv or json_export):
+                console.print("[yellow]No delivery results recorded for this period[/yellow]")
+            return
+
+        period = f"last {hours}h" if hours > 0 else "all time"
+        render_and_export_table(
+            title=f"Port Delivery Report ({period})",
+            columns=get_report_ports_columns(),
+            rows=port_stats_to_export_data(stats, device_alias=device_alias),
+            profile_name=active_profile(ctx),
+            command_name="report-ports",
+            sort_option=sort,
+            csv_filename=None,
+            json_filename=None,
+            export_csv=csv,
+            export_json=json_export
+        )
+
+    except Exception as e:
+        console.print(f"[red]Error building port report: {e}[/red]")
+        raise typer.Exit(1) from e
+
+
+@report_app.command("health")
+def report_health(
+    ctx: typer.Context,
+    hours: int = typer.Option(24, "--hours", help="Look back this many hours (0=all history)"),
+    minutes: bool = typer.Option(False, "--minutes", help="Use minute rollups for short, precise windows"),
+    sort: str | None = typer.Option(None, "--sort", help="Sort by column numbers, e.g. '5d,2'. Use 'a' & 'd' for ascending/descending."),
+    csv: bool = typer.Option(False, "--csv", help="Export table data as CSV to stdout"),
+    json_export: bool = typer.Option(False, "--json", help="Export table data as JSON to stdout"),
+):
+    """Port stability from recorded status changes — find the flapping SIMs."""
+    import time
+
+    from .store import get_store
+    from .table_export import (
+        get_report_health_columns,
+        port_health_to_export_data,
+        render_and_export_table,
+    )
+
+    config = get_config_or_exit(ctx)
+    device_alias = config.device_alias or config.host
+
+    try:
+        since_ts = int(time.time()) - hours * 3600 if hours > 0 else 0
+        health = get_store().get_port_health(
+            config.host,
+            since_ts=since_ts,
+            resolution='minute' if minutes else 'hour',
+        )
+
+        if not health:
+            if not (csv or json_export):
+                console.print("[yellow]No port status changes recorded for this period[/yellow]")
+            return
+
+        period = f"last {hours}h" if hours > 0 else "all time"
+        render_and_export_table(
+            title=f"Port Health ({period})",
+            columns=get_report_health_columns(),
+            rows=port_health_to_export_data(health, device_alias=device_alias),
+            profile_name=active_profile(ctx),
+            command_name="report-health",
+            sort_option=sort,
+            csv_filename=None,
+            json_filename=None,
+            export_csv=csv,
+            export_json=json_export
+        )
+
+    except Exception as e:
+        console.print(f"[red]Error building health report: {e}[/red]")
+        raise typer.Exit(1) from e
+
+
+# ==============================================================================
+# Local Database Commands
+# ==============================================================================
+
+@db_app.command("stats")
+def db_stats(
+    ctx: typer.Context,
+    json_output: bool = typer.Option(False, "--json", help="Output as JSON"),
+):
+    """Show local database statistics."""
+    import json
+
+    from .store import get_store
+
+    config = get_config_or_exit(ctx)
+
+    try:
+        stats = get_store().get_stats()
+
+        if json_output:
+            console.print(json.dumps(stats, indent=2))
+            return
+
+        console.print(f"[bold]🗄  Local Database ({config.db_path})[/bold]\n")
+        console.print(f"SMS Tasks: [cyan]{stats['total_tasks']}[/cyan] ({stats['tasks_last_24h']} in last 24h)")
+        console.print(f"Task Reports: [cyan]{stats['total_reports']}[/cyan]")
+        console.print(f"Inbox Messages: [cyan]{stats['total_inbox']}[/cyan] ({stats['inbox_last_24h']} in last 24h)")
+        console.print(f"Port Status Rows: [cyan]{stats['total_ports']}[/cyan]")
+
+    except Exception as e:
+        console.print(f"[red]Error reading database stats: {e}[/red]")
+        raise typer.Exit(1) from e
+
+
+@db_app.command("check")
+def db_check(
+    ctx: typer.Context,
+    repair: bool = typer.Option(False, "--repair", help="Rebuild counters if they have drifted"),
+):
+    """Verify materialized counters against the underlying tables."""
+    from .store import get_store
+
+    get_config_or_exit(ctx)
+
+    try:
+        mismatches = get_store().check_counters(repair=repair)
+
+        if not mismatches:
+            console.print("[green]✓ Counters are consistent[/green]")
+            return
+
+        for name, (stored, actual) in mismatches.items():
+            console.print(f"[yellow]{name}: stored {stored}, actual {actual}[/yellow]")
+
+        if repair:
+            console.print("[green]✓ Counters rebuilt from source tables[/green]")
+        else:
+            console.print("[dim]Run with --repair to rebuild the counters[/dim]")
+            raise typer.Exit(1)
+
+    except typer.Exit:
+        raise
+    except Exception as e:
+        console.print(f"[red]Counter check failed: {e}[/red]")
+        raise typer.Exit(1) from e
+
+
+@db_app.command("cleanup")
+def db_cleanup(
+    ctx: typer.Context,
+    days: int = typer.Option(30, "--days", help="Default retention in days"),
+    keep: list[str] = typer.Option([], "--keep", help="Per-table retention (table=days), e.g. 'inbox_messages=90'"),
+    batch_size: int = typer.Option(5000, "--batch-size", help="Maximum rows deleted per transaction"),
+    pause: float = typer.Option(0.0, "--pause", help="Seconds to yield between batches"),
+    every: int = typer.Option(0, "--every", help="Repeat every N minutes (0=run once)"),
+):
+    """Delete old local history in small batches and reclaim space."""
+    import time
+
+    from .store import get_store
+
+    get_config_or_exit(ctx)
+
+    try:
+        policies = {}
+        for item in keep:
+            table, _, value = item.partition('=')
+            if not value:
+                raise ValueError(f"Invalid --keep value '{item}', expected table=days")
+            policies[table.strip()] = int(value)
+
+        while True:
+            result = get_store().cleanup_old_data(
+                days_to_keep=days,
+                policies=policies,
+                batch_size=batch_size,
+                pause=pause,
+            )
+            console.print(
+                f"[green]✓ Cleanup done in {result['elapsed_seconds']}s "
+                f"({result['rows_per_second']} rows/s, {result['batches']} batches)[/green]"
+            )
+            console.print(
+                f"  Tasks: {result['tasks_deleted']}  Reports: {result['reports_deleted']}  "
+                f"Inbox: {result['inbox_deleted']}  Results: {result['results_deleted']}  "
+                f"Pages freed: {result['pages_freed']}"
+            )
+            if every <= 0:
+                break
+            time.sleep(every * 60)
+
+    except Exception as e:
+        console.print(f"[red]Cleanup failed: {e}[/red]")
+        raise typer.Exit(1) from e
+
+
+@db_app.command("vacuum")
+def db_vacuum(ctx: typer.Context):
+    """Enable incremental vacuum on an older database and release free pages."""
+    from .store import get_store
+
+    get_config_or_exit(ctx)
+
+    try:
+        store = get_store()
+        if store.enable_incremental_vacuum():
+            console.print("[blue]→ Converted database to incremental auto-vacuum[/blue]")
+        pages = store.incremental_vacuum()
+        console.print(f"[green]✓ Released {pages} free pages[/green]")
+
+    except Exception as e:
+        console.print(f"[red]Vacuum failed: {e}[/red]")
+        raise typer.Exit(1) from e
+
+
+# ==============================================================================
+# Export Commands
+# ==============================================================================
+
+def _parse_where(where: list[str] | None) -> dict[str, str]:
+    """Turn repeated --where column=value options into store filters."""
+    filters = {}
+    for clause in where or []:
+        name, sep, value = clause.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"Invalid --where '{clause}'; expected column=value")
+        filters[name.strip()] = value
+    return filters
+
+
+def _export_table(ctx: typer.Context, table: str, export_format: str, output: str,
+                  hours: int, where: list[str] | None, compress: str | None) -> None:
+    """Stream one store table to a file or stdout."""
+    from datetime import UTC, datetime, timedelta
+
+    from rich.markup import escape
+
+    from .export_stream import ExportError, stream_export
+    from .store import get_store
+
+    get_config_or_exit(ctx)
+
+    try:
+        store = get_store()
+        since = datetime.now(UTC) - timedelta(hours=hours) if hours > 0 else None
+        filters = _parse_where(where)
+        if export_format in ("parquet", "arrow"):
+            from .columnar_export import write_columnar
+            written = write_columnar(
+                store.iter_column_batches(table, since=since, filters=filters),
+                store.table_columns(table),
+                output,
+                export_format,
+            )
+        else:
+            written = stream_export(
+                store.iter_rows(table, since=since, filters=filters),
+                output,
+                export_format,
+                compression=compress,
+            )
+    except (ExportError, ValueError) as e:
+        console.print(f"[red]{escape(str(e))}[/red]")
+        raise typer.Exit(1) from e
+    except Exception as e:
+        console.print(f"[red]Export failed: {e}[/red]")
+        raise typer.Exit(1) from e
+
+    # Keep stdout clean when it carries the data
+    if output != "-":
+        console.print(f"[green]✓ Exported {written} rows from {table} to {output}[/green]")
+
+
+@export_app.command("csv")
+def export_csv(
+    ctx: typer.Context,
+    table: str = typer.Argument(..., help="Table to export (e.g. inbox_messages, sms_tasks, delivery_results)"),
+    output: str = typer.Option("-", "--output", "-o", help="Output file ('-' for stdout)"),
+    hours: int = typer.Option(0, "--hours", help="Only rows from the last N hours (0=all history)"),
+    where: list[str] | None = typer.Option(None, "--where", help="Filter on a column, e.g. 'port=1A' (repeatable)"),
+    compress: str | None = typer.Option(None, "--compress", help="gzip or zstd (default: from the file suffix)"),
+):
+    """Stream a local table as CSV."""
+    _export_table(ctx, table, "csv", output, hours, where, compress)
+
+
+@export_app.command("ndjson")
+def export_ndjson(
+    ctx: typer.Context,
+    table: str = typer.Argument(..., help="Table to export (e.g. inbox_messages, sms_tasks, delivery_results)"),
+    output: str = typer.Option("-", "--output", "-o", help="Output file ('-' for stdout)"),
+    hours: int = typer.Option(0, "--hours", help="Only rows from the last N hours (0=all history)"),
+    where: list[str] | None = typer.Option(None, "--where", help="Filter on a column, e.g. 'port=1A' (repeatable)"),
+    compress: str | None = typer.Option(None, "--compress", help="gzip or zstd (default: from the file suffix)"),
+):
+    """Stream a local table as newline-delimited JSON."""
+    _export_table(ctx, table, "ndjson", output, hours, where, compress)
+
+
+@export_app.command("parquet")
+def export_parquet(
+    ctx: typer.Context,
+    table: str = typer.Argument(..., help="Table to export (e.g. inbox_messages, sms_tasks, task_reports)"),
+    output: str | None = typer.Option(None, "--output", "-o", help="Output file (default: <table>.parquet)"),
+    hours: int = typer.Option(0, "--hours", help="Only rows from the last N hours (0=all history)"),
+    where: list[str] | None = typer.Option(None, "--where", help="Filter on a column, e.g. 'port=1A' (repeatable)"),
+    arrow: bool = typer.Option(False, "--arrow", help="Write an Arrow IPC file instead of Parquet"),
+):
+    """Archive a local table as a compressed Parquet or Arrow IPC file."""
+    from .columnar_export import detect_columnar_format
+
+    if output is None:
+        output = f"{table}.arrow" if arrow else f"{table}.parquet"
+    columnar_format = "arrow" if arrow else detect_columnar_format(output) or "parquet"
+    _export_table(ctx, table, columnar_format, output, hours, where, None)
+
+
+# ==============================================================================
+# Daemon Commands
+# ==============================================================================
+
+@daemon_app.command("start")
+def daemon_start(
+    foreground: bool = typer.Option(False, "--foreground", "-f", help="Run in this terminal instead of detaching"),
+    metrics_port: int | None = typer.Option(None, "--metrics-port", help="Also serve Prometheus metrics over HTTP at /metrics on this port"),
+    metrics_host: str = typer.Option("127.0.0.1", "--metrics-host", help="Address to bind the metrics port to"),
+):
+    """Start the daemon; later boxofports commands are forwarded to it."""
+    from .daemon import DaemonError, DaemonServer, start_background
+
+    try:
+        if foreground:
+            server = DaemonServer(metrics_port=metrics_port, metrics_host=metrics_host)
+            console.print(f"[green]🎵 Daemon listening on {server.path} (Ctrl+C to stop)[/green]")
+            if metrics_port:
+                console.print(f"[green]📈 Metrics at http://{metrics_host}:{metrics_port}/metrics[/green]")
+            server.serve()
+            return
+        status = start_background(metrics_port=metrics_port, metrics_host=metrics_host)
+    except DaemonError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1) from e
+    except KeyboardInterrupt:
+        return
+
+    console.print(f"[green]✓ Daemon started (pid {status['pid']}) on {status['socket']}[/green]")
+    if status.get('metrics_url'):
+        console.print(f"[green]📈 Metrics at {status['metrics_url']}[/green]")
+
+
+@daemon_app.command("stop")
+def daemon_stop():
+    """Stop the running daemon."""
+    from .daemon import control
+
+    status = control("stop")
+    if status is None:
+        console.print("[yellow]No daemon is running[/yellow]")
+        return
+    console.print(f"[green]✓ Daemon stopped after {status['served']} commands[/green]")
+
+
+@daemon_app.command("status")
+def daemon_status(
+    json_output: bool = typer.Option(False, "--json", help="Output as JSON"),
+):
+    """Show whether the daemon is running and what it holds."""
+    import json
+
+    from .daemon import control
+
+    status = control("ping")
+    if json_output:
+        console.print(json.dumps({"running": status is not None, **(status or {})}, indent=2))
+        return
+    if status is None:
+        console.print("[yellow]No daemon is running[/yellow]")
+        raise typer.Exit(1)
+
+    console.print(f"[bold]Daemon pid {status['pid']}[/bold] on {status['socket']}")
+    console.print(f"Uptime: [cyan]{status['uptime']:.0f}s[/cyan]")
+    console.print(f"Commands served: [cyan]{status['served']}[/cyan]")
+    console.print(f"Pooled gateway connections: [cyan]{status['clients']}[/cyan]")
+    if status.get('metrics_url'):
+        console.print(f"Metrics: [cyan]{status['metrics_url']}[/cyan]")
+    for base_url, stats in status.get('gateways', {}).items():
+        latency = stats.get('latency_ewma_ms')
+        circuit = stats.get('state', 'closed')
+        circuit_style = "green" if circuit == "closed" else "red"
+        console.print(
+            f"  {base_url}: window [cyan]{stats.get('window', 0):g}/{stats.get('max_concurrency', 0)}[/cyan], "
+            f"{stats.get('requests', 0)} requests, {stats.get('retries', 0)} retries, "
+            f"{stats.get('throttled', 0)} throttled, {stats.get('overloads', 0)} overloads, "
+            f"latency {'n/a' if latency is None else f'{latency:g}ms'}, "
+            f"circuit [{circuit_style}]{circuit}[/{circuit_style}]"
+        )
+
+
+@daemon_app.command("metrics")
+def daemon_metrics():
+    """Print the daemon's metrics in Prometheus text format."""
+    from .daemon import fetch_metrics
+
+    text = fetch_metrics()
+    if text is None:
+        console.print("[yellow]No daemon is running[/yellow]")
+        raise typer.Exit(1)
+    typer.echo(text, nl=False)
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,191 @@
+"""Columnar Parquet / Arrow IPC export of store tables.
+
+Store tables are read in column-oriented batches and written as Arrow
+record batches, so archives of any size are produced with bounded memory.
+Low-cardinality text columns such as ports and senders are dictionary
+encoded. Requires the optional ``pyarrow`` package
+(``pip install boxofports[parquet]``).
+"""
+
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from .export_stream import ExportError
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+# Repeated text values that compress well as dictionaries
+DICTIONARY_COLUMNS = frozenset({
+    'port', 'ports', 'sender', 'recipient', 'to_number', 'device_ip',
+    'outcome', 'status', 'status_text', 'operator',
+})
+
+_FORMAT_SUFFIXES = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+}
+
+# SQLite datetime text, as written by CURRENT_TIMESTAMP
+_SQLITE_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ExportError(
+            "Parquet/Arrow export requires the 'pyarrow' package "
+            "(pip install boxofports[parquet])"
+        ) from None
+    return pyarrow
+
+
+def detect_columnar_format(path: str | Path) -> str | None:
+    """Infer 'parquet' or 'arrow' from a file suffix."""
+    return _FORMAT_SUFFIXES.get(Path(path).suffix.lower())
+
+
+def arrow_schema(columns: list[tuple[str, str]]):
+    """Arrow schema for (name, declared SQLite type) pairs."""
+    pa = _require_pyarrow()
+    fields = []
+    for name, declared in columns:
+        if name in DICTIONARY_COLUMNS:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        elif declared.startswith('INT'):
+            arrow_type = pa.int64()
+        elif declared.startswith('TIMESTAMP'):
+            arrow_type = pa.timestamp('s', tz='UTC')
+        elif declared in ('REAL', 'FLOAT', 'DOUBLE'):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def _encode_batch(pa, values: list[Any]):
+    """Dictionary encode one batch over only the values it contains."""
+    text = [None if value is None else str(value) for value in values]
+    return pa.array(text, pa.string()).dictionary_encode()
+
+
+class _DeltaDictionaryEncoder:
+    """Grows one dictionary per column across batches.
+
+    Arrow IPC files allow a single dictionary per field, extended by
+    deltas. Each batch appends only the values it introduces; batches with
+    nothing new reuse the previous dictionary array as is.
+    """
+
+    def __init__(self):
+        self.index: dict[str, int] = {}
+        self.dictionary = None
+
+    def encode(self, pa, values: list[Any]):
+        index = self.index
+        indices = []
+        added = []
+        for value in values:
+            if value is None:
+                indices.append(None)
+                continue
+            value = str(value)
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(index)
+                added.append(value)
+            indices.append(code)
+
+        if self.dictionary is None:
+            self.dictionary = pa.array(added, pa.string())
+        elif added:
+            self.dictionary = pa.concat_arrays([self.dictionary, pa.array(added, pa.string())])
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), self.dictionary)
+
+
+def iter_record_batches(
+    batches: Iterable[dict[str, list]], schema, delta_dictionaries: bool = False
+) -> Iterator[Any]:
+    """Convert column-oriented batches into Arrow record batches.
+
+    Dictionary columns get a fresh dictionary per batch, unless
+    delta_dictionaries is set (Arrow IPC files), in which case each
+    batch's dictionary extends the previous one.
+    """
+    pa = _require_pyarrow()
+    import pyarrow.compute as pc
+
+    encoders = {
+        field.name: _DeltaDictionaryEncoder()
+        for field in schema if delta_dictionaries and pa.types.is_dictionary(field.type)
+    }
+
+    for batch in batches:
+        arrays = []
+        for field in schema:
+            values = batch[field.name]
+            if field.name in encoders:
+                arrays.append(encoders[field.name].encode(pa, values))
+            elif pa.types.is_dictionary(field.type):
+                arrays.append(_encode_batch(pa, values))
+            elif pa.types.is_timestamp(field.type):
+                text = pa.array(values, pa.string())
+                parsed = pc.strptime(text, format=_SQLITE_TIMESTAMP_FORMAT, unit='s', error_is_null=True)
+                arrays.append(parsed.cast(field.type))
+            else:
+                arrays.append(pa.array(values, field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_columnar(
+    batches: Iterable[dict[str, list]],
+    columns: list[tuple[str, str]],
+    target: str | Path,
+    columnar_format: str | None = None,
+    compression: str = 'zstd',
+) -> int:
+    """Write column-oriented batches to a Parquet or Arrow IPC file.
+
+    Args:
+        batches: Dicts of column name -> values, e.g. from
+            EjoinStore.iter_column_batches()
+        columns: (name, declared SQLite type) pairs describing the batches
+        target: Output file path
+        columnar_format: "parquet" or "arrow" (default: from the suffix,
+            falling back to parquet)
+        compression: Codec for Parquet pages or Arrow IPC buffers
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        ExportError: If pyarrow is missing or the format is unknown
+    """
+    if columnar_format is None:
+        columnar_format = detect_columnar_format(target) or 'parquet'
+    if columnar_format not in COLUMNAR_FORMATS:
+        raise ExportError(
+            f"Unknown columnar format '{columnar_format}'. Use one of: {', '.join(COLUMNAR_FORMATS)}"
+        )
+
+    pa = _require_pyarrow()
+    schema = arrow_schema(columns)
+
+    if columnar_format == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(str(target), schema, compression=compression)
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=compression, emit_dictionary_deltas=True)
+        writer = pa.ipc.new_file(str(target), schema, options=options)
+
+    written = 0
+    with writer:
+        for record_batch in iter_record_batches(batches, schema, delta_dictionaries=columnar_format == 'arrow'):
+            writer.write_batch(record_batch)
+            written += record_batch.num_rows
+    return written
@@ -0,0 +1,232 @@
+"""Fast shell completion for the boxofports command.
+
+Typer's built-in completion imports the whole application on every TAB
+press. This entry point answers from small on-disk data instead: the
+command tree is cached as JSON (rebuilt only when the CLI changes),
+profile names come straight from profiles.json and port names from the
+last device status snapshot of the current profile.
+
+Only the standard library is imported on the fast path; typer, rich,
+httpx, jinja2 and pydantic stay unloaded.
+
+Usage (from the shell completion function):
+    boxofports-complete <word1> <word2> ... <current word>
+"""
+
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any
+
+CONFIG_DIR = Path.home() / ".boxofports"
+TREE_CACHE_FILE = CONFIG_DIR / "cache" / "completion.json"
+
+# Options whose values are port specifications
+_PORT_OPTIONS = {"--ports", "--port"}
+
+# Commands whose first argument is a profile name
+_PROFILE_COMMANDS = {
+    ("config", "switch"), ("config", "show"), ("config", "remove"),
+    ("config", "tag"), ("config", "set-attr"),
+}
+
+# Bumped when the cached tree layout changes
+_TREE_FORMAT = 1
+
+
+def _tree_fingerprint() -> str:
+    """Identifies the CLI build the cached tree was generated from."""
+    cli_path = Path(__file__).with_name("cli.py")
+    try:
+        stat = cli_path.stat()
+        return f"{_TREE_FORMAT}:{stat.st_mtime_ns}:{stat.st_size}"
+    except OSError:
+        return f"{_TREE_FORMAT}:unknown"
+
+
+def _describe_command(command) -> dict[str, Any]:
+    """Flatten a click command into options, value options and arguments.
+
+    Parameters are told apart by param_type_name so this works whether
+    typer uses click or its vendored copy.
+    """
+    node: dict[str, Any] = {"options": [], "value_options": [], "arguments": [], "commands": {}}
+    for param in command.params:
+        if param.param_type_name == "option":
+            if param.hidden:
+                continue
+            node["options"].extend([*param.opts, *param.secondary_opts])
+            if not param.is_flag and not param.count:
+                node["value_options"].extend(param.opts)
+        elif param.param_type_name == "argument":
+            node["arguments"].append(param.name)
+    if hasattr(command, "commands"):
+        for name, sub in command.commands.items():
+            if not getattr(sub, "hidden", False):
+                node["commands"][name] = _describe_command(sub)
+    return node
+
+
+def build_command_tree() -> dict[str, Any]:
+    """Walk the Typer application and describe every command.
+
+    This is the slow path: it imports the full CLI.
+    """
+    import typer
+
+    from .cli import app
+    from .ports import STATUS_SELECTORS
+
+    tree = _describe_command(typer.main.get_command(app))
+    tree["port_selectors"] = ["all", *STATUS_SELECTORS, "slot:A", "slot:B", "slot:C", "slot:D"]
+    return tree
+
+
+def load_command_tree(cache_file: Path = TREE_CACHE_FILE) -> dict[str, Any]:
+    """The cached command tree, rebuilt when the CLI has changed."""
+    fingerprint = _tree_fingerprint()
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("fingerprint") == fingerprint:
+            return cached["tree"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    tree = build_command_tree()
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "tree": tree}, f)
+        os.replace(tmp_path, cache_file)
+    except OSError:
+        pass
+    return tree
+
+
+def _load_profiles(config_dir: Path) -> dict[str, Any]:
+    try:
+        with open(config_dir / "profiles.json", encoding="utf-8") as f:
+            profiles = json.load(f)
+        return profiles if isinstance(profiles, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def profile_names(config_dir: Path = CONFIG_DIR) -> list[str]:
+    """Configured profile names, read without building any configs."""
+    return list(_load_profiles(config_dir))
+
+
+def target_candidates(config_dir: Path = CONFIG_DIR) -> list[str]:
+    """Profile names, tags and groups for --target selectors."""
+    profiles = _load_profiles(config_dir)
+    tags: dict[str, None] = {}
+    for profile in profiles.values():
+        if isinstance(profile, dict):
+            tags.update((f"tag:{tag}", None) for tag in profile.get("tags") or [])
+    try:
+        with open(config_dir / "groups.json", encoding="utf-8") as f:
+            groups = [f"group:{name}" for name in json.load(f)]
+    except (OSError, ValueError, TypeError):
+        groups = []
+    return ["all", *profiles, *tags, *groups]
+
+
+def known_ports(config_dir: Path = CONFIG_DIR) -> list[str]:
+    """Ports from the current profile's last status snapshot, if any."""
+    try:
+        current = (config_dir / "current_profile").read_text(encoding="utf-8").strip()
+    except OSError:
+        return []
+    profile = _load_profiles(config_dir).get(current)
+    if not isinstance(profile, dict) or not profile.get("host"):
+        return []
+
+    # Same base URL and file naming as EjoinConfig / DeviceStatusCache
+    host = str(profile["host"])
+    base_url = f"http://{host}" if ":" in host else f"http://{host}:{profile.get('port', 80)}"
+    snapshot = config_dir / "cache" / "status" / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', base_url)}.json"
+    try:
+        with open(snapshot, encoding="utf-8") as f:
+            status = json.load(f)["data"].get("status", [])
+        return [str(entry["port"]) for entry in status if "port" in entry]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return []
+
+
+def complete(
+    words: list[str],
+    tree: dict[str, Any],
+    config_dir: Path = CONFIG_DIR,
+) -> list[str]:
+    """Candidates for the last word given the words before it.
+
+    Args:
+        words: Command line after the program name; the last entry is the
+            (possibly empty) word being completed
+        tree: Command tree from load_command_tree()
+        config_dir: Directory holding profiles.json and caches
+    """
+    *before, current = words or [""]
+
+    node = tree
+    path: list[str] = []
+    positional = 0
+    skip_value = False
+    prev = None
+    for word in before:
+        if skip_value:
+            skip_value = False
+        elif word.startswith("-"):
+            skip_value = word in node["value_options"] and "=" not in word
+        elif word in node["commands"]:
+            node = node["commands"][word]
+            path.append(word)
+            positional = 0
+        else:
+            positional += 1
+        prev = word
+
+    if skip_value and prev is not None:
+        if prev in _PORT_OPTIONS or prev == "--target":
+            # Complete the last element of a comma-separated list
+            head, _, tail = current.rpartition(",")
+            prefix = f"{head}," if head else ""
+            if prev == "--target":
+                candidates = target_candidates(config_dir)
+            else:
+                candidates = known_ports(config_dir) + tree.get("port_selectors", [])
+            return [prefix + c for c in candidates if c.startswith(tail)]
+        return []
+
+    if current.startswith("-"):
+        return [opt for opt in node["options"] if opt.startswith(current)]
+
+    if node["commands"]:
+        return [name for name in node["commands"] if name.startswith(current)]
+
+    if tuple(path) in _PROFILE_COMMANDS and positional == 0:
+        return [name for name in profile_names(config_dir) if name.startswith(current)]
+
+    return []
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Print one completion candidate per line."""
+    words = sys.argv[1:] if argv is None else argv
+    try:
+        candidates = complete(words, load_command_tree())
+    except Exception:
+        # Never break the user's shell over a completion error
+        return 0
+    if candidates:
+        sys.stdout.write("\n".join(candidates) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
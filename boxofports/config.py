@@ -2,12 +2,22 @@
 
 import json
 import os
-from dataclasses import asdict, dataclass, field
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, replace
 from pathlib import Path
 from typing import Any
 
 from dotenv import load_dotenv
 
+from .inventory import Inventory
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
 
 def parse_host_port(host_spec: str, default_port: int = 80) -> tuple[str, int]:
     """Parse host specification that may include port.
@@ -57,6 +67,26 @@ class EjoinConfig:
     read_timeout: float = 30.0
     max_retries: int = 3
 
+    # Retry guards (see retry.py): seconds a request may take including
+    # retries, retries allowed as a share of requests, and the consecutive
+    # failures / cooldown seconds of the per-gateway circuit breaker
+    request_deadline: float = 60.0
+    retry_budget: float = 0.2
+    breaker_threshold: int = 5
+    breaker_cooldown: float = 30.0
+
+    # Request governor (see governor.py): requests per second (0 = no cap),
+    # burst size, ceiling of the adaptive concurrency window and the
+    # response time above which the window shrinks
+    rate_limit: float = 0.0
+    rate_burst: int = 5
+    max_concurrency: int = 4
+    latency_target: float = 5.0
+
+    # Seconds a device status snapshot may be reused (capped by the
+    # device's own 'expires' value)
+    status_cache_ttl: float = 30.0
+
     # Database settings
     db_path: Path = field(default_factory=lambda: Path("./boxofports.db"))
 
@@ -64,6 +94,10 @@ class EjoinConfig:
     webhook_host: str = "0.0.0.0"
     webhook_port: int = 8080
 
+    # Inventory metadata used by --target selectors
+    tags: list[str] = field(default_factory=list)
+    attributes: dict[str, str] = field(default_factory=dict)
+
     @classmethod
     def from_env(cls, env_file: Path | None = None) -> "EjoinConfig":
         """Load configuration from environment variables and .env file."""
@@ -95,6 +129,10 @@ class EjoinConfig:
             device_alias=os.getenv("EJOIN_ALIAS", ""),
             connect_timeout=float(os.getenv("EJOIN_CONNECT_TIMEOUT", "10.0")),
             read_timeout=float(os.getenv("EJOIN_READ_TIMEOUT", "30.0")),
+            status_cache_ttl=float(os.getenv("EJOIN_STATUS_TTL", "30.0")),
+            request_deadline=float(os.getenv("EJOIN_REQUEST_DEADLINE", "60.0")),
+            rate_limit=float(os.getenv("EJOIN_RATE_LIMIT", "0")),
+            max_concurrency=int(os.getenv("EJOIN_MAX_CONCURRENCY", "4")),
             db_path=Path(os.getenv("EJOIN_DB_PATH", "./boxofports.db")),
             webhook_host=os.getenv("EJOIN_WEBHOOK_HOST", "0.0.0.0"),
             webhook_port=int(os.getenv("EJOIN_WEBHOOK_PORT", "8080")),
@@ -134,87 +172,210 @@ class EjoinConfig:
 
 
 class ConfigManager:
-    """Manages configuration profiles and current settings with persistence."""
+    """Manages configuration profiles and current settings with persistence.
+
+    Nothing is read when the manager is created. profiles.json is parsed
+    into a raw index on first access and parsed again only when the file
+    changes (inode, mtime or size), and each profile's EjoinConfig is built
+    the first time it is asked for. Writes go to a temporary file that is
+    renamed over the original, so readers never see a partial file.
+    Changes hold an exclusive lock on a .lock file in the config directory
+    and re-read the files under it, so concurrent processes (or daemon
+    threads) never drop each other's edits.
+
+    Groups for --target selectors live in groups.json and are cached the
+    same way; the inventory index over both is rebuilt only when either
+    file changes.
+    """
 
-    def __init__(self):
+    def __init__(self, config_dir: Path | None = None):
         self._current_config: EjoinConfig | None = None
-        self._profiles: dict[str, EjoinConfig] = {}
-        self._config_dir = Path.home() / ".boxofports"
+        self._config_dir = config_dir or Path.home() / ".boxofports"
         self._profiles_file = self._config_dir / "profiles.json"
         self._current_profile_file = self._config_dir / "current_profile"
+        self._groups_file = self._config_dir / "groups.json"
+        self._lock_file = self._config_dir / ".lock"
+
+        # Raw profile dicts by name, and the file stamp they were read at
+        self._profile_index: dict[str, dict[str, Any]] = {}
+        self._profiles_stamp: tuple[int, int, int] | None = None
+        self._profiles_loaded = False
+        # Configs built so far from the index
+        self._profiles: dict[str, EjoinConfig] = {}
+
         self._current_profile: str | None = None
+        self._current_profile_stamp: tuple[int, int, int] | None = None
+        self._current_profile_loaded = False
+
+        self._groups: dict[str, str] = {}
+        self._groups_stamp: tuple[int, int, int] | None = None
+        self._groups_loaded = False
 
-        # Ensure config directory exists
-        self._config_dir.mkdir(exist_ok=True)
+        self._inventory: Inventory | None = None
+        self._inventory_stamps: tuple[Any, Any] | None = None
 
-        # Load existing profiles and current profile
-        self._load_profiles()
-        self._load_current_profile()
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the config directory's lock for a read-modify-write.
 
-    def _load_profiles(self) -> None:
-        """Load profiles from disk."""
-        if self._profiles_file.exists():
+        Loads inside the block see other writers' changes, since the files
+        are re-read whenever their stamp differs.
+        """
+        fd = None
+        if fcntl is not None:
+            try:
+                self._config_dir.mkdir(parents=True, exist_ok=True)
+                fd = os.open(self._lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+            except OSError:
+                pass  # The save itself reports an unwritable directory
+        if fd is None:
+            yield
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _load_profiles(self) -> dict[str, dict[str, Any]]:
+        """Return the profile index, re-reading profiles.json if it changed."""
+        stamp = _file_stamp(self._profiles_file)
+        if self._profiles_loaded and stamp == self._profiles_stamp:
+            return self._profile_index
+
+        index: dict[str, dict[str, Any]] = {}
+        if stamp is not None:
             try:
                 with open(self._profiles_file) as f:
                     profiles_data = json.load(f)
-
-                self._profiles = {}
-                updated = False
+                if not isinstance(profiles_data, dict):
+                    raise ValueError("expected an object of profiles")
                 for name, config_data in profiles_data.items():
-                    cfg = EjoinConfig.from_dict(config_data)
-                    if not cfg.device_alias:
-                        first_word = name.split()[0] if name else ""
-                        cfg.device_alias = first_word or cfg.host
-                        updated = True
-                    self._profiles[name] = cfg
-
-                # Save back to disk if any profile was updated to persist the alias defaults
-                if updated:
-                    self._save_profiles()
-
+                    if isinstance(config_data, dict) and config_data.get("host"):
+                        if not config_data.get("device_alias"):
+                            # Profiles saved without an alias use the first word of their name
+                            config_data = {**config_data, "device_alias": _default_alias(name, config_data["host"])}
+                        index[name] = config_data
+                    else:
+                        print(f"Warning: Skipping invalid profile '{name}'")
             except Exception as e:
                 print(f"Warning: Could not load profiles: {e}")
-                self._profiles = {}
+                index = {}
+
+        self._profile_index = index
+        self._profiles_stamp = stamp
+        self._profiles_loaded = True
+        self._profiles = {}
+        return index
+
+    def _build_profile(self, name: str) -> EjoinConfig | None:
+        """Materialize one profile's config from the index."""
+        index = self._load_profiles()
+        if name not in index:
+            return None
+        cfg = self._profiles.get(name)
+        if cfg is not None:
+            return cfg
 
-    def _save_profiles(self) -> None:
-        """Save profiles to disk."""
         try:
-            profiles_data = {}
-            for name, config in self._profiles.items():
-                profiles_data[name] = config.to_dict()
-
-            with open(self._profiles_file, 'w') as f:
-                json.dump(profiles_data, f, indent=2)
+            cfg = EjoinConfig.from_dict(dict(index[name]))
+        except (TypeError, ValueError) as e:
+            print(f"Warning: Could not load profile '{name}': {e}")
+            return None
+        self._profiles[name] = cfg
+        return cfg
+
+    def _save_profiles(self, index: dict[str, dict[str, Any]]) -> None:
+        """Write the profile index to disk atomically."""
+        try:
+            _atomic_write(self._profiles_file, json.dumps(index, indent=2))
+            self._profile_index = index
+            self._profiles_stamp = _file_stamp(self._profiles_file)
+            self._profiles_loaded = True
         except Exception as e:
             print(f"Warning: Could not save profiles: {e}")
 
-    def _load_current_profile(self) -> None:
-        """Load current profile name from disk."""
-        if self._current_profile_file.exists():
+    def _load_current_profile(self) -> str | None:
+        """Current profile name, re-read if the file changed."""
+        stamp = _file_stamp(self._current_profile_file)
+        if self._current_profile_loaded and stamp == self._current_profile_stamp:
+            return self._current_profile
+
+        self._current_profile = None
+        if stamp is not None:
             try:
                 with open(self._current_profile_file) as f:
-                    self._current_profile = f.read().strip()
+                    self._current_profile = f.read().strip() or None
             except Exception:
                 self._current_profile = None
+        self._current_profile_stamp = stamp
+        self._current_profile_loaded = True
+        return self._current_profile
 
-    def _save_current_profile(self) -> None:
+    def _save_current_profile(self, name: str | None) -> None:
         """Save current profile name to disk."""
         try:
-            if self._current_profile:
-                with open(self._current_profile_file, 'w') as f:
-                    f.write(self._current_profile)
+            if name:
+                _atomic_write(self._current_profile_file, name)
             elif self._current_profile_file.exists():
                 self._current_profile_file.unlink()
+            self._current_profile = name
+            self._current_profile_stamp = _file_stamp(self._current_profile_file)
+            self._current_profile_loaded = True
         except Exception as e:
             print(f"Warning: Could not save current profile: {e}")
 
+    def _load_groups(self) -> dict[str, str]:
+        """Return group selectors by name, re-reading groups.json if it changed."""
+        stamp = _file_stamp(self._groups_file)
+        if self._groups_loaded and stamp == self._groups_stamp:
+            return self._groups
+
+        groups: dict[str, str] = {}
+        if stamp is not None:
+            try:
+                with open(self._groups_file) as f:
+                    groups_data = json.load(f)
+                if not isinstance(groups_data, dict):
+                    raise ValueError("expected an object of groups")
+                groups = {str(name): str(selector) for name, selector in groups_data.items()}
+            except Exception as e:
+                print(f"Warning: Could not load groups: {e}")
+                groups = {}
+
+        self._groups = groups
+        self._groups_stamp = stamp
+        self._groups_loaded = True
+        return groups
+
+    def _save_groups(self, groups: dict[str, str]) -> None:
+        """Write group selectors to disk atomically."""
+        try:
+            _atomic_write(self._groups_file, json.dumps(groups, indent=2))
+            self._groups = groups
+            self._groups_stamp = _file_stamp(self._groups_file)
+            self._groups_loaded = True
+        except Exception as e:
+            print(f"Warning: Could not save groups: {e}")
+
+    def reload(self) -> None:
+        """Forget state that may differ between requests.
+
+        Long-running processes call this so environment variables of the
+        current request are used; profile files are re-read on access
+        whenever they have changed.
+        """
+        self._current_config = None
+
     def get_config(self, profile: str | None = None) -> EjoinConfig:
         """Get configuration, optionally by profile name."""
         # Use specified profile, or current profile, or fallback to env
-        target_profile = profile or self._current_profile
+        target_profile = profile or self._load_current_profile()
 
-        if target_profile and target_profile in self._profiles:
-            return self._profiles[target_profile]
+        if target_profile:
+            cfg = self._build_profile(target_profile)
+            if cfg is not None:
+                return cfg
 
         # Fallback to environment-based config
         if self._current_config is None:
@@ -222,60 +383,181 @@ class ConfigManager:
                 self._current_config = EjoinConfig.from_env()
             except ValueError:
                 # If no env config available and no profiles, create a basic one
-                if not self._profiles:
+                index = self._load_profiles()
+                if not index:
                     raise ValueError(
                         "No configuration available. Either set environment variables "
                         "(EJOIN_HOST, etc.) or create a profile with 'boxofports config add-profile'."
                     )
                 # Use the first available profile
-                first_profile = next(iter(self._profiles.keys()))
-                return self._profiles[first_profile]
+                first_profile = next(iter(index))
+                return self._build_profile(first_profile)
 
         return self._current_config
 
     def add_profile(self, name: str, config: EjoinConfig) -> None:
-        """Add a named configuration profile."""
-        self._profiles[name] = config
-        self._save_profiles()
+        """Add (or replace) a named configuration profile."""
+        if not config.device_alias:
+            config = replace(config, device_alias=_default_alias(name, config.host))
+        with self._locked():
+            index = {**self._load_profiles(), name: config.to_dict()}
+            self._save_profiles(index)
+            self._profiles[name] = config
 
     def remove_profile(self, name: str) -> bool:
         """Remove a profile. Returns True if profile existed and was removed."""
-        if name in self._profiles:
-            del self._profiles[name]
+        with self._locked():
+            index = dict(self._load_profiles())
+            if name not in index:
+                return False
+
+            del index[name]
+            current = self._load_current_profile()
             # If we're removing the current profile, clear it
-            if self._current_profile == name:
-                self._current_profile = None
+            if current == name:
+                current = None
 
             # If only one profile remains, automatically set it as current
-            remaining_profiles = list(self._profiles.keys())
-            if len(remaining_profiles) == 1 and self._current_profile != remaining_profiles[0]:
-                self._current_profile = remaining_profiles[0]
+            remaining_profiles = list(index)
+            if len(remaining_profiles) == 1 and current != remaining_profiles[0]:
+                current = remaining_profiles[0]
 
-            self._save_current_profile()
-            self._save_profiles()
+            self._save_current_profile(current)
+            self._save_profiles(index)
             return True
-        return False
 
     def switch_profile(self, name: str) -> bool:
         """Switch to a different profile. Returns True if profile exists."""
-        if name in self._profiles:
-            self._current_profile = name
-            self._current_config = None  # Clear cached config to reload
-            self._save_current_profile()
-            return True
-        return False
+        with self._locked():
+            if name in self._load_profiles():
+                self._current_config = None  # Clear cached config to reload
+                self._save_current_profile(name)
+                return True
+            return False
 
     def get_current_profile(self) -> str | None:
         """Get the name of the current active profile."""
-        return self._current_profile
+        return self._load_current_profile()
 
     def list_profiles(self) -> list[str]:
         """List available configuration profiles."""
-        return list(self._profiles.keys())
+        return list(self._load_profiles())
 
     def get_profile_config(self, name: str) -> EjoinConfig | None:
         """Get configuration for a specific profile."""
-        return self._profiles.get(name)
+        return self._build_profile(name)
+
+    def get_profile_data(self, name: str) -> dict[str, Any] | None:
+        """Raw stored data of a profile, without building its config."""
+        return self._load_profiles().get(name)
+
+    def inventory(self) -> Inventory:
+        """Index of profiles by tag and attribute, plus the groups."""
+        index = self._load_profiles()
+        groups = self._load_groups()
+        stamps = (self._profiles_stamp, self._groups_stamp)
+        if self._inventory is None or stamps != self._inventory_stamps:
+            self._inventory = Inventory(index, groups)
+            self._inventory_stamps = stamps
+        return self._inventory
+
+    def resolve_targets(self, selector: str) -> list[str]:
+        """Profile names selected by a --target selector.
+
+        Raises:
+            TargetError: If the selector names an unknown profile or group
+        """
+        return self.inventory().select(selector)
+
+    def update_inventory(
+        self,
+        name: str,
+        add_tags: list[str] | None = None,
+        remove_tags: list[str] | None = None,
+        attributes: dict[str, str] | None = None,
+    ) -> bool:
+        """Change a profile's tags and attributes.
+
+        Attributes with an empty value are removed. Returns True if the
+        profile exists.
+        """
+        with self._locked():
+            index = dict(self._load_profiles())
+            if name not in index:
+                return False
+
+            data = dict(index[name])
+            tags = [tag for tag in data.get("tags") or [] if tag not in (remove_tags or [])]
+            tags.extend(tag for tag in dict.fromkeys(add_tags or []) if tag not in tags)
+            merged = {**(data.get("attributes") or {}), **(attributes or {})}
+            data["tags"] = tags
+            data["attributes"] = {key: value for key, value in merged.items() if value}
+            index[name] = data
+
+            self._save_profiles(index)
+            self._profiles.pop(name, None)
+            return True
+
+    def list_groups(self) -> dict[str, str]:
+        """Group selectors by group name."""
+        return dict(self._load_groups())
+
+    def set_group(self, name: str, selector: str) -> None:
+        """Define (or replace) a named group of gateways.
+
+        Raises:
+            TargetError: If the selector does not resolve
+        """
+        with self._locked():
+            groups = {**self._load_groups(), name: selector}
+            Inventory(self._load_profiles(), groups).select(f"group:{name}")
+            self._save_groups(groups)
+
+    def remove_group(self, name: str) -> bool:
+        """Remove a group. Returns True if it existed."""
+        with self._locked():
+            groups = dict(self._load_groups())
+            if groups.pop(name, None) is None:
+                return False
+            self._save_groups(groups)
+            return True
+
+
+def _default_alias(name: str, host: str) -> str:
+    """Alias for a profile saved without one: its name's first word."""
+    first_word = name.split()[0] if name.split() else ""
+    return first_word or host
+
+
+def _file_stamp(path: Path) -> tuple[int, int, int] | None:
+    """Identity of a file's current contents, or None if it is missing.
+
+    Atomic replacement always changes the inode, so writes by other
+    processes are noticed even within the mtime resolution.
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    """Write a file via a temporary sibling and rename it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
 
 
 # Global configuration manager instance
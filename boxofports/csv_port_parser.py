@@ -5,15 +5,107 @@ This module handles reading port specifications from CSV files.
 """
 
 import csv
+import hashlib
+import json
+import os
 import re
+from collections.abc import Callable, Iterator
 from pathlib import Path
 
+from .portset import PortId
+
 
 class CSVPortParseError(Exception):
     """Error parsing ports from CSV file."""
     pass
 
 
+DEFAULT_CACHE_DIR = Path.home() / ".boxofports" / "cache" / "csv"
+
+
+class CSVCache:
+    """Cache of parsed CSV manifests keyed by path, mtime and size.
+
+    Parsed values are kept in memory and, when a cache directory is set, on
+    disk so repeated commands against the same manifest skip re-parsing.
+    Any change to the file's mtime or size invalidates its entry.
+    """
+
+    def __init__(self, cache_dir: Path | None = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._entries: dict[tuple[str, str], tuple[int, int, list[str]]] = {}
+
+    def get(self, path: Path, kind: str, stat: os.stat_result) -> list[str] | None:
+        """Return cached values if the file is unchanged since they were stored."""
+        key = (str(path), kind)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._read(path, kind)
+            if entry is None:
+                return None
+            self._entries[key] = entry
+
+        mtime_ns, size, values = entry
+        if mtime_ns != stat.st_mtime_ns or size != stat.st_size:
+            return None
+        return values
+
+    def put(self, path: Path, kind: str, stat: os.stat_result, values: list[str]) -> None:
+        """Store parsed values for a file."""
+        entry = (stat.st_mtime_ns, stat.st_size, values)
+        self._entries[(str(path), kind)] = entry
+        self._write(path, kind, entry)
+
+    def clear(self) -> None:
+        """Forget every in-memory entry."""
+        self._entries.clear()
+
+    def _path(self, path: Path, kind: str) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        digest = hashlib.sha1(str(path).encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{kind}-{digest}.json"
+
+    def _read(self, path: Path, kind: str) -> tuple[int, int, list[str]] | None:
+        cache_path = self._path(path, kind)
+        if cache_path is None or not cache_path.exists():
+            return None
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                raw = json.load(f)
+            if raw["path"] != str(path):
+                return None
+            return raw["mtime_ns"], raw["size"], raw["values"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write(self, path: Path, kind: str, entry: tuple[int, int, list[str]]) -> None:
+        cache_path = self._path(path, kind)
+        if cache_path is None:
+            return
+        mtime_ns, size, values = entry
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"path": str(path), "mtime_ns": mtime_ns, "size": size, "values": values}, f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+
+
+# Process-wide cache shared by port and IMEI loading
+csv_cache = CSVCache()
+
+
+def _looks_like_csv_header(first_line: str) -> bool:
+    """Whether the first line of an extension-less file looks like a CSV header."""
+    first_line = first_line.strip().lower()
+    return ('port' in first_line or 'imei' in first_line) and (
+        ',' in first_line or len(first_line.split()) <= 3
+    )
+
+
 def is_csv_file(port_spec: str) -> bool:
     """Check if a port specification string is likely a CSV file path.
     
@@ -38,16 +130,139 @@ def is_csv_file(port_spec: str) -> bool:
         if path.exists() and path.is_file():
             # Try to peek at the first line to see if it looks like CSV
             with open(path, encoding='utf-8') as f:
-                first_line = f.readline().strip()
-                # If it contains 'port' and either commas or appears to be a header
-                if 'port' in first_line.lower() and (',' in first_line or len(first_line.split()) <= 3):
-                    return True
-    except (OSError, PermissionError):
+                return _looks_like_csv_header(f.readline())
+    except (OSError, UnicodeDecodeError):
         pass
 
     return False
 
 
+def _load_csv(
+    file_path: str | Path,
+    kind: str,
+    parse_rows: Callable[[list[str], Iterator[list[str]]], list[str]],
+    sniff: bool = False,
+) -> list[str] | None:
+    """Read a CSV file in one streaming pass, using the cache when unchanged.
+
+    Args:
+        file_path: Path to the CSV file
+        kind: Cache namespace ("ports" or "imeis")
+        parse_rows: Turns the header and row iterator into values
+        sniff: Return None instead of parsing when the first line does not
+            look like a CSV header (for paths without a .csv extension)
+
+    Returns:
+        Parsed values, or None when sniffing decided it is not a CSV file
+
+    Raises:
+        CSVPortParseError: If the file is missing or its format is invalid
+    """
+    path = Path(file_path)
+    try:
+        path = path.resolve()
+        stat = path.stat()
+    except OSError:
+        if sniff:
+            return None
+        raise CSVPortParseError(f"CSV file not found: {file_path}")
+
+    cached = csv_cache.get(path, kind, stat)
+    if cached is not None:
+        return list(cached)
+
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            first_line = f.readline()
+            if sniff and not _looks_like_csv_header(first_line):
+                return None
+
+            header = next(csv.reader([first_line]), None)
+            if not header:
+                raise CSVPortParseError("CSV file is empty or has no headers")
+
+            values = parse_rows(header, csv.reader(f))
+
+    except csv.Error as e:
+        raise CSVPortParseError(f"CSV parsing error: {e}")
+    except (OSError, UnicodeDecodeError) as e:
+        if sniff:
+            return None
+        raise CSVPortParseError(f"File reading error: {e}")
+
+    csv_cache.put(path, kind, stat, values)
+    return list(values)
+
+
+def _find_column(header: list[str], name: str) -> int | None:
+    """Index of a column by case-insensitive name."""
+    for index, field in enumerate(header):
+        if field.strip().lower() == name:
+            return index
+    return None
+
+
+def _cell(row: list[str], index: int | None) -> str:
+    """A stripped cell value, empty when the column is missing from the row."""
+    if index is None or index >= len(row) or row[index] is None:
+        return ''
+    return row[index].strip()
+
+
+def _parse_port_rows(header: list[str], rows: Iterator[list[str]]) -> list[str]:
+    """Turn CSV rows into normalized, de-duplicated port strings.
+
+    Ports keep the notation they were written in; a bare port number
+    means slot A. Duplicates are dropped across notations.
+    """
+    port_column = _find_column(header, 'port')
+    slot_column = _find_column(header, 'slot')
+    if port_column is None:
+        raise CSVPortParseError("CSV file must contain a 'port' column")
+
+    seen = set()
+    ports = []
+    for row_num, row in enumerate(rows, start=2):  # Start at 2 for header row
+        try:
+            port_value = _cell(row, port_column)
+            if not port_value:
+                continue  # Skip empty rows
+
+            # Format the port specification
+            slot_value = _cell(row, slot_column)
+            if slot_value:
+                formatted_port = _combine_port_and_slot(port_value, slot_value)
+            else:
+                formatted_port = _normalize_port_value(port_value)
+            port_id = PortId.parse(formatted_port)
+
+        except (ValueError, KeyError) as e:
+            raise CSVPortParseError(f"Invalid data in row {row_num}: {e}")
+
+        # Remove duplicates while preserving order
+        if port_id not in seen:
+            seen.add(port_id)
+            ports.append(port_id.decimal if '.' in formatted_port else port_id.alpha)
+
+    if not ports:
+        raise CSVPortParseError("No valid ports found in CSV file")
+
+    return ports
+
+
+def _parse_imei_rows(header: list[str], rows: Iterator[list[str]]) -> list[str]:
+    """Turn CSV rows into IMEI strings."""
+    imei_column = _find_column(header, 'imei')
+    if imei_column is None:
+        raise CSVPortParseError("CSV file must contain an 'imei' column")
+
+    imeis = [value for value in (_cell(row, imei_column) for row in rows) if value]
+    if not imeis:
+        raise CSVPortParseError("No valid IMEIs found in CSV file")
+
+    return imeis
+
+
 def parse_ports_from_csv(file_path: str | Path) -> list[str]:
     """Parse port specifications from a CSV file.
     
@@ -73,6 +288,8 @@ def parse_ports_from_csv(file_path: str | Path) -> list[str]:
     - Letter slots: port "1", slot "A" -> "1A"
     - If slot is empty/missing for a row, uses port as-is
     
+    Results are cached by path, mtime and size.
+
     Args:
         file_path: Path to CSV file
         
@@ -82,72 +299,7 @@ def parse_ports_from_csv(file_path: str | Path) -> list[str]:
     Raises:
         CSVPortParseError: If file format is invalid or required columns are missing
     """
-    file_path = Path(file_path)
-    if not file_path.exists():
-        raise CSVPortParseError(f"CSV file not found: {file_path}")
-
-    ports = []
-
-    try:
-        with open(file_path, newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-
-            # Validate headers
-            if not reader.fieldnames:
-                raise CSVPortParseError("CSV file is empty or has no headers")
-
-            # Check for required 'port' column (case-insensitive)
-            port_column = None
-            slot_column = None
-
-            for field in reader.fieldnames:
-                if field.lower() == 'port':
-                    port_column = field
-                elif field.lower() == 'slot':
-                    slot_column = field
-
-            if not port_column:
-                raise CSVPortParseError("CSV file must contain a 'port' column")
-
-            for row_num, row in enumerate(reader, start=2):  # Start at 2 for header row
-                try:
-                    port_value = row[port_column].strip()
-                    if not port_value:
-                        continue  # Skip empty rows
-
-                    # Get slot value if column exists
-                    slot_value = None
-                    if slot_column and row[slot_column] is not None and row[slot_column].strip():
-                        slot_value = row[slot_column].strip()
-
-                    # Format the port specification
-                    if slot_value:
-                        formatted_port = _combine_port_and_slot(port_value, slot_value)
-                    else:
-                        formatted_port = _normalize_port_value(port_value)
-
-                    ports.append(formatted_port)
-
-                except (ValueError, KeyError) as e:
-                    raise CSVPortParseError(f"Invalid data in row {row_num}: {e}")
-
-    except csv.Error as e:
-        raise CSVPortParseError(f"CSV parsing error: {e}")
-    except OSError as e:
-        raise CSVPortParseError(f"File reading error: {e}")
-
-    if not ports:
-        raise CSVPortParseError("No valid ports found in CSV file")
-
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_ports = []
-    for port in ports:
-        if port not in seen:
-            seen.add(port)
-            unique_ports.append(port)
-
-    return unique_ports
+    return _load_csv(file_path, "ports", _parse_port_rows)
 
 
 def _combine_port_and_slot(port_value: str, slot_value: str) -> str:
@@ -216,6 +368,8 @@ def parse_imeis_from_csv(file_path: str | Path) -> list[str]:
     - Required column: 'imei'
     - Optional columns: 'port', 'slot' (for validation/matching)
     
+    Results are cached by path, mtime and size.
+
     Args:
         file_path: Path to CSV file
         
@@ -225,51 +379,7 @@ def parse_imeis_from_csv(file_path: str | Path) -> list[str]:
     Raises:
         CSVPortParseError: If file format is invalid or required columns are missing
     """
-    file_path = Path(file_path)
-    if not file_path.exists():
-        raise CSVPortParseError(f"CSV file not found: {file_path}")
-
-    imeis = []
-
-    try:
-        with open(file_path, newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-
-            # Validate headers
-            if not reader.fieldnames:
-                raise CSVPortParseError("CSV file is empty or has no headers")
-
-            # Check for required 'imei' column (case-insensitive)
-            imei_column = None
-
-            for field in reader.fieldnames:
-                if field.lower() == 'imei':
-                    imei_column = field
-                    break
-
-            if not imei_column:
-                raise CSVPortParseError("CSV file must contain an 'imei' column")
-
-            for row_num, row in enumerate(reader, start=2):  # Start at 2 for header row
-                try:
-                    imei_value = row[imei_column].strip()
-                    if not imei_value:
-                        continue  # Skip empty rows
-
-                    imeis.append(imei_value)
-
-                except (ValueError, KeyError) as e:
-                    raise CSVPortParseError(f"Invalid data in row {row_num}: {e}")
-
-    except csv.Error as e:
-        raise CSVPortParseError(f"CSV parsing error: {e}")
-    except OSError as e:
-        raise CSVPortParseError(f"File reading error: {e}")
-
-    if not imeis:
-        raise CSVPortParseError("No valid IMEIs found in CSV file")
-
-    return imeis
+    return _load_csv(file_path, "imeis", _parse_imei_rows)
 
 
 def expand_csv_ports_if_needed(port_spec: str) -> list[str]:
@@ -288,9 +398,7 @@ def expand_csv_ports_if_needed(port_spec: str) -> list[str]:
     Raises:
         CSVPortParseError: If CSV parsing fails
     """
-    if is_csv_file(port_spec):
-        return parse_ports_from_csv(port_spec)
-    return None
+    return _expand_if_csv(port_spec, "ports", _parse_port_rows)
 
 
 def extract_port_and_slot(port_str: str) -> tuple[int, int]:
@@ -348,6 +456,23 @@ def expand_csv_imeis_if_needed(imei_spec: str) -> list[str] | None:
     Raises:
         CSVPortParseError: If CSV parsing fails
     """
-    if is_csv_file(imei_spec):
-        return parse_imeis_from_csv(imei_spec)
-    return None
+    return _expand_if_csv(imei_spec, "imeis", _parse_imei_rows)
+
+
+def _expand_if_csv(
+    spec: str,
+    kind: str,
+    parse_rows: Callable[[list[str], Iterator[list[str]]], list[str]],
+) -> list[str] | None:
+    """Load spec as a CSV file when it names one, sniffing in the same pass."""
+    if not spec or not isinstance(spec, str):
+        return None
+
+    spec = spec.strip()
+    if spec.lower().endswith('.csv'):
+        return _load_csv(spec, kind, parse_rows)
+
+    # Extension-less paths are only treated as CSV if their header says so
+    if ',' in spec or not Path(spec).is_file():
+        return None
+    return _load_csv(spec, kind, parse_rows, sniff=True)
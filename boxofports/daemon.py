@@ -0,0 +1,689 @@
+"""Resident daemon that runs CLI commands in a warm process.
+
+`boxofports daemon start` keeps one process alive with the CLI imported,
+HTTP connections pooled per gateway, the SQLite store open, the device
+status cache in memory and compiled SMS templates cached. While it runs,
+the `boxofports` entry point forwards each invocation over a Unix socket
+and streams the output back, so scripted loops skip interpreter startup,
+imports and connection setup.
+
+Protocol: the client sends one JSON line describing the invocation
+(argv, cwd, environment, terminal width). The daemon answers with binary
+frames of a one-byte channel, a four-byte big-endian length and the
+payload: b"o" stdout bytes, b"e" stderr bytes and finally b"x" with the
+exit code. When the command reads stdin (a confirmation prompt, say) the
+daemon sends b"r" with the most bytes it wants and the client replies
+with a b"i" frame holding a line of its own stdin, empty at end of input.
+A b"c" frame from the client, or the client disconnecting, interrupts
+the command.
+
+Commands run one at a time, each connection in its own thread. While one
+runs, other invocations get a b"b" (busy) frame and run locally instead,
+as do commands that repeat until stopped (--every).
+
+The daemon aggregates request, store and template metrics for its whole
+lifetime. `boxofports daemon metrics` prints them in the Prometheus text
+format, and with a metrics port the same text is served over HTTP at
+/metrics for scraping.
+
+The client half of this module imports only the standard library.
+Set BOXOFPORTS_NO_DAEMON=1 to always run commands locally.
+"""
+
+import io
+import json
+import os
+import shutil
+import socket
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+SOCKET_ENV = "BOXOFPORTS_DAEMON_SOCKET"
+DISABLE_ENV = "BOXOFPORTS_NO_DAEMON"
+
+_HEADER = struct.Struct(">cI")
+_STDOUT, _STDERR, _EXIT = b"o", b"e", b"x"
+_READ, _STDIN, _CANCEL, _BUSY = b"r", b"i", b"c", b"b"
+
+# Daemon management, and commands that repeat until stopped, run locally
+_LOCAL_COMMANDS = ("daemon",)
+_LOCAL_OPTIONS = ("--every",)
+
+# Seconds a stopping daemon waits for an interrupted command
+_STOP_TIMEOUT = 5.0
+
+
+class DaemonError(Exception):
+    """Raised when the daemon cannot be started or reached."""
+    pass
+
+
+def socket_path() -> Path:
+    """Socket the daemon listens on (BOXOFPORTS_DAEMON_SOCKET overrides)."""
+    override = os.environ.get(SOCKET_ENV)
+    if override:
+        return Path(override)
+    return Path.home() / ".boxofports" / "daemon.sock"
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+def _connect(path: Path) -> socket.socket | None:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _recv_exact(sock_file, size: int) -> bytes:
+    data = sock_file.read(size)
+    if len(data) != size:
+        raise DaemonError("Daemon closed the connection")
+    return data
+
+
+def _exchange(sock: socket.socket, request: dict[str, Any], stdout, stderr, stdin=None) -> int | None:
+    """Send a request and relay frames until the exit code arrives.
+
+    Returns:
+        The exit code, or None when the daemon is busy
+    """
+    with sock, sock.makefile("rb") as reader:
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        try:
+            while True:
+                channel, length = _HEADER.unpack(_recv_exact(reader, _HEADER.size))
+                payload = _recv_exact(reader, length)
+                if channel == _EXIT:
+                    return int(payload)
+                if channel == _BUSY:
+                    return None
+                if channel == _READ:
+                    data = stdin.readline(int(payload)) if stdin is not None else b""
+                    sock.sendall(_HEADER.pack(_STDIN, len(data)) + data)
+                    continue
+                stream = stdout if channel == _STDOUT else stderr
+                stream.write(payload)
+                stream.flush()
+        except KeyboardInterrupt:
+            # Stop the command in the daemon as well
+            try:
+                sock.sendall(_HEADER.pack(_CANCEL, 0))
+            except OSError:
+                pass
+            raise
+
+
+def forward(argv: list[str], path: Path | None = None, stdin=None) -> int | None:
+    """Run a command in the daemon, relaying its output and stdin.
+
+    Args:
+        argv: Command line without the program name
+        path: Daemon socket (default: socket_path())
+        stdin: Binary stream the command's input is read from
+            (default: this process's stdin)
+
+    Returns:
+        The command's exit code, or None when no daemon is reachable or
+        it is busy with another command
+    """
+    path = path or socket_path()
+    if not path.exists():
+        return None
+    sock = _connect(path)
+    if sock is None:
+        return None
+
+    request = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+        "tty": sys.stdout.isatty(),
+        "stdin_tty": sys.stdin is not None and sys.stdin.isatty(),
+        "columns": shutil.get_terminal_size().columns,
+    }
+    if stdin is None and sys.stdin is not None:
+        stdin = sys.stdin.buffer
+    try:
+        return _exchange(sock, request, sys.stdout.buffer, sys.stderr.buffer, stdin)
+    except DaemonError as e:
+        sys.stderr.write(f"boxofports: {e}\n")
+        return 1
+    except KeyboardInterrupt:
+        sys.stderr.write("\nAborted!\n")
+        return 1
+
+
+def runs_locally(argv: list[str]) -> bool:
+    """Whether a command line must run in this process, not the daemon."""
+    if argv[:1] and argv[0] in _LOCAL_COMMANDS:
+        return True
+    return any(arg.split("=", 1)[0] in _LOCAL_OPTIONS for arg in argv)
+
+
+def control(command: str, path: Path | None = None) -> dict[str, Any] | None:
+    """Send a control command ("ping" or "stop").
+
+    Returns:
+        The daemon's reply, or None when no daemon is reachable
+    """
+    path = path or socket_path()
+    sock = _connect(path)
+    if sock is None:
+        return None
+
+    reply = io.BytesIO()
+    try:
+        _exchange(sock, {"control": command}, reply, reply)
+    except (DaemonError, OSError):
+        return None
+    return json.loads(reply.getvalue() or b"{}")
+
+
+def fetch_metrics(path: Path | None = None) -> str | None:
+    """The daemon's metrics in Prometheus text format, or None if not running."""
+    path = path or socket_path()
+    sock = _connect(path)
+    if sock is None:
+        return None
+
+    reply = io.BytesIO()
+    try:
+        _exchange(sock, {"control": "metrics"}, reply, reply)
+    except (DaemonError, OSError):
+        return None
+    return reply.getvalue().decode("utf-8")
+
+
+def main() -> None:
+    """Console entry point: forward to a running daemon, else run locally."""
+    argv = sys.argv[1:]
+    if not os.environ.get(DISABLE_ENV) and not runs_locally(argv):
+        code = forward(argv)
+        if code is not None:
+            sys.exit(code)
+
+    from .cli import app
+    app()
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class _FrameWriter(io.RawIOBase):
+    """Raw binary stream that sends every write as one frame."""
+
+    def __init__(self, sock: socket.socket, channel: bytes, tty: bool):
+        super().__init__()
+        self._sock = sock
+        self._channel = channel
+        self._tty = tty
+        self.disconnected = False
+
+    def send(self, channel: bytes, payload: bytes) -> None:
+        if self.disconnected:
+            return
+        try:
+            self._sock.sendall(_HEADER.pack(channel, len(payload)) + payload)
+        except OSError:
+            # The client went away; let the command finish quietly
+            self.disconnected = True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        if data:
+            self.send(self._channel, data)
+        return len(data)
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return self._tty
+
+
+class _ClientFrames:
+    """Reads the frames a client sends while its command runs.
+
+    Stdin lines are queued for the command. A cancel frame or the client
+    disconnecting ends its input and calls on_cancel, once.
+    """
+
+    def __init__(self, reader, on_cancel):
+        import queue
+
+        self.lines: queue.Queue[bytes] = queue.Queue()
+        self._reader = reader
+        self._on_cancel = on_cancel
+        self._thread = threading.Thread(target=self._run, name="boxofports-client", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                channel, length = _HEADER.unpack(_recv_exact(self._reader, _HEADER.size))
+                payload = _recv_exact(self._reader, length)
+                if channel == _CANCEL:
+                    break
+                if channel == _STDIN:
+                    self.lines.put(payload)
+        except (OSError, ValueError, DaemonError):
+            # The client went away
+            pass
+        self.lines.put(b"")
+        self._on_cancel()
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+
+class _FrameReader(io.RawIOBase):
+    """Raw binary stream that asks the client for stdin one line at a time."""
+
+    def __init__(self, sock: socket.socket, frames: _ClientFrames, tty: bool, before_read=None):
+        super().__init__()
+        self._sock = sock
+        self._frames = frames
+        self._tty = tty
+        self._before_read = before_read
+        self._eof = False
+
+    def readinto(self, buffer) -> int:
+        if self._eof:
+            return 0
+        if self._before_read is not None:
+            # Show the prompt before waiting for the answer
+            self._before_read()
+        try:
+            wanted = str(len(buffer)).encode("ascii")
+            self._sock.sendall(_HEADER.pack(_READ, len(wanted)) + wanted)
+        except OSError:
+            data = b""
+        else:
+            data = self._frames.lines.get()
+        if not data:
+            self._eof = True
+            return 0
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return self._tty
+
+
+def _raise_in_thread(thread_id: int, exc_type: type[BaseException]) -> None:
+    """Raise exc_type in another thread at its next bytecode."""
+    import ctypes
+
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), ctypes.py_object(exc_type))
+
+
+class DaemonServer:
+    """Serves CLI invocations from a warm process over a Unix socket."""
+
+    def __init__(self, path: Path | None = None, metrics_port: int | None = None, metrics_host: str = "127.0.0.1"):
+
+        self.path = path or socket_path()
+        self.metrics_port = metrics_port
+        self.metrics_host = metrics_host
+        self.started_at = time.time()
+        self.served = 0
+        self._running = False
+        self._command = None
+        # One command at a time; _command_thread is the thread running it
+        self._busy = threading.Lock()
+        self._command_lock = threading.Lock()
+        self._command_thread: int | None = None
+
+    def warm_up(self) -> None:
+        """Import the CLI and open long-lived resources once."""
+        import typer
+
+        from . import cli, metrics, table_export, templating  # noqa: F401
+        from .config import config_manager
+        from .http import enable_client_pool
+        from .store import initialize_store
+
+        self._command = typer.main.get_command(cli.app)
+        metrics.add_hook(metrics.registry)
+        enable_client_pool()
+        try:
+            db_path = config_manager.get_config().db_path.expanduser()
+        except Exception:
+            # No configuration yet; the store opens on the first command
+            return
+        # A relative path belongs to each caller's directory, so that
+        # store is opened per command once the caller's cwd is known
+        if db_path.is_absolute():
+            initialize_store(db_path)
+
+    def status(self) -> dict[str, Any]:
+        from .governor import governor_stats
+        from .http import pooled_clients
+        from .retry import breaker_stats
+
+        gateways = governor_stats()
+        for base_url, stats in breaker_stats().items():
+            gateways.setdefault(base_url, {}).update(stats)
+        status = {
+            "pid": os.getpid(),
+            "socket": str(self.path),
+            "uptime": round(time.time() - self.started_at, 1),
+            "served": self.served,
+            "clients": pooled_clients(),
+            "gateways": gateways,
+        }
+        if self.metrics_port:
+            status["metrics_url"] = f"http://{self.metrics_host}:{self.metrics_port}/metrics"
+        return status
+
+    def prometheus(self) -> str:
+        """Aggregated metrics plus live daemon and gateway state."""
+        from .metrics import registry
+
+        status = self.status()
+        gauges = [
+            ("boxofports_daemon_uptime_seconds", "Seconds since the daemon started", {}, status["uptime"]),
+            ("boxofports_daemon_commands", "Commands served by the daemon", {}, status["served"]),
+            ("boxofports_daemon_pooled_clients", "Gateway connections kept open", {}, status["clients"]),
+        ]
+        for gateway, stats in status["gateways"].items():
+            labels = {"gateway": gateway}
+            gauges += [
+                ("boxofports_gateway_window", "Adaptive concurrency window", labels, stats.get("window", 0)),
+                ("boxofports_gateway_in_flight", "Requests in flight", labels, stats.get("in_flight", 0)),
+                ("boxofports_gateway_requests", "Request attempts sent", labels, stats.get("requests", 0)),
+                ("boxofports_gateway_throttled", "Requests that waited for the governor", labels, stats.get("throttled", 0)),
+                ("boxofports_gateway_overloads", "TOO_MANY_TASK replies", labels, stats.get("overloads", 0)),
+                ("boxofports_gateway_retries", "Retries made", labels, stats.get("retries", 0)),
+                ("boxofports_gateway_circuit_open", "1 while the circuit breaker is not closed", labels,
+                 0 if stats.get("state", "closed") == "closed" else 1),
+            ]
+        return registry.prometheus(gauges)
+
+    def run_command(self, request: dict[str, Any], sock: socket.socket, frames: _ClientFrames | None = None) -> int:
+        """Run one CLI invocation with its output sent over the socket.
+
+        With the client's frames, the command's stdin is read from the
+        client; without them the command sees end of input.
+        """
+        from rich.console import Console
+
+        from . import cli, table_export
+        from .config import config_manager
+
+        tty = bool(request.get("tty"))
+        raw_out = _FrameWriter(sock, _STDOUT, tty)
+        raw_err = _FrameWriter(sock, _STDERR, tty)
+        # Buffered like a normal process: line by line on a terminal,
+        # in blocks when piped
+        out = io.TextIOWrapper(io.BufferedWriter(raw_out), encoding="utf-8", line_buffering=tty)
+        err = io.TextIOWrapper(io.BufferedWriter(raw_err), encoding="utf-8", line_buffering=True)
+
+        saved_env = dict(os.environ)
+        saved_cwd = os.getcwd()
+        saved_streams = (sys.stdin, sys.stdout, sys.stderr)
+        saved_consoles = (cli.console, table_export.console)
+        try:
+            os.environ.clear()
+            os.environ.update(request.get("env") or {})
+            try:
+                os.chdir(request.get("cwd") or saved_cwd)
+            except OSError:
+                pass
+            if frames is not None:
+                def flush_output():
+                    out.flush()
+                    err.flush()
+
+                raw_in = _FrameReader(sock, frames, bool(request.get("stdin_tty")), flush_output)
+                stdin = io.TextIOWrapper(io.BufferedReader(raw_in), encoding="utf-8")
+            else:
+                stdin = io.StringIO()
+            sys.stdin, sys.stdout, sys.stderr = stdin, out, err
+            console = Console(
+                file=out,
+                width=request.get("columns") if tty else None,
+                force_terminal=tty,
+                force_interactive=False,
+            )
+            cli.console = table_export.console = console
+            config_manager.reload()
+
+            code = 1
+            try:
+                code = self._invoke(list(request.get("argv") or []))
+            except KeyboardInterrupt:
+                # Cancelled just as the command finished
+                pass
+            out.flush()
+            err.flush()
+            return code
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = saved_streams
+            cli.console, table_export.console = saved_consoles
+            os.environ.clear()
+            os.environ.update(saved_env)
+            os.chdir(saved_cwd)
+
+    def _invoke(self, argv: list[str]) -> int:
+        """Run the command in this thread, interruptible by _cancel_command."""
+        import traceback
+
+        self._set_command_thread(threading.get_ident())
+        try:
+            self._command.main(args=argv, prog_name="boxofports", standalone_mode=True)
+            return 0
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            traceback.print_exc()
+            return 1
+        finally:
+            self._set_command_thread(None)
+
+    def _set_command_thread(self, thread_id: int | None) -> None:
+        with self._command_lock:
+            self._command_thread = thread_id
+
+    def _cancel_command(self, thread_id: int) -> None:
+        """Interrupt the command running in thread_id, if it still is."""
+        with self._command_lock:
+            if self._command_thread == thread_id:
+                # Raised at the command's next bytecode; Click reports it
+                # as "Aborted!" with exit code 1
+                _raise_in_thread(thread_id, KeyboardInterrupt)
+
+    def handle(self, sock: socket.socket) -> None:
+        import functools
+
+        with sock, sock.makefile("rb") as reader:
+            try:
+                request = json.loads(reader.readline() or b"{}")
+            except ValueError:
+                return
+            replier = _FrameWriter(sock, _STDOUT, False)
+
+            control_command = request.get("control")
+            if control_command == "metrics":
+                replier.send(_STDOUT, self.prometheus().encode("utf-8"))
+                replier.send(_EXIT, b"0")
+                return
+            if control_command:
+                if control_command == "stop":
+                    self._running = False
+                replier.send(_STDOUT, json.dumps(self.status()).encode("utf-8"))
+                replier.send(_EXIT, b"0")
+                return
+
+            if not self._busy.acquire(blocking=False):
+                # The client runs the command itself rather than wait
+                replier.send(_BUSY, b"")
+                return
+            try:
+                frames = _ClientFrames(reader, functools.partial(self._cancel_command, threading.get_ident()))
+                code = self.run_command(request, sock, frames)
+                self.served += 1
+            finally:
+                self._busy.release()
+            replier.send(_EXIT, str(code).encode("ascii"))
+            try:
+                # Ends the frame reader once the client has its exit code
+                sock.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+            frames.join(timeout=1)
+
+    def serve(self) -> None:
+        """Listen until stopped; removes the socket on exit."""
+        import signal
+
+        from . import metrics
+        from .http import close_client_pool
+
+        if self.path.exists():
+            if control("ping", self.path) is not None:
+                raise DaemonError(f"A daemon is already listening on {self.path}")
+            self.path.unlink()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.warm_up()
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o077)
+        try:
+            listener.bind(str(self.path))
+        finally:
+            os.umask(old_umask)
+        listener.listen(16)
+        listener.settimeout(0.5)
+
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        self._running = True
+        metrics_server = None
+        try:
+            if self.metrics_port:
+                metrics_server = self._start_metrics_server()
+            while self._running:
+                try:
+                    conn, _ = listener.accept()
+                except TimeoutError:
+                    continue
+                conn.settimeout(None)
+                threading.Thread(target=self.handle, args=(conn,), name="boxofports-connection", daemon=True).start()
+        finally:
+            listener.close()
+            with self._command_lock:
+                running = self._command_thread
+            if running is not None:
+                self._cancel_command(running)
+            if self._busy.acquire(timeout=_STOP_TIMEOUT):
+                self._busy.release()
+            if metrics_server is not None:
+                metrics_server.shutdown()
+                metrics_server.server_close()
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+            close_client_pool()
+            metrics.remove_hook(metrics.registry)
+
+    def _start_metrics_server(self):
+        """Serve /metrics over HTTP from a background thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        daemon = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = daemon.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer((self.metrics_host, self.metrics_port), MetricsHandler)
+        except OSError as e:
+            raise DaemonError(f"Cannot serve metrics on {self.metrics_host}:{self.metrics_port}: {e}") from e
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def start_background(
+    path: Path | None = None,
+    timeout: float = 15.0,
+    metrics_port: int | None = None,
+    metrics_host: str = "127.0.0.1",
+) -> dict[str, Any]:
+    """Start the daemon as a detached process and wait until it answers.
+
+    Returns:
+        The daemon's status
+
+    Raises:
+        DaemonError: If it is already running or doesn't come up in time
+    """
+    import subprocess
+
+    path = path or socket_path()
+    if control("ping", path) is not None:
+        raise DaemonError(f"A daemon is already listening on {path}")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    log_path = path.with_suffix(".log")
+    env = {**os.environ, SOCKET_ENV: str(path)}
+    command = [sys.executable, "-m", "boxofports.daemon"]
+    if metrics_port:
+        command += ["--metrics-port", str(metrics_port), "--metrics-host", metrics_host]
+    with open(log_path, "ab") as log:
+        subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+            env=env, start_new_session=True,
+        )
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = control("ping", path)
+        if status is not None:
+            return status
+        time.sleep(0.05)
+    raise DaemonError(f"Daemon did not start within {timeout:.0f}s (see {log_path})")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m boxofports.daemon")
+    parser.add_argument("--metrics-port", type=int)
+    parser.add_argument("--metrics-host", default="127.0.0.1")
+    options = parser.parse_args()
+    try:
+        DaemonServer(metrics_port=options.metrics_port, metrics_host=options.metrics_host).serve()
+    except DaemonError as e:
+        sys.stderr.write(f"{e}\n")
+        sys.exit(1)
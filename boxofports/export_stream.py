@@ -0,0 +1,225 @@
+"""Streaming table export writers.
+
+Rows are consumed from any iterable and written one at a time as CSV,
+NDJSON or a JSON array, so memory stays flat however many rows are
+exported. Output goes to a file or stdout through a buffered stream and
+can be gzip or zstd compressed on the fly. zstd needs the optional
+``zstandard`` package (``pip install boxofports[zstd]``).
+"""
+
+import csv
+import gzip
+import io
+import itertools
+import json
+import sys
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any
+
+EXPORT_FORMATS = ("csv", "ndjson", "json")
+COMPRESSIONS = ("gzip", "zstd")
+
+# Output buffer size for files and compressed streams
+_BUFFER_SIZE = 1 << 16
+
+_COMPRESSION_SUFFIXES = {
+    ".gz": "gzip",
+    ".gzip": "gzip",
+    ".zst": "zstd",
+    ".zstd": "zstd",
+}
+
+
+class ExportError(Exception):
+    """Raised when an export target or format cannot be used."""
+    pass
+
+
+def detect_compression(path: str | Path | None) -> str | None:
+    """Infer the compression from a file suffix like '.csv.gz' or '.ndjson.zst'."""
+    if path is None or str(path) == "-":
+        return None
+    return _COMPRESSION_SUFFIXES.get(Path(path).suffix.lower())
+
+
+def _zstd_writer(raw: IO[bytes]) -> IO[bytes]:
+    try:
+        import zstandard
+    except ImportError:
+        raise ExportError(
+            "zstd compression requires the 'zstandard' package "
+            "(pip install boxofports[zstd])"
+        ) from None
+    return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+
+
+@contextmanager
+def open_export(
+    target: str | Path | None = None,
+    compression: str | None = None,
+) -> Iterator[IO[str]]:
+    """Open a buffered text stream for export output.
+
+    Args:
+        target: Output file path, or None / "-" for stdout
+        compression: "gzip", "zstd" or None; inferred from the file suffix
+            when not given
+
+    Yields:
+        A text stream; compressed data is flushed when the block exits
+
+    Raises:
+        ExportError: If the compression is unknown or unavailable
+    """
+    if compression is None:
+        compression = detect_compression(target)
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ExportError(
+            f"Unknown compression '{compression}'. Use one of: {', '.join(COMPRESSIONS)}"
+        )
+
+    to_stdout = target is None or str(target) == "-"
+
+    if compression is None:
+        if to_stdout:
+            yield sys.stdout
+            sys.stdout.flush()
+            return
+        with open(target, "w", newline="", encoding="utf-8", buffering=_BUFFER_SIZE) as stream:
+            yield stream
+        return
+
+    raw = sys.stdout.buffer if to_stdout else open(target, "wb", buffering=_BUFFER_SIZE)
+    try:
+        if compression == "gzip":
+            binary: IO[bytes] = gzip.GzipFile(fileobj=raw, mode="wb")
+        else:
+            binary = _zstd_writer(raw)
+        text = io.TextIOWrapper(
+            io.BufferedWriter(binary, _BUFFER_SIZE) if compression == "zstd" else binary,
+            encoding="utf-8",
+            newline="",
+            write_through=False,
+        )
+        try:
+            yield text
+        finally:
+            # Closing the wrapper flushes and finalizes the compressed frame
+            text.close()
+    finally:
+        if to_stdout:
+            raw.flush()
+        else:
+            raw.close()
+
+
+def peek_rows(rows: Iterable[dict[str, Any]]) -> tuple[dict[str, Any] | None, Iterator[dict[str, Any]]]:
+    """First row (or None) and an iterator that still yields every row."""
+    iterator = iter(rows)
+    first = next(iterator, None)
+    if first is None:
+        return None, iterator
+    return first, itertools.chain((first,), iterator)
+
+
+def write_csv(
+    rows: Iterable[dict[str, Any]],
+    stream: IO[str],
+    fieldnames: list[str] | None = None,
+) -> int:
+    """Write rows as CSV with a header line.
+
+    Fieldnames default to the keys of the first row. Nothing is written
+    for an empty input.
+
+    Returns:
+        Number of data rows written
+    """
+    first, iterator = peek_rows(rows)
+    if first is None:
+        return 0
+
+    writer = csv.DictWriter(stream, fieldnames=fieldnames or list(first.keys()))
+    writer.writeheader()
+    count = 0
+    for row in iterator:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_ndjson(rows: Iterable[dict[str, Any]], stream: IO[str]) -> int:
+    """Write one compact JSON object per line.
+
+    Returns:
+        Number of rows written
+    """
+    encode = json.JSONEncoder(ensure_ascii=False, default=str).encode
+    count = 0
+    for row in rows:
+        stream.write(encode(row))
+        stream.write("\n")
+        count += 1
+    return count
+
+
+def write_json_array(
+    rows: Iterable[dict[str, Any]],
+    stream: IO[str],
+    indent: int = 2,
+) -> int:
+    """Write rows as one JSON array, element by element.
+
+    The output matches json.dump(list(rows), indent=indent) without
+    building the list first.
+
+    Returns:
+        Number of rows written
+    """
+    encode = json.JSONEncoder(indent=indent, ensure_ascii=False, default=str).encode
+    pad = " " * indent
+    count = 0
+    for row in rows:
+        stream.write(",\n" + pad if count else "[\n" + pad)
+        # Strings are escaped, so every newline in the encoding is layout
+        stream.write(encode(row).replace("\n", "\n" + pad))
+        count += 1
+    stream.write("\n]" if count else "[]")
+    return count
+
+
+def stream_export(
+    rows: Iterable[dict[str, Any]],
+    target: str | Path | None = None,
+    export_format: str = "csv",
+    compression: str | None = None,
+    fieldnames: list[str] | None = None,
+) -> int:
+    """Write rows to a file or stdout in the given format.
+
+    Args:
+        rows: Any iterable of row dictionaries; consumed once
+        target: Output file path, or None / "-" for stdout
+        export_format: "csv", "ndjson" or "json"
+        compression: "gzip", "zstd" or None (inferred from the suffix)
+        fieldnames: CSV column order (defaults to the first row's keys)
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        ExportError: If the format or compression is not supported
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(
+            f"Unknown export format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}"
+        )
+
+    with open_export(target, compression) as stream:
+        if export_format == "csv":
+            return write_csv(rows, stream, fieldnames)
+        if export_format == "ndjson":
+            return write_ndjson(rows, stream)
+        return write_json_array(rows, stream)
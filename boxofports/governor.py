@@ -0,0 +1,216 @@
+"""Per-gateway request governor: token bucket plus an AIMD concurrency window.
+
+Every request to a gateway first takes a slot from its governor. Two
+limits apply:
+
+- A token bucket caps the request rate (``rate_limit`` requests per second
+  with bursts of ``rate_burst``); a rate of 0 leaves the rate uncapped.
+- A concurrency window bounds requests in flight. It grows additively
+  (about one slot per window of successful requests, up to
+  ``max_concurrency``) and halves on congestion: a timeout, an HTTP 429 or
+  503, a TOO_MANY_TASK reply or a response slower than ``latency_target``.
+  At most one halving happens per round trip, so a burst of failures from
+  the same window counts once. When the window is already at one request,
+  an explicit overload signal (not mere slowness) pauses the gateway for
+  a round trip instead.
+
+Governors are shared by every client talking to the same gateway in the
+process, and are safe to use from several threads and event loops.
+"""
+
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+# ResponseCode.TOO_MANY_TASK (api_models is not imported to keep this light)
+TOO_MANY_TASK = 16
+
+# HTTP statuses that mean the device is shedding load
+OVERLOAD_STATUSES = frozenset({429, 503})
+
+_POLL_INTERVAL = 0.01
+_MAX_WAIT_STEP = 0.25
+_MIN_COOLDOWN = 0.05
+_EWMA_WEIGHT = 0.2
+
+
+class GatewayGovernor:
+    """Rate limit and adaptive concurrency window for one gateway."""
+
+    def __init__(
+        self,
+        rate_limit: float = 0.0,
+        rate_burst: int = 5,
+        max_concurrency: int = 4,
+        latency_target: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._lock = threading.Lock()
+        self._clock = clock
+        # Start small and grow; configure() clamps both to the settings
+        self.window = 2.0
+        self._tokens = float("inf")
+        self.configure(rate_limit, rate_burst, max_concurrency, latency_target)
+
+        self.in_flight = 0
+        self._refilled_at = clock()
+        self._cooldown_until = 0.0
+        self._next_decrease_at = 0.0
+        self.latency_ewma: float | None = None
+
+        self.requests = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self.congestion_events = 0
+        self.overloads = 0
+        self.decreases = 0
+
+    def configure(self, rate_limit: float, rate_burst: int, max_concurrency: int, latency_target: float) -> None:
+        """Apply (possibly changed) profile settings."""
+        with self._lock:
+            self.rate_limit = max(0.0, float(rate_limit))
+            self.rate_burst = max(1, int(rate_burst))
+            self.max_concurrency = max(1, int(max_concurrency))
+            self.latency_target = float(latency_target)
+            self.window = min(self.window, float(self.max_concurrency))
+            self._tokens = min(self._tokens, float(self.rate_burst))
+
+    def try_acquire(self) -> float:
+        """Take a slot if one is free.
+
+        Returns:
+            0 when the slot was taken, otherwise seconds to wait before
+            trying again
+        """
+        with self._lock:
+            now = self._clock()
+            if now < self._cooldown_until:
+                return self._cooldown_until - now
+            if self.in_flight >= int(self.window):
+                return _POLL_INTERVAL
+            if self.rate_limit > 0:
+                elapsed = now - self._refilled_at
+                self._tokens = min(float(self.rate_burst), self._tokens + elapsed * self.rate_limit)
+                self._refilled_at = now
+                if self._tokens < 1:
+                    return (1 - self._tokens) / self.rate_limit
+                self._tokens -= 1
+            self.in_flight += 1
+            self.requests += 1
+            return 0.0
+
+    async def acquire(self) -> None:
+        """Wait for a slot to send one request."""
+        delay = self.try_acquire()
+        if not delay:
+            return
+        started = self._clock()
+        while delay:
+            await asyncio.sleep(min(delay, _MAX_WAIT_STEP))
+            delay = self.try_acquire()
+        with self._lock:
+            self.throttled += 1
+            self.wait_seconds += self._clock() - started
+
+    def release(self, latency: float | None, congested: bool = False) -> None:
+        """Return a slot and feed the request's outcome to the window.
+
+        Args:
+            latency: Seconds the request took, or None when it failed
+                without saying anything about load (e.g. connection refused)
+            congested: Whether the device signalled overload
+        """
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if latency is None:
+                return
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma += _EWMA_WEIGHT * (latency - self.latency_ewma)
+
+            if congested or latency > self.latency_target:
+                self._decrease(pause=congested)
+            else:
+                self.window = min(float(self.max_concurrency), self.window + 1 / self.window)
+
+    def record_overload(self) -> None:
+        """Note a TOO_MANY_TASK reply from the device."""
+        with self._lock:
+            self.overloads += 1
+            self._decrease(pause=True)
+
+    def _decrease(self, pause: bool) -> None:
+        """Multiplicative decrease, once per round trip. Lock must be held."""
+        self.congestion_events += 1
+        now = self._clock()
+        if now < self._next_decrease_at:
+            return
+        round_trip = max(self.latency_ewma or 0.0, _MIN_COOLDOWN)
+        self._next_decrease_at = now + round_trip
+        self.decreases += 1
+        if pause and self.window <= 1:
+            self._cooldown_until = now + round_trip
+        self.window = max(1.0, self.window / 2)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current limits and counters."""
+        with self._lock:
+            return {
+                "window": round(self.window, 2),
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "rate_limit": self.rate_limit,
+                "latency_ewma_ms": None if self.latency_ewma is None else round(self.latency_ewma * 1000, 1),
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "congestion_events": self.congestion_events,
+                "overloads": self.overloads,
+                "decreases": self.decreases,
+            }
+
+
+def is_overload_response(data: Any) -> bool:
+    """Whether a JSON reply reports TOO_MANY_TASK, overall or for a task."""
+    if not isinstance(data, dict):
+        return False
+    if data.get("code") == TOO_MANY_TASK:
+        return True
+    if data.get("type") == "task-status":
+        for entry in data.get("status") or ():
+            if isinstance(entry, dict) and str(entry.get("status", "")).split(" ", 1)[0] == str(TOO_MANY_TASK):
+                return True
+    return False
+
+
+_governors: dict[str, GatewayGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def governor_for(config) -> GatewayGovernor:
+    """The shared governor for a gateway, updated to the config's settings."""
+    key = config.base_url
+    settings = (config.rate_limit, config.rate_burst, config.max_concurrency, config.latency_target)
+    with _governors_lock:
+        governor = _governors.get(key)
+        if governor is None:
+            governor = _governors[key] = GatewayGovernor(*settings)
+            return governor
+    governor.configure(*settings)
+    return governor
+
+
+def governor_stats() -> dict[str, dict[str, Any]]:
+    """Snapshot of every gateway's governor, keyed by base URL."""
+    with _governors_lock:
+        governors = dict(_governors)
+    return {key: governor.snapshot() for key, governor in governors.items()}
+
+
+def reset_governors() -> None:
+    """Forget all governors and their learned windows."""
+    with _governors_lock:
+        _governors.clear()
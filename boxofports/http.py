@@ -2,12 +2,18 @@
 
 import asyncio
 import logging
+import time
 from typing import Any
 
 import httpx
 from httpx import Response
 
+from . import metrics
 from .config import EjoinConfig
+from .governor import OVERLOAD_STATUSES, governor_for, is_overload_response
+from .portset import PortId
+from .retry import backoff_delay, breaker_for, budget_for
+from .status_cache import status_cache
 
 logger = logging.getLogger(__name__)
 
@@ -31,12 +37,20 @@ class EjoinTimeoutError(EjoinHTTPError):
     pass
 
 
+class EjoinCircuitOpenError(EjoinHTTPError):
+    """Gateway skipped because its circuit breaker is open."""
+    pass
+
+
 class EjoinClient:
     """HTTP client for EJOIN Multi-WAN Router API with retry logic."""
 
     def __init__(self, config: EjoinConfig):
         self.config = config
         self._client: httpx.AsyncClient | None = None
+        self._governor = governor_for(config)
+        self._breaker = breaker_for(config)
+        self._budget = budget_for(config)
 
     async def __aenter__(self) -> "EjoinClient":
         """Async context manager entry."""
@@ -78,9 +92,20 @@ class EjoinClient:
         json: dict | None = None,
         data: dict | None = None,
         headers: dict | None = None,
-        retry_count: int = 0,
+        probe: bool = False,
     ) -> Response:
-        """Make an HTTP request with retry logic."""
+        """Make an HTTP request, retrying transient failures.
+
+        Connection errors, timeouts, HTTP 5xx and 429 are retried up to
+        max_retries times with full-jitter exponential backoff, as long as
+        the request deadline and the gateway's retry budget allow. While
+        the gateway's circuit breaker is open, requests fail immediately.
+
+        Args:
+            probe: Make a single attempt even if the breaker is open, for
+                polling a device that is expected to be down; the outcome
+                still updates the breaker
+        """
         await self._ensure_client()
 
         # Merge auth params with provided params
@@ -95,74 +120,121 @@ class EjoinClient:
         if headers:
             final_headers.update(headers)
 
+        # Log request (but mask password)
+        masked_params = final_params.copy()
+        if "password" in masked_params:
+            masked_params["password"] = "***"
+        logger.debug(f"{method} {url} params={masked_params}")
+
+        deadline = time.monotonic() + self.config.request_deadline
+        self._budget.record_request()
+        attempt = 0
+        status: int | str = "error"
+        received = None
+        started = time.perf_counter()
         try:
-            # Log request (but mask password)
-            masked_params = final_params.copy()
-            if "password" in masked_params:
-                masked_params["password"] = "***"
-            logger.debug(f"{method} {url} params={masked_params}")
+            while True:
+                if not probe and not self._breaker.allow():
+                    status = "circuit_open"
+                    raise EjoinCircuitOpenError(
+                        f"Gateway {self.config.base_url} keeps failing; "
+                        f"requests are paused for {self._breaker.retry_after():.0f}s"
+                    )
+
+                try:
+                    response = await self._send(method, url, final_params, json, data, final_headers, deadline)
+                except (httpx.TimeoutException, httpx.ConnectError) as e:
+                    self._breaker.record_failure()
+                    status = "timeout" if isinstance(e, httpx.TimeoutException) else "connect_error"
+                    failure: Exception | Response = e
+                except httpx.TransportError:
+                    self._breaker.record_failure()
+                    status = "transport_error"
+                    raise
+                else:
+                    status, received = response.status_code, len(response.content)
+                    if not _is_retryable_status(response.status_code):
+                        self._breaker.record_success()
+                        return _check_status(response)
+                    self._breaker.record_failure()
+                    failure = response
+
+                delay = backoff_delay(attempt)
+                if probe or attempt >= self.config.max_retries:
+                    stopped = f"after {attempt} retries"
+                elif time.monotonic() + delay >= deadline:
+                    stopped = f"within the {self.config.request_deadline:g}s deadline ({attempt} retries)"
+                elif not self._budget.try_spend():
+                    stopped = f"after {attempt} retries (retry budget exhausted)"
+                else:
+                    logger.warning(
+                        f"{_describe_failure(failure)}, retrying in {delay:.1f}s "
+                        f"(attempt {attempt + 1}/{self.config.max_retries})"
+                    )
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
 
+                if isinstance(failure, httpx.TimeoutException):
+                    raise EjoinTimeoutError(f"Request timed out {stopped}") from failure
+                if isinstance(failure, httpx.ConnectError):
+                    raise EjoinHTTPError(f"Connection failed {stopped}: {failure}") from failure
+                return _check_status(failure)
+        finally:
+            if metrics.active():
+                metrics.emit(
+                    "http",
+                    gateway=self.config.base_url,
+                    endpoint=url,
+                    method=method,
+                    status=status,
+                    bytes=received,
+                    seconds=time.perf_counter() - started,
+                    retries=attempt,
+                )
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        params: dict,
+        json: dict | None,
+        data: dict | None,
+        headers: dict,
+        deadline: float,
+    ) -> Response:
+        """One attempt, paced by the governor and cut short at the deadline."""
+        remaining = max(deadline - time.monotonic(), 0.001)
+        timeout = httpx.Timeout(
+            connect=min(self.config.connect_timeout, remaining),
+            read=min(self.config.read_timeout, remaining),
+            write=min(self.config.connect_timeout, remaining),
+            pool=min(self.config.connect_timeout, remaining),
+        )
+
+        await self._governor.acquire()
+        started = time.monotonic()
+        try:
             response = await self._client.request(
                 method=method,
                 url=url,
-                params=final_params,
+                params=params,
                 json=json,
                 data=data,
-                headers=final_headers or None,
+                headers=headers or None,
+                timeout=timeout,
             )
-
-            # Check for authentication errors
-            if response.status_code == 401:
-                raise EjoinAuthError(
-                    "Authentication failed. Check username and password.",
-                    status_code=response.status_code
-                )
-
-            # Check for other HTTP errors
-            if response.status_code >= 400:
-                try:
-                    error_data = response.json()
-                    message = f"HTTP {response.status_code}: {error_data.get('reason', 'Unknown error')}"
-                except Exception:
-                    message = f"HTTP {response.status_code}: {response.text}"
-
-                raise EjoinHTTPError(
-                    message,
-                    status_code=response.status_code,
-                    response=error_data if 'error_data' in locals() else None
-                )
-
-            return response
-
-        except httpx.TimeoutException as e:
-            if retry_count < self.config.max_retries:
-                wait_time = 2 ** retry_count  # Exponential backoff
-                logger.warning(f"Request timeout, retrying in {wait_time}s (attempt {retry_count + 1}/{self.config.max_retries})")
-                await asyncio.sleep(wait_time)
-                return await self._make_request(method, url, params, json, data, headers, retry_count + 1)
-
-            raise EjoinTimeoutError(f"Request timed out after {self.config.max_retries} retries") from e
-
-        except httpx.ConnectError as e:
-            if retry_count < self.config.max_retries:
-                wait_time = 2 ** retry_count
-                logger.warning(f"Connection error, retrying in {wait_time}s (attempt {retry_count + 1}/{self.config.max_retries})")
-                await asyncio.sleep(wait_time)
-                return await self._make_request(method, url, params, json, data, headers, retry_count + 1)
-
-            raise EjoinHTTPError(f"Connection failed after {self.config.max_retries} retries: {e}") from e
-
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code >= 500 and retry_count < self.config.max_retries:
-                wait_time = 2 ** retry_count
-                logger.warning(f"Server error {e.response.status_code}, retrying in {wait_time}s")
-                await asyncio.sleep(wait_time)
-                return await self._make_request(method, url, params, json, data, headers, retry_count + 1)
-
-            raise EjoinHTTPError(
-                f"HTTP {e.response.status_code}: {e.response.text}",
-                status_code=e.response.status_code
-            ) from e
+        except httpx.TimeoutException:
+            self._governor.release(time.monotonic() - started, congested=True)
+            raise
+        except BaseException:
+            self._governor.release(None)
+            raise
+        self._governor.release(
+            time.monotonic() - started,
+            congested=response.status_code in OVERLOAD_STATUSES,
+        )
+        return response
 
     async def get(self, url: str, params: dict | None = None, **kwargs) -> Response:
         """Make a GET request."""
@@ -175,12 +247,55 @@ class EjoinClient:
     async def get_json(self, url: str, params: dict | None = None, **kwargs) -> dict[str, Any]:
         """Make a GET request and return JSON response."""
         response = await self.get(url, params=params, **kwargs)
-        return response.json()
+        return self._decode(response)
 
     async def post_json(self, url: str, json: dict | None = None, data: dict | None = None, params: dict | None = None, **kwargs) -> dict[str, Any]:
         """Make a POST request and return JSON response."""
         response = await self.post(url, json=json, data=data, params=params, **kwargs)
-        return response.json()
+        return self._decode(response)
+
+    def _decode(self, response: Response) -> dict[str, Any]:
+        """Parse a JSON reply, telling the governor if the device is overloaded."""
+        data = response.json()
+        if is_overload_response(data):
+            self._governor.record_overload()
+        return data
+
+
+def _is_retryable_status(status_code: int) -> bool:
+    """Server errors and rate limiting are worth another attempt."""
+    return status_code >= 500 or status_code == 429
+
+
+def _describe_failure(failure: Exception | Response) -> str:
+    if isinstance(failure, httpx.TimeoutException):
+        return "Request timeout"
+    if isinstance(failure, httpx.ConnectError):
+        return "Connection error"
+    return f"Server error {failure.status_code}"
+
+
+def _check_status(response: Response) -> Response:
+    """Return a successful response, raising for HTTP errors."""
+    # Check for authentication errors
+    if response.status_code == 401:
+        raise EjoinAuthError(
+            "Authentication failed. Check username and password.",
+            status_code=response.status_code
+        )
+
+    # Check for other HTTP errors
+    if response.status_code >= 400:
+        error_data = None
+        try:
+            error_data = response.json()
+            message = f"HTTP {response.status_code}: {error_data.get('reason', 'Unknown error')}"
+        except Exception:
+            message = f"HTTP {response.status_code}: {response.text}"
+
+        raise EjoinHTTPError(message, status_code=response.status_code, response=error_data)
+
+    return response
 
 
 def create_client(config: EjoinConfig) -> EjoinClient:
@@ -190,14 +305,23 @@ def create_client(config: EjoinConfig) -> EjoinClient:
 
 # Synchronous wrapper for backward compatibility
 class SyncEjoinClient:
-    """Synchronous wrapper for EjoinClient."""
+    """Synchronous wrapper for EjoinClient.
 
-    def __init__(self, config: EjoinConfig):
+    By default each call opens and closes its own connection. With
+    keep_alive the client runs on a private event loop and keeps its
+    connection pool open until close() is called.
+    """
+
+    def __init__(self, config: EjoinConfig, keep_alive: bool = False):
         self.config = config
         self._client = EjoinClient(config)
+        self.keep_alive = keep_alive
+        self._loop = asyncio.new_event_loop() if keep_alive else None
 
     def _run_async(self, coro):
         """Run an async coroutine synchronously."""
+        if self._loop is not None:
+            return self._loop.run_until_complete(coro)
         try:
             loop = asyncio.get_event_loop()
         except RuntimeError:
@@ -216,6 +340,8 @@ class SyncEjoinClient:
     def get_json(self, url: str, params: dict | None = None, **kwargs) -> dict[str, Any]:
         """Make a GET request and return JSON response."""
         async def _get():
+            if self.keep_alive:
+                return await self._client.get_json(url, params=params, **kwargs)
             async with self._client:
                 return await self._client.get_json(url, params=params, **kwargs)
         return self._run_async(_get())
@@ -223,10 +349,59 @@ class SyncEjoinClient:
     def post_json(self, url: str, json: dict | None = None, data: dict | None = None, params: dict | None = None, **kwargs) -> dict[str, Any]:
         """Make a POST request and return JSON response."""
         async def _post():
+            if self.keep_alive:
+                return await self._client.post_json(url, json=json, data=data, params=params, **kwargs)
             async with self._client:
                 return await self._client.post_json(url, json=json, data=data, params=params, **kwargs)
         return self._run_async(_post())
 
+    def close(self) -> None:
+        """Close a kept-alive connection pool and its event loop."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.run_until_complete(self._client.close())
+            self._loop.close()
+
+    def get_status(self, max_age: float | None = None) -> dict[str, Any]:
+        """Get the device status, reusing a cached snapshot while fresh.
+
+        Concurrent callers for the same gateway share one request.
+
+        Args:
+            max_age: Maximum acceptable snapshot age in seconds for this
+                call (0 forces a device round trip)
+
+        Returns:
+            Device status response (dev-status message)
+        """
+        return status_cache.get(
+            self.config.base_url,
+            self._fetch_status,
+            ttl=self.config.status_cache_ttl,
+            max_age=max_age,
+        )
+
+    def _fetch_status(self) -> dict[str, Any]:
+        """Ask the device for its status and record it in the local store.
+
+        Port state changes feed port_status_history and `report health`.
+        Without an open store (library use) the snapshot is only cached.
+        """
+        data = self.get_json("/goip_get_status.html")
+        from .store import get_store
+
+        try:
+            store = get_store()
+        except RuntimeError:
+            return data
+        try:
+            store.save_status_snapshot(self.config.host, data)
+        except Exception as e:
+            logger.warning(f"Could not record port status: {e}")
+        return data
+
+    def invalidate_status(self) -> None:
+        """Drop the cached status after operations that change port state."""
+        status_cache.invalidate(self.config.base_url)
 
     def get_sms_inbox(self, sms_id: int = 1, sms_num: int = 0, delete_after: bool = False) -> dict[str, Any]:
         """Query SMS inbox from the device.
@@ -264,12 +439,15 @@ class SyncEjoinClient:
 
         try:
             response = self.post_json("/set_imeis", json=changes, params=params)
-            return response
         except Exception as e:
             # Handle empty response or non-JSON response as success
-            if "Expecting value" in str(e):
-                return {"code": 0, "reason": "OK"}
-            raise
+            if "Expecting value" not in str(e):
+                raise
+            response = {"code": 0, "reason": "OK"}
+
+        # Cached snapshots still report the old IMEIs
+        self.invalidate_status()
+        return response
 
     def save_config(self) -> dict[str, Any]:
         """Save device configuration to make IMEI changes persistent.
@@ -302,6 +480,7 @@ class SyncEjoinClient:
             "password": self.config.password
         }
 
+        self.invalidate_status()
         try:
             response = self.post_json("/reboot_device", json={}, params=params)
             return response
@@ -327,6 +506,7 @@ class SyncEjoinClient:
 
         unlock_data = {"slots": slots}
 
+        self.invalidate_status()
         try:
             response = self.post_json("/unlock_sims", json=unlock_data, params=params)
             return response
@@ -354,7 +534,8 @@ class SyncEjoinClient:
         while time.time() - start_time < timeout:
             try:
                 # Try to get device status
-                response = self.get_json("/goip_get_status.html")
+                # One attempt per poll, even while the breaker is open
+                response = self.get_json("/goip_get_status.html", probe=True)
                 if response.get("type") == "dev-status":
                     return True
             except Exception:
@@ -372,7 +553,8 @@ class SyncEjoinClient:
         """Get IMEI values for specified ports.
         
         This method actually uses the status endpoint since IMEI values
-        are included in the device status response.
+        are included in the device status response, so a cached snapshot
+        is used when fresh.
         
         Args:
             ports: Port specification (e.g., '3A' or '1A,2B,3A')
@@ -383,10 +565,10 @@ class SyncEjoinClient:
         from .ports import parse_port_spec
 
         # Get device status which includes IMEI for all ports
-        status_response = self.get_json("/goip_get_status.html")
+        status_response = self.get_status()
 
-        # Parse requested ports
-        requested_ports = parse_port_spec(ports)
+        # Parse requested ports ("all" etc. resolve against the same status)
+        requested_ports = parse_port_spec(ports, status=status_response)
 
         # Extract IMEI values for requested ports
         result = {"type": "imei_values", "ports": {}}
@@ -424,22 +606,54 @@ class SyncEjoinClient:
         Returns:
             Port index (1-based to match device expectations)
         """
-        import re
+        return PortId.parse(port).port
+
+
+# Kept-alive clients by connection settings; None unless a long-running
+# process (the daemon) enables pooling
+_client_pool: dict[tuple, SyncEjoinClient] | None = None
+
+
+def _pool_key(config: EjoinConfig) -> tuple:
+    return (
+        config.base_url, config.username, config.password,
+        config.connect_timeout, config.read_timeout,
+    )
 
-        from .ports import port_to_decimal
 
-        # Convert to decimal format first
-        decimal_port = port_to_decimal(port)
+def enable_client_pool() -> None:
+    """Reuse one kept-alive client per gateway for the rest of the process."""
+    global _client_pool
+    if _client_pool is None:
+        _client_pool = {}
+
+
+def close_client_pool() -> None:
+    """Close every pooled client and stop pooling."""
+    global _client_pool
+    pool, _client_pool = _client_pool, None
+    for client in (pool or {}).values():
+        try:
+            client.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled client: {e}")
 
-        # Parse decimal format to get the port number
-        match = re.match(r'(\d+)\.(\d+)', decimal_port)
-        if match:
-            port_num = int(match.group(1))
-            return port_num  # Return 1-based index
 
-        raise ValueError(f"Invalid port format: {port}")
+def pooled_clients() -> int:
+    """Number of gateways with a pooled client."""
+    return len(_client_pool or {})
 
 
 def create_sync_client(config: EjoinConfig) -> SyncEjoinClient:
-    """Create a synchronous EJOIN HTTP client."""
-    return SyncEjoinClient(config)
+    """Create a synchronous EJOIN HTTP client.
+
+    When pooling is enabled, clients are shared per gateway and keep their
+    connections open between commands.
+    """
+    if _client_pool is None:
+        return SyncEjoinClient(config)
+    key = _pool_key(config)
+    client = _client_pool.get(key)
+    if client is None:
+        client = _client_pool[key] = SyncEjoinClient(config, keep_alive=True)
+    return client
@@ -0,0 +1,129 @@
+"""Gateway inventory: tags, attributes and groups over configuration profiles.
+
+Every profile may carry tags (``prod``, ``lte``) and attributes
+(``site=nyc``, ``rack=4``); groups are named selectors. A target selector
+picks gateways the way a port specification picks ports:
+
+    gw-east-1               A profile by name
+    gw-east-*               Profiles matching a glob
+    tag:prod                Profiles carrying a tag
+    site=nyc                Profiles with an attribute value
+    group:east, @east       Members of a group
+    all                     Every profile
+
+Terms separated by commas are applied left to right; a term starting
+with ``!`` removes its matches from the selection and ``&`` intersects
+conditions within a term (``tag:prod&site=nyc,!gw-east-3``). A selector
+that starts with an exclusion starts from every profile, so ``!tag:lab``
+means all gateways outside the lab. Results keep the order of
+profiles.json.
+
+The index answers tag and attribute terms with dictionary lookups and is
+built from the raw profile data, so resolving a selector never constructs
+a config for gateways it does not select.
+"""
+
+import fnmatch
+from typing import Any
+
+_GLOB_CHARS = set("*?[")
+
+
+class TargetError(ValueError):
+    """Error resolving a target selector."""
+    pass
+
+
+class Inventory:
+    """In-memory index of profiles by name, tag and attribute."""
+
+    def __init__(self, profiles: dict[str, dict[str, Any]], groups: dict[str, str] | None = None):
+        """Index raw profile data.
+
+        Args:
+            profiles: Profile dicts by name, as stored in profiles.json
+            groups: Group selectors by group name
+        """
+        self.names: list[str] = list(profiles)
+        self._known = set(self.names)
+        self.groups: dict[str, str] = dict(groups or {})
+        self.tags: dict[str, set[str]] = {}
+        self.attributes: dict[tuple[str, str], set[str]] = {}
+
+        for name, data in profiles.items():
+            for tag in data.get("tags") or []:
+                self.tags.setdefault(str(tag), set()).add(name)
+            for key, value in (data.get("attributes") or {}).items():
+                self.attributes.setdefault((str(key), str(value)), set()).add(name)
+
+    def select(self, selector: str) -> list[str]:
+        """Resolve a selector to profile names.
+
+        Raises:
+            TargetError: If the selector names an unknown profile or group
+        """
+        return self._select(selector, ())
+
+    def _select(self, selector: str, seen_groups: tuple[str, ...]) -> list[str]:
+        selected: set[str] = set()
+        terms = [term.strip() for term in selector.split(",") if term.strip()]
+        if terms and terms[0].startswith("!"):
+            selected = set(self._known)
+        for term in terms:
+            exclude = term.startswith("!")
+            if exclude:
+                term = term[1:].strip()
+
+            conditions = [self._match(condition.strip(), seen_groups) for condition in term.split("&")]
+            matched = set.intersection(*conditions)
+
+            if exclude:
+                selected -= matched
+            else:
+                selected |= matched
+        return [name for name in self.names if name in selected]
+
+    def _match(self, condition: str, seen_groups: tuple[str, ...]) -> set[str]:
+        """Names matching a single condition of a term."""
+        if not condition:
+            raise TargetError("Empty condition in target selector")
+
+        if condition in ("all", "*"):
+            return set(self._known)
+
+        if condition.startswith("tag:"):
+            return set(self.tags.get(condition[4:], ()))
+
+        if condition.startswith("group:") or condition.startswith("@"):
+            group = condition[6:] if condition.startswith("group:") else condition[1:]
+            if group not in self.groups:
+                raise TargetError(f"Unknown group '{group}'")
+            if group in seen_groups:
+                raise TargetError(f"Group '{group}' includes itself")
+            return set(self._select(self.groups[group], (*seen_groups, group)))
+
+        if "=" in condition:
+            key, _, value = condition.partition("=")
+            return set(self.attributes.get((key.strip(), value.strip()), ()))
+
+        if _GLOB_CHARS & set(condition):
+            return set(fnmatch.filter(self.names, condition))
+
+        if condition not in self._known:
+            raise TargetError(f"Unknown gateway '{condition}'")
+        return {condition}
+
+
+def parse_attributes(assignments: list[str]) -> dict[str, str]:
+    """Parse key=value assignments; an empty value removes the attribute.
+
+    Raises:
+        TargetError: If an assignment has no '=' or an empty key
+    """
+    attributes: dict[str, str] = {}
+    for assignment in assignments:
+        key, sep, value = assignment.partition("=")
+        if not sep or not key.strip():
+            raise TargetError(f"Invalid attribute '{assignment}', expected key=value")
+        attributes[key.strip()] = value.strip()
+    return attributes
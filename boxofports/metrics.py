@@ -0,0 +1,245 @@
+"""In-process instrumentation: hooks, HDR-style histograms and exporters.
+
+Instrumented code calls emit() with an event name and its fields:
+
+    http      gateway, endpoint, method, status, bytes, seconds, retries
+    store     kind, rows, seconds, ok
+    template  seconds, cached
+
+Hooks registered with add_hook() receive every event. With no hooks
+registered, active() is False and instrumented code skips its timing
+work, so the cost when nothing is listening is one list check.
+
+MetricsRegistry is the built-in hook. It aggregates events into
+counters and histograms with HDR-style log-linear buckets (bounded
+relative error, memory growing only with the logarithm of the value
+range), and renders them as a terminal summary or in the Prometheus
+text format.
+
+Only the standard library is imported here.
+"""
+
+import logging
+import threading
+from collections.abc import Callable, Iterable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+Hook = Callable[[str, dict[str, Any]], None]
+
+_hooks: list[Hook] = []
+_hooks_lock = threading.Lock()
+
+
+def add_hook(hook: Hook) -> None:
+    """Register a hook for all instrumentation events."""
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    """Unregister a hook; unknown hooks are ignored."""
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def active() -> bool:
+    """Whether any hook is listening."""
+    return bool(_hooks)
+
+
+def emit(event: str, /, **fields: Any) -> None:
+    """Send an event to every hook; hook errors are logged, never raised."""
+    for hook in tuple(_hooks):
+        try:
+            hook(event, fields)
+        except Exception:
+            logger.debug("Metrics hook failed for %s event", event, exc_info=True)
+
+
+class Histogram:
+    """Log-linear histogram of non-negative values, HDR style.
+
+    Values are scaled to integers (e.g. seconds to microseconds) and kept
+    exactly below 2**sub_bucket_bits; above that each power of two is split
+    into 2**(sub_bucket_bits - 1) equal buckets, so any recorded value is
+    reported within 1/2**(sub_bucket_bits - 1) of its true value.
+    """
+
+    def __init__(self, scale: float = 1.0, sub_bucket_bits: int = 7):
+        self.scale = scale
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts: dict[tuple[int, int], int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def record(self, value: float) -> None:
+        value = max(0.0, float(value))
+        scaled = int(value * self.scale)
+        shift = max(0, scaled.bit_length() - self.sub_bucket_bits)
+        key = (shift, scaled >> shift)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def _bucket_value(self, key: tuple[int, int]) -> float:
+        """Midpoint of a bucket, in recorded units."""
+        shift, mantissa = key
+        low = mantissa << shift
+        high = ((mantissa + 1) << shift) - 1
+        return (low + high) / 2 / self.scale
+
+    def percentile(self, percent: float) -> float:
+        """Value at or below which the given percent of recordings fall."""
+        if not self.count:
+            return 0.0
+        rank = max(1, round(self.count * percent / 100))
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= rank:
+                # Never report beyond what was actually seen
+                return min(max(self._bucket_value(key), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def copy(self) -> "Histogram":
+        clone = Histogram(self.scale, self.sub_bucket_bits)
+        clone.counts = dict(self.counts)
+        clone.count, clone.total, clone.min, clone.max = self.count, self.total, self.min, self.max
+        return clone
+
+
+# Histogram scale per metric: seconds are kept at microsecond precision
+_SECONDS = 1e6
+
+_HELP = {
+    "boxofports_http_request_duration_seconds": "Gateway HTTP request time including retries",
+    "boxofports_http_response_bytes": "Gateway HTTP response body size",
+    "boxofports_http_retries_total": "Gateway HTTP retries",
+    "boxofports_store_transaction_duration_seconds": "Local store transaction time",
+    "boxofports_store_transaction_rows": "Rows changed per local store transaction",
+    "boxofports_template_render_duration_seconds": "SMS template render time",
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """Aggregates instrumentation events into histograms and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, Labels], Histogram] = {}
+        self._counters: dict[tuple[str, Labels], float] = {}
+
+    def observe(self, name: str, value: float, scale: float = 1.0, **labels: Any) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(scale)
+            histogram.record(value)
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def __call__(self, event: str, fields: dict[str, Any]) -> None:
+        """Hook entry point: turn an event into metric updates."""
+        if event == "http":
+            gateway, endpoint = fields.get("gateway", ""), fields.get("endpoint", "")
+            self.observe(
+                "boxofports_http_request_duration_seconds", fields["seconds"], _SECONDS,
+                gateway=gateway, endpoint=endpoint, status=fields.get("status", ""),
+            )
+            if fields.get("bytes") is not None:
+                self.observe("boxofports_http_response_bytes", fields["bytes"], gateway=gateway, endpoint=endpoint)
+            self.inc("boxofports_http_retries_total", fields.get("retries", 0), gateway=gateway, endpoint=endpoint)
+        elif event == "store":
+            outcome = "ok" if fields.get("ok", True) else "error"
+            self.observe(
+                "boxofports_store_transaction_duration_seconds", fields["seconds"], _SECONDS,
+                kind=fields.get("kind", ""), outcome=outcome,
+            )
+            self.observe("boxofports_store_transaction_rows", fields.get("rows", 0), kind=fields.get("kind", ""))
+        elif event == "template":
+            self.observe("boxofports_template_render_duration_seconds", fields["seconds"], _SECONDS)
+
+    def histograms(self) -> list[tuple[str, dict[str, str], Histogram]]:
+        """Copies of the recorded histograms as (name, labels, histogram), sorted."""
+        with self._lock:
+            items = [(key, histogram.copy()) for key, histogram in sorted(self._histograms.items())]
+        return [(name, dict(labels), histogram) for (name, labels), histogram in items]
+
+    def counters(self) -> list[tuple[str, dict[str, str], float]]:
+        """Counters as (name, labels, value), sorted."""
+        with self._lock:
+            items = sorted(self._counters.items())
+        return [(name, dict(labels), value) for (name, labels), value in items]
+
+    def prometheus(self, gauges: Iterable[tuple[str, str, dict[str, str], float]] = ()) -> str:
+        """Render everything in the Prometheus text exposition format.
+
+        Histograms are exported as summaries (quantiles, sum and count),
+        since their buckets are relative rather than fixed boundaries.
+
+        Args:
+            gauges: Extra (name, help, labels, value) samples exported as
+                gauges, e.g. live daemon state
+        """
+        lines: list[str] = []
+        declared: set[str] = set()
+
+        def declare(name: str, metric_type: str, help_text: str) -> None:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+
+        for name, labels, histogram in self.histograms():
+            declare(name, "summary", _HELP.get(name, name))
+            for quantile in (0.5, 0.9, 0.99):
+                value = histogram.percentile(quantile * 100)
+                lines.append(f"{name}{_format_labels({**labels, 'quantile': str(quantile)})} {_format_value(value)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+        for name, labels, value in self.counters():
+            declare(name, "counter", _HELP.get(name, name))
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for name, help_text, labels, value in gauges:
+            declare(name, "gauge", help_text)
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+# Process-wide registry that long-running processes export
+registry = MetricsRegistry()
@@ -1,9 +1,14 @@
 """Port parsing utilities for EJOIN Multi-WAN Router."""
 
 import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
 
+from .api_models import PortStatusCode
 from .csv_port_parser import CSVPortParseError, expand_csv_ports_if_needed
 from .http import EjoinHTTPError
+from .portset import SLOT_LETTERS, PortId, PortSet
 
 
 class PortParseError(EjoinHTTPError):
@@ -11,21 +16,275 @@ class PortParseError(EjoinHTTPError):
     pass
 
 
-def parse_port_spec(port_spec: str) -> list[str]:
+_ALPHA_RE = re.compile(r"^(\d+)([A-D])$")
+_DECIMAL_RE = re.compile(r"^(\d+)\.(\d+)$")
+_STATUS_CODE_RE = re.compile(r"^\s*(\d+)")
+
+# Zero-based slot offsets ("A" -> 0, "B" -> 1, ...)
+_SLOT_INDEX = {letter: index for index, letter in enumerate(SLOT_LETTERS)}
+
+
+# Selectors that resolve against port states in the device status
+STATUS_SELECTORS = {
+    "registered": {PortStatusCode.REGISTERED},
+    "idle": {PortStatusCode.IDLE_SIM_CARD},
+    "no-balance": {PortStatusCode.NO_BALANCE},
+    "no-sim": {PortStatusCode.NO_SIM_CARD},
+    "failed": {PortStatusCode.REGISTER_FAILED, PortStatusCode.SIM_ERROR},
+    "locked": {
+        PortStatusCode.SIM_LOCKED_DEVICE,
+        PortStatusCode.SIM_LOCKED_OPERATOR,
+        PortStatusCode.USER_LOCKED,
+    },
+}
+
+
+_NAMED_SELECTORS = {"all", "*", *STATUS_SELECTORS}
+
+
+@dataclass(frozen=True)
+class PortSelector:
+    """One operand of a port spec: literal ports or a device selector."""
+
+    kind: str  # "ports", "all", "status" or "slots"
+    ports: tuple[PortId, ...] = ()
+    labels: tuple[str, ...] = ()  # Literal ports in the notation written
+    codes: frozenset[int] = frozenset()
+    slots: tuple[int, ...] = ()
+
+    @property
+    def needs_status(self) -> bool:
+        return self.kind != "ports"
+
+
+@dataclass(frozen=True)
+class PortSpecTerm:
+    """A comma-separated term: an intersection of selectors, added or excluded."""
+
+    exclude: bool
+    selectors: tuple[PortSelector, ...]
+
+
+@dataclass(frozen=True)
+class PortSpecPlan:
+    """A compiled port specification, reusable across device statuses.
+
+    Terms apply left to right: each one is added to (or, with a leading
+    "!" or "-", removed from) the ports selected so far. A spec that starts
+    with an exclusion starts from "all".
+    """
+
+    spec: str
+    terms: tuple[PortSpecTerm, ...]
+
+    @property
+    def needs_status(self) -> bool:
+        """Whether evaluating the plan requires the device status."""
+        return self.terms[0].exclude or any(
+            selector.needs_status for term in self.terms for selector in term.selectors
+        )
+
+    @property
+    def is_simple_union(self) -> bool:
+        """Whether the plan is a plain list of ports and ranges."""
+        return all(
+            not term.exclude and len(term.selectors) == 1 and not term.selectors[0].needs_status
+            for term in self.terms
+        )
+
+    def evaluate(self, status: Any = None) -> list[str]:
+        """Resolve the plan to port identifiers.
+
+        Plain lists keep their order and notation. Anything using set
+        algebra or device selectors is evaluated on PortSet bitmaps and
+        returned in port/slot order.
+        """
+        if self.is_simple_union:
+            # Dedupe on PortId, keeping the first notation seen
+            seen = set()
+            ports = []
+            for term in self.terms:
+                selector = term.selectors[0]
+                for port, label in zip(selector.ports, selector.labels, strict=True):
+                    if port not in seen:
+                        seen.add(port)
+                        ports.append(label)
+            if not ports:
+                raise PortParseError("No valid ports found in specification")
+            return ports
+
+        if status is None:
+            if self.spec.lower() in ("all", "*"):
+                # Without device status we can only guess at a 32-port layout
+                return [f"{i}A" for i in range(1, 33)]
+            if self.needs_status:
+                raise PortParseError(f"'{self.spec}' requires device status")
+            layout = (0, 1, [])
+        else:
+            layout = _device_layout(status)
+
+        max_ports, max_slots, entries = layout
+        literal_ids = [
+            port
+            for term in self.terms
+            for selector in term.selectors
+            for port in selector.ports
+        ]
+        # Literal ports widen the bitmap so they are never silently dropped
+        shape = (
+            max([max_ports, *(port.port for port in literal_ids)]),
+            max([max_slots, *(port.slot for port in literal_ids)]),
+        )
+
+        selected = None
+        for term in self.terms:
+            ports = None
+            for selector in term.selectors:
+                operand = _evaluate_selector(selector, shape, max_ports, max_slots, entries)
+                ports = operand if ports is None else ports & operand
+            if selected is None:
+                selected = PortSet(*shape)
+                if term.exclude:
+                    selected = _evaluate_selector(
+                        PortSelector("all"), shape, max_ports, max_slots, entries
+                    )
+            selected = selected - ports if term.exclude else selected | ports
+
+        return selected.to_list()
+
+
+def needs_device_status(port_spec: str) -> bool:
+    """Check whether a port specification refers to live device state.
+
+    True when the spec uses "all"/"*", a status selector such as
+    "registered", a slot selector like "slot:B", or starts with an
+    exclusion. CSV files and invalid specs never need it.
+    """
+    try:
+        return compile_port_spec(port_spec).needs_status
+    except PortParseError:
+        return False
+
+
+@lru_cache(maxsize=256)
+def compile_port_spec(port_spec: str) -> PortSpecPlan:
+    """Compile a port specification into a reusable PortSpecPlan.
+
+    Grammar (terms separated by commas, applied left to right):
+    - Ports and ranges: "1A", "2.01", "1-4", "1A-4D"; decimal slots run
+      01-04, matching A-D
+    - Device selectors: "all"/"*", "slot:B" (or "slot:AB"), "registered",
+      "idle", "no-balance", "no-sim", "failed", "locked", "status:12"
+    - Exclusion: "!3A", "-5-8", "!locked"
+    - Intersection: "registered&slot:A", "1-16&idle"
+
+    Raises:
+        PortParseError: If the specification is invalid
+    """
+    if not port_spec or not port_spec.strip():
+        raise PortParseError("Empty port specification")
+
+    terms = []
+    # Consecutive plain ports and ranges are gathered into one selector
+    literal_ports: list[PortId] = []
+    literal_labels: list[str] = []
+
+    def flush_literals():
+        if literal_ports:
+            selector = PortSelector("ports", ports=tuple(literal_ports), labels=tuple(literal_labels))
+            terms.append(PortSpecTerm(exclude=False, selectors=(selector,)))
+            literal_ports.clear()
+            literal_labels.clear()
+
+    for part in port_spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+
+        if part[0] not in "!-" and "&" not in part and ":" not in part and part.lower() not in _NAMED_SELECTORS:
+            ports = _compile_literal(part, part)
+            literal_ports.extend(ports)
+            if "." in part:
+                literal_labels.extend(port.decimal for port in ports)
+            else:
+                literal_labels.extend(port.alpha for port in ports)
+            continue
+
+        flush_literals()
+        exclude = part[0] in "!-"
+        body = part[1:].strip() if exclude else part
+        if not body:
+            raise PortParseError(f"Invalid port specification '{part}'")
+
+        selectors = tuple(_compile_selector(factor.strip(), part) for factor in body.split("&"))
+        terms.append(PortSpecTerm(exclude=exclude, selectors=selectors))
+
+    flush_literals()
+    if not terms:
+        raise PortParseError("No valid ports found in specification")
+
+    return PortSpecPlan(spec=port_spec.strip(), terms=tuple(terms))
+
+
+def _compile_selector(factor: str, part: str) -> PortSelector:
+    """Compile one operand of a term."""
+    name = factor.lower()
+    if name in ("all", "*"):
+        return PortSelector("all")
+    if name in STATUS_SELECTORS:
+        return PortSelector("status", codes=frozenset(STATUS_SELECTORS[name]))
+    if name.startswith("status:"):
+        codes = name.split(":", 1)[1]
+        if not codes or not all(code.isdigit() for code in codes.split("+")):
+            raise PortParseError(f"Invalid status selector '{factor}'")
+        return PortSelector("status", codes=frozenset(int(code) for code in codes.split("+")))
+    if name.startswith("slot:"):
+        letters = name.split(":", 1)[1].upper()
+        if not letters or any(letter not in SLOT_LETTERS for letter in letters):
+            raise PortParseError(f"Invalid slot '{letters}': slots are {SLOT_LETTERS}")
+        return PortSelector("slots", slots=tuple(SLOT_LETTERS.index(letter) + 1 for letter in letters))
+
+    ports = _compile_literal(factor, part)
+    return PortSelector("ports", ports=tuple(ports))
+
+
+def _compile_literal(factor: str, part: str) -> list[PortId]:
+    """Expand a single port or range."""
+    try:
+        if "-" in factor and not factor.startswith("-") and not factor.endswith("-"):
+            # Range specification
+            return _parse_port_range(factor)
+        # Single port
+        return [_port_id(factor)]
+    except Exception as e:
+        raise PortParseError(f"Invalid port specification '{part}': {e}") from e
+
+
+def parse_port_spec(port_spec: str, status: Any = None) -> list[str]:
     """
     Parse port specifications into individual port identifiers.
     
     Supported formats:
     - Single ports: "1A", "2B", "3C", "4D"
-    - Decimal ports: "1.01", "2.02", "32.04"
+    - Decimal ports: "1.01", "2.02", "32.04" (slots 01-04, like A-D)
     - Ranges: "1-4", "1A-4D", "2.01-2.04"
     - Lists: "1A,2B,3C"
     - Mixed: "1A,2B,4-8,10.01-10.04"
     - All ports: "*", "all"
+    - Port states: "registered", "idle", "no-balance", "locked", "status:12"
+    - Slots: "slot:B", "slot:AB"
+    - Exclusion: "all,!3A", "registered,-5-8"
+    - Intersection: "registered&slot:A"
     - CSV files: "ports.csv" (requires 'port' column, optional 'slot' column)
     
+    "all", port states and slots resolve against the device status
+    (max-ports, max-slots and per-port states). Without a status, "all"
+    falls back to ports 1-32 on slot A. See compile_port_spec for the
+    full grammar.
+
     Args:
         port_spec: Port specification string or CSV file path
+        status: Device status (dev-status response dict or DeviceStatus)
         
     Returns:
         List of individual port identifiers
@@ -40,63 +299,83 @@ def parse_port_spec(port_spec: str) -> list[str]:
     try:
         csv_ports = expand_csv_ports_if_needed(port_spec)
         if csv_ports is not None:
-            # Apply the same normalization as regular port parsing
-            normalized_ports = [_normalize_port(port) for port in csv_ports]
-            # Remove duplicates while preserving order
-            seen = set()
-            unique_ports = []
-            for port in normalized_ports:
-                if port not in seen:
-                    seen.add(port)
-                    unique_ports.append(port)
-            return unique_ports
+            # Already normalized and de-duplicated when the file was parsed
+            return csv_ports
     except CSVPortParseError as e:
         raise PortParseError(f"CSV parsing failed: {e}") from e
 
-    port_spec = port_spec.strip()
+    return compile_port_spec(port_spec.strip()).evaluate(status)
 
-    # Handle special cases
-    if port_spec.lower() in ("all", "*"):
-        # Return all possible ports (this is a placeholder - in real usage
-        # we'd need to query the device for available ports)
-        return [f"{i}A" for i in range(1, 33)]
 
-    ports = []
-    parts = [part.strip() for part in port_spec.split(",")]
+def _device_layout(status: Any) -> tuple[int, int, list[tuple[PortId, int | None]]]:
+    """Extract max ports, max slots and (port, status code) entries."""
+    if hasattr(status, "model_dump"):
+        status = status.model_dump()
+    if not isinstance(status, dict):
+        raise PortParseError("Device status is not available")
 
-    for part in parts:
-        if not part:
-            continue
+    max_ports = status.get("max-ports", status.get("max_ports"))
+    max_slots = status.get("max-slots", status.get("max_slots")) or 1
+    try:
+        max_ports = int(max_ports) if max_ports is not None else None
+        max_slots = min(int(max_slots), len(SLOT_LETTERS))
+    except (TypeError, ValueError) as e:
+        raise PortParseError(f"Invalid device port layout: {e}") from e
 
+    entries = []
+    for port_status in status.get("status") or []:
         try:
-            if "-" in part and not part.startswith("-") and not part.endswith("-"):
-                # Range specification
-                ports.extend(_parse_port_range(part))
-            else:
-                # Single port
-                ports.append(_normalize_port(part))
-        except Exception as e:
-            raise PortParseError(f"Invalid port specification '{part}': {e}") from e
-
-    if not ports:
-        raise PortParseError("No valid ports found in specification")
-
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_ports = []
-    for port in ports:
-        if port not in seen:
-            seen.add(port)
-            unique_ports.append(port)
-
-    return unique_ports
-
-
-def _parse_port_range(range_spec: str) -> list[str]:
+            port = PortId.parse(str(port_status.get("port", "")))
+        except ValueError:
+            continue
+        match = _STATUS_CODE_RE.match(str(port_status.get("st", "")))
+        entries.append((port, int(match.group(1)) if match else None))
+
+    if max_ports is None:
+        max_ports = max((port.port for port, _ in entries), default=0)
+
+    return max_ports, max_slots, entries
+
+
+def _evaluate_selector(
+    selector: PortSelector,
+    shape: tuple[int, int],
+    max_ports: int,
+    max_slots: int,
+    entries: list[tuple[PortId, int | None]],
+) -> PortSet:
+    """Resolve one selector to a PortSet of the given shape."""
+    if selector.kind == "ports":
+        return PortSet(*shape, selector.ports)
+
+    if selector.kind == "slots" or (selector.kind == "all" and not entries):
+        # Slots of every device port; "all" without per-port states
+        # falls back to slot A
+        slots = selector.slots or (1,)
+        for slot in slots:
+            if slot > max_slots:
+                raise PortParseError(
+                    f"Invalid slot '{SLOT_LETTERS[slot - 1]}': device has slots {SLOT_LETTERS[:max_slots]}"
+                )
+        if shape == (max_ports, max_slots):
+            return PortSet.full(max_ports, max_slots, slots=slots)
+        # Bitmap was widened for literal ports beyond the device
+        return PortSet(*shape, (
+            PortId(port, slot) for port in range(1, max_ports + 1) for slot in slots
+        ))
+
+    codes = selector.codes if selector.kind == "status" else None
+    return PortSet(*shape, (
+        port for port, code in entries
+        if (codes is None or code in codes) and port.port <= max_ports and port.slot <= max_slots
+    ))
+
+
+def _parse_port_range(range_spec: str) -> list[PortId]:
     """Parse a port range specification like '1A-4D' or '2.01-2.04'."""
     start_str, end_str = range_spec.split("-", 1)
-    start_str = start_str.strip()
-    end_str = end_str.strip()
+    start_str = start_str.strip().upper()
+    end_str = end_str.strip().upper()
 
     # Detect format type
     if "." in start_str or "." in end_str:
@@ -105,10 +384,10 @@ def _parse_port_range(range_spec: str) -> list[str]:
         return _parse_alpha_range(start_str, end_str)
 
 
-def _parse_decimal_range(start_str: str, end_str: str) -> list[str]:
+def _parse_decimal_range(start_str: str, end_str: str) -> list[PortId]:
     """Parse decimal format range like '2.01-2.04'."""
-    start_match = re.match(r"^(\d+)\.(\d+)$", start_str)
-    end_match = re.match(r"^(\d+)\.(\d+)$", end_str)
+    start_match = _DECIMAL_RE.match(start_str)
+    end_match = _DECIMAL_RE.match(end_str)
 
     if not start_match or not end_match:
         raise PortParseError(f"Invalid decimal port range format: {start_str}-{end_str}")
@@ -124,10 +403,10 @@ def _parse_decimal_range(start_str: str, end_str: str) -> list[str]:
     if start_slot > end_slot:
         raise PortParseError("Invalid range: start slot must be <= end slot")
 
-    return [f"{start_port}.{slot:02d}" for slot in range(start_slot, end_slot + 1)]
+    return [_port_id_at(start_port, slot) for slot in range(start_slot, end_slot + 1)]
 
 
-def _parse_alpha_range(start_str: str, end_str: str) -> list[str]:
+def _parse_alpha_range(start_str: str, end_str: str) -> list[PortId]:
     """Parse alpha format range like '1A-4D' or '1-4'."""
     # Handle pure numeric range like "1-4"
     if start_str.isdigit() and end_str.isdigit():
@@ -135,65 +414,41 @@ def _parse_alpha_range(start_str: str, end_str: str) -> list[str]:
         end_num = int(end_str)
         if start_num > end_num:
             raise PortParseError("Invalid range: start must be <= end")
-        return [f"{i}A" for i in range(start_num, end_num + 1)]
+        return [_port_id_at(i, 1) for i in range(start_num, end_num + 1)]
 
     # Handle alphanumeric format like "1A-4D"
-    start_match = re.match(r"^(\d+)([A-D])$", start_str)
-    end_match = re.match(r"^(\d+)([A-D])$", end_str)
+    start_match = _ALPHA_RE.match(start_str)
+    end_match = _ALPHA_RE.match(end_str)
 
     if not start_match or not end_match:
         raise PortParseError(f"Invalid alpha port range format: {start_str}-{end_str}")
 
-    start_port = int(start_match.group(1))
-    start_slot = start_match.group(2)
-    end_port = int(end_match.group(1))
-    end_slot = end_match.group(2)
-
-    ports = []
-    slot_order = ["A", "B", "C", "D"]
-
-    for port_num in range(start_port, end_port + 1):
-        if port_num == start_port and port_num == end_port:
-            # Same port, range within slots
-            start_idx = slot_order.index(start_slot)
-            end_idx = slot_order.index(end_slot)
-            for slot_idx in range(start_idx, end_idx + 1):
-                ports.append(f"{port_num}{slot_order[slot_idx]}")
-        elif port_num == start_port:
-            # First port, start from specified slot
-            start_idx = slot_order.index(start_slot)
-            for slot_idx in range(start_idx, len(slot_order)):
-                ports.append(f"{port_num}{slot_order[slot_idx]}")
-        elif port_num == end_port:
-            # Last port, end at specified slot
-            end_idx = slot_order.index(end_slot)
-            for slot_idx in range(0, end_idx + 1):
-                ports.append(f"{port_num}{slot_order[slot_idx]}")
-        else:
-            # Middle ports, include all slots
-            for slot in slot_order:
-                ports.append(f"{port_num}{slot}")
-
-    return ports
+    # Ranges run through every slot of the ports in between, so walk a
+    # linear index of (port - 1) * slots + slot
+    slots = len(SLOT_LETTERS)
+    start = (int(start_match.group(1)) - 1) * slots + _SLOT_INDEX[start_match.group(2)]
+    end = (int(end_match.group(1)) - 1) * slots + _SLOT_INDEX[end_match.group(2)]
+    if start > end:
+        raise PortParseError("Invalid range: start must be <= end")
 
+    return [_port_id_at(i // slots + 1, i % slots + 1) for i in range(start, end + 1)]
 
-def _normalize_port(port_str: str) -> str:
-    """Normalize a single port identifier."""
-    port_str = port_str.strip().upper()
 
-    # Decimal format (e.g., "1.01", "2.02")
-    if re.match(r"^\d+\.\d+$", port_str):
-        return port_str
-
-    # Alpha format (e.g., "1A", "2B")
-    if re.match(r"^\d+[A-D]$", port_str):
-        return port_str
+def _port_id_at(port: int, slot: int) -> PortId:
+    """Build a PortId from numbers, raising PortParseError when out of range."""
+    try:
+        return PortId(port, slot)
+    except ValueError as e:
+        raise PortParseError(str(e)) from e
 
-    # Pure numeric - default to slot A
-    if port_str.isdigit():
-        return f"{port_str}A"
 
-    raise PortParseError(f"Unrecognized port format: {port_str}")
+@lru_cache(maxsize=1 << 17)
+def _port_id(port: str) -> PortId:
+    """Parse a port identifier, raising PortParseError on bad input."""
+    try:
+        return PortId.parse(port)
+    except ValueError as e:
+        raise PortParseError(str(e)) from e
 
 
 def port_to_decimal(port: str) -> str:
@@ -207,18 +462,10 @@ def port_to_decimal(port: str) -> str:
         "4D" -> "4.04"
         "1.01" -> "1.01" (already decimal)
     """
-    if "." in port:
-        return port  # Already in decimal format
-
-    match = re.match(r"^(\d+)([A-D])$", port.upper())
-    if not match:
-        raise PortParseError(f"Cannot convert port to decimal format: {port}")
-
-    port_num = match.group(1)
-    slot_letter = match.group(2)
-    slot_num = {"A": "01", "B": "02", "C": "03", "D": "04"}[slot_letter]
-
-    return f"{port_num}.{slot_num}"
+    try:
+        return PortId.parse(port).decimal
+    except ValueError as e:
+        raise PortParseError(f"Cannot convert port to decimal format: {port}") from e
 
 
 def port_to_alpha(port: str) -> str:
@@ -232,21 +479,10 @@ def port_to_alpha(port: str) -> str:
         "4.04" -> "4D"
         "1A" -> "1A" (already alpha)
     """
-    if "." not in port:
-        return port.upper()  # Already in alpha format
-
-    match = re.match(r"^(\d+)\.(\d+)$", port)
-    if not match:
-        raise PortParseError(f"Cannot convert port to alpha format: {port}")
-
-    port_num = match.group(1)
-    slot_num = match.group(2)
-    slot_letter = {"01": "A", "02": "B", "03": "C", "04": "D"}.get(slot_num)
-
-    if not slot_letter:
-        raise PortParseError(f"Invalid slot number in port: {port}")
-
-    return f"{port_num}{slot_letter}"
+    try:
+        return PortId.parse(port).alpha
+    except ValueError as e:
+        raise PortParseError(f"Cannot convert port to alpha format: {port}") from e
 
 
 def format_ports_for_api(ports: list[str], format_type: str = "alpha") -> str:
@@ -260,12 +496,10 @@ def format_ports_for_api(ports: list[str], format_type: str = "alpha") -> str:
     Returns:
         Comma-separated string of formatted ports
     """
+    port_ids = [_port_id(port) for port in ports]
     if format_type == "decimal":
-        formatted = [port_to_decimal(port) for port in ports]
-    else:
-        formatted = [port_to_alpha(port) for port in ports]
-
-    return ",".join(formatted)
+        return ",".join(port_id.decimal for port_id in port_ids)
+    return ",".join(port_id.alpha for port_id in port_ids)
 
 
 def expand_ports(port_spec: str) -> list[str]:
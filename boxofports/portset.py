@@ -0,0 +1,278 @@
+"""Compact port identities and bitmap-backed port sets.
+
+Ports appear in two notations on EJOIN devices: alpha ("1A", "2B") and
+decimal ("1.01", "2.02"). PortId parses either once, interns the result
+while it is in use and keeps both forms precomputed. PortSet stores ports
+as bits of an integer sized to the device's max_ports x max_slots, so set
+operations cost one big-int operation instead of per-port work.
+"""
+
+import re
+import threading
+import weakref
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+
+SLOT_LETTERS = "ABCD"
+MAX_SLOTS = len(SLOT_LETTERS)
+
+_ALPHA_RE = re.compile(r"^(\d+)([A-Z])$")
+_DECIMAL_RE = re.compile(r"^(\d+)\.(\d+)$")
+
+
+class PortId:
+    """An interned (port, slot) pair with precomputed alpha/decimal forms.
+
+    While any reference to it is alive, PortId(3, 2) is always the same
+    object, so identities are cheap to hash, compare and keep in large
+    collections. The intern table holds weak references, so a long-running
+    process does not keep every port it has ever seen.
+    """
+
+    __slots__ = ("port", "slot", "alpha", "decimal", "_hash", "__weakref__")
+
+    _interned: "weakref.WeakValueDictionary[tuple[int, int], PortId]" = weakref.WeakValueDictionary()
+    _intern_lock = threading.Lock()
+
+    def __new__(cls, port: int, slot: int = 1) -> "PortId":
+        key = (port, slot)
+        existing = cls._interned.get(key)
+        if existing is not None:
+            return existing
+
+        if port < 1:
+            raise ValueError(f"Port number must be >= 1: {port}")
+        if not 1 <= slot <= MAX_SLOTS:
+            raise ValueError(f"Slot must be between 1 and {MAX_SLOTS}: {slot}")
+
+        self = object.__new__(cls)
+        _set = object.__setattr__
+        _set(self, "port", port)
+        _set(self, "slot", slot)
+        _set(self, "alpha", f"{port}{SLOT_LETTERS[slot - 1]}")
+        _set(self, "decimal", f"{port}.{slot:02d}")
+        _set(self, "_hash", hash(key))
+
+        # Racing threads agree on one instance
+        with cls._intern_lock:
+            return cls._interned.setdefault(key, self)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PortId is immutable")
+
+    def __reduce__(self):
+        return (PortId, (self.port, self.slot))
+
+    @classmethod
+    def parse(cls, text: str) -> "PortId":
+        """Parse "1A", "1.01" or a bare port number (slot A).
+
+        Raises:
+            ValueError: If the text is not a port identifier
+        """
+        return _parse_port_id(text)
+
+    @property
+    def slot_letter(self) -> str:
+        return SLOT_LETTERS[self.slot - 1]
+
+    def index(self, max_slots: int) -> int:
+        """Bit position of this port in a set with max_slots slots per port."""
+        return (self.port - 1) * max_slots + self.slot - 1
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, PortId):
+            return self.port == other.port and self.slot == other.slot
+        return NotImplemented
+
+    def __lt__(self, other: "PortId") -> bool:
+        return (self.port, self.slot) < (other.port, other.slot)
+
+    def __repr__(self) -> str:
+        return f"PortId({self.port}, {self.slot})"
+
+    def __str__(self) -> str:
+        return self.alpha
+
+
+@lru_cache(maxsize=1 << 17)
+def _parse_port_id(text: str) -> PortId:
+    port_str = text.strip().upper()
+
+    if port_str.isdigit():
+        return PortId(int(port_str), 1)
+
+    match = _ALPHA_RE.match(port_str)
+    if match:
+        letter = match.group(2)
+        if letter not in SLOT_LETTERS:
+            raise ValueError(f"Invalid slot letter in port: {text}")
+        return PortId(int(match.group(1)), SLOT_LETTERS.index(letter) + 1)
+
+    match = _DECIMAL_RE.match(port_str)
+    if match:
+        return PortId(int(match.group(1)), int(match.group(2)))
+
+    raise ValueError(f"Unrecognized port format: {text}")
+
+
+class PortSet:
+    """A set of ports stored as a bitmap over max_ports x max_slots.
+
+    Union, intersection and difference with another set of the same shape
+    are single integer operations. Iteration yields PortIds in port/slot
+    order.
+    """
+
+    __slots__ = ("max_ports", "max_slots", "_bits")
+
+    def __init__(
+        self,
+        max_ports: int,
+        max_slots: int = MAX_SLOTS,
+        ports: Iterable[PortId | str] = (),
+    ):
+        if max_ports < 0:
+            raise ValueError(f"max_ports must be >= 0: {max_ports}")
+        if not 1 <= max_slots <= MAX_SLOTS:
+            raise ValueError(f"max_slots must be between 1 and {MAX_SLOTS}: {max_slots}")
+        self.max_ports = max_ports
+        self.max_slots = max_slots
+        self._bits = 0
+        if ports:
+            self.update(ports)
+
+    @classmethod
+    def full(
+        cls,
+        max_ports: int,
+        max_slots: int = MAX_SLOTS,
+        slots: Iterable[int] | None = None,
+    ) -> "PortSet":
+        """Every port on the device, optionally restricted to some slots."""
+        result = cls(max_ports, max_slots)
+        if slots is None:
+            result._bits = (1 << (max_ports * max_slots)) - 1
+            return result
+
+        row = 0
+        for slot in slots:
+            if not 1 <= slot <= max_slots:
+                raise ValueError(f"Slot {slot} is outside 1-{max_slots}")
+            row |= 1 << (slot - 1)
+        # Repeat the per-port slot mask across every port: multiplying by
+        # 0b...0001_0001 (one 1 per port) copies the row in one operation
+        repeat = ((1 << (max_ports * max_slots)) - 1) // ((1 << max_slots) - 1)
+        result._bits = row * repeat
+        return result
+
+    def _bit_index(self, port: PortId | str) -> int:
+        if not isinstance(port, PortId):
+            port = PortId.parse(port)
+        if port.port > self.max_ports or port.slot > self.max_slots:
+            raise ValueError(
+                f"Port {port.alpha} is outside {self.max_ports} ports x {self.max_slots} slots"
+            )
+        return port.index(self.max_slots)
+
+    def _bit(self, port: PortId | str) -> int:
+        return 1 << self._bit_index(port)
+
+    def add(self, port: PortId | str) -> None:
+        self._bits |= self._bit(port)
+
+    def update(self, ports: Iterable[PortId | str]) -> None:
+        """Add many ports at once.
+
+        Bits are collected in a byte buffer and merged with one integer
+        operation, instead of rebuilding the integer per port.
+        """
+        size = self.max_ports * self.max_slots
+        buffer = bytearray((size + 7) // 8)
+        for port in ports:
+            index = self._bit_index(port)
+            buffer[index >> 3] |= 1 << (index & 7)
+        self._bits |= int.from_bytes(buffer, "little")
+
+    def discard(self, port: PortId | str) -> None:
+        try:
+            self._bits &= ~self._bit(port)
+        except ValueError:
+            pass
+
+    def __contains__(self, port) -> bool:
+        try:
+            return bool(self._bits & self._bit(port))
+        except ValueError:
+            return False
+
+    def __len__(self) -> int:
+        return self._bits.bit_count()
+
+    def __bool__(self) -> bool:
+        return self._bits != 0
+
+    def __iter__(self) -> Iterator[PortId]:
+        # Scan the binary digits once (lowest bit first) rather than
+        # clearing bits one at a time, which is quadratic on large sets
+        digits = bin(self._bits)[:1:-1]
+        max_slots = self.max_slots
+        index = digits.find("1")
+        while index >= 0:
+            yield PortId(index // max_slots + 1, index % max_slots + 1)
+            index = digits.find("1", index + 1)
+
+    def _with_bits(self, bits: int) -> "PortSet":
+        result = PortSet(self.max_ports, self.max_slots)
+        result._bits = bits
+        return result
+
+    def _check_shape(self, other: "PortSet") -> None:
+        if (self.max_ports, self.max_slots) != (other.max_ports, other.max_slots):
+            raise ValueError("PortSets must have the same max_ports and max_slots")
+
+    def __or__(self, other: "PortSet") -> "PortSet":
+        self._check_shape(other)
+        return self._with_bits(self._bits | other._bits)
+
+    def __and__(self, other: "PortSet") -> "PortSet":
+        self._check_shape(other)
+        return self._with_bits(self._bits & other._bits)
+
+    def __sub__(self, other: "PortSet") -> "PortSet":
+        self._check_shape(other)
+        return self._with_bits(self._bits & ~other._bits)
+
+    def __xor__(self, other: "PortSet") -> "PortSet":
+        self._check_shape(other)
+        return self._with_bits(self._bits ^ other._bits)
+
+    def __invert__(self) -> "PortSet":
+        return PortSet.full(self.max_ports, self.max_slots) - self
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PortSet):
+            return NotImplemented
+        return (
+            self.max_ports == other.max_ports
+            and self.max_slots == other.max_slots
+            and self._bits == other._bits
+        )
+
+    def __repr__(self) -> str:
+        return f"PortSet({self.max_ports}, {self.max_slots}, [{self.format()}])"
+
+    def to_list(self, format_type: str = "alpha") -> list[str]:
+        """Port identifiers in port/slot order ("alpha" or "decimal")."""
+        if format_type == "decimal":
+            return [port.decimal for port in self]
+        return [port.alpha for port in self]
+
+    def format(self, format_type: str = "alpha") -> str:
+        """Comma-separated port identifiers, as used by the device API."""
+        return ",".join(self.to_list(format_type))
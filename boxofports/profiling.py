@@ -0,0 +1,346 @@
+"""Profiling for single CLI invocations: ``boxofports --profile[=MODE] ...``.
+
+Three modes:
+
+    cpu     cProfile on a CPU-time clock: where the process computes,
+            leaving out time spent waiting on gateways
+    wall    A sampling profiler that reads the command thread's stack
+            every few milliseconds: where the elapsed time goes, waiting
+            included
+    alloc   tracemalloc: the lines holding the most memory when the
+            command ends, and the peak
+
+Each run writes a text report to ~/.boxofports/profiles/
+(BOXOFPORTS_PROFILE_DIR overrides) that can be attached to a ticket. cpu
+also saves the raw pstats file (snakeviz, pstats) and wall the collapsed
+stacks (speedscope, flamegraph.pl).
+
+Only the standard library is imported here.
+"""
+
+import cProfile
+import io
+import linecache
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PROFILE_MODES = ("cpu", "wall", "alloc")
+DEFAULT_MODE = "cpu"
+
+PROFILE_DIR_ENV = "BOXOFPORTS_PROFILE_DIR"
+
+# Rows shown on the terminal; the report file keeps more
+_TOP = 15
+_REPORT_ROWS = 50
+_SAMPLE_INTERVAL = 0.005
+_ALLOC_FRAMES = 10
+
+Frame = tuple[str, str, int]
+
+
+def profiles_dir() -> Path:
+    """Directory profile reports are written to."""
+    override = os.environ.get(PROFILE_DIR_ENV)
+    if override:
+        return Path(override).expanduser()
+    return Path.home() / ".boxofports" / "profiles"
+
+
+@dataclass
+class ProfileReport:
+    """Outcome of a profiled command."""
+
+    mode: str
+    command: str
+    path: Path
+    summary: str
+    columns: list[str]
+    rows: list[list[str]]
+    extra_paths: list[Path] = field(default_factory=list)
+
+
+class StackSampler(threading.Thread):
+    """Counts the stacks of one thread, sampled at a fixed interval."""
+
+    def __init__(self, thread_id: int, interval: float = _SAMPLE_INTERVAL):
+        super().__init__(name="boxofports-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[tuple[Frame, ...]] = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+class CommandProfiler:
+    """Profiles everything that runs between start() and stop()."""
+
+    def __init__(
+        self,
+        mode: str = DEFAULT_MODE,
+        command: str = "",
+        directory: Path | None = None,
+        interval: float = _SAMPLE_INTERVAL,
+        top: int = _TOP,
+    ):
+        """Prepare a profiler.
+
+        Args:
+            mode: One of PROFILE_MODES
+            command: Command being profiled, e.g. "sms send"; used in the
+                report and its file name
+            directory: Where reports go (default: profiles_dir())
+            interval: Seconds between stack samples in wall mode
+            top: Rows returned for the terminal
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of: {', '.join(PROFILE_MODES)}")
+        self.mode = mode
+        self.command = command
+        self.directory = directory
+        self.interval = interval
+        self.top = top
+        self._profile: cProfile.Profile | None = None
+        self._sampler: StackSampler | None = None
+        self._owns_tracemalloc = False
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        if self.mode == "cpu":
+            self._profile = cProfile.Profile(time.process_time)
+            self._profile.enable()
+        elif self.mode == "wall":
+            self._sampler = StackSampler(threading.get_ident(), self.interval)
+            self._sampler.start()
+        else:
+            self._owns_tracemalloc = not tracemalloc.is_tracing()
+            if self._owns_tracemalloc:
+                tracemalloc.start(_ALLOC_FRAMES)
+            else:
+                tracemalloc.reset_peak()
+
+    def stop(self) -> ProfileReport:
+        """Stop profiling and write the report."""
+        if self.mode == "cpu":
+            self._profile.disable()
+        elif self.mode == "wall":
+            self._sampler.stop()
+        else:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+
+        elapsed = time.perf_counter() - self._started
+        cpu = time.process_time() - self._cpu_started
+        header = f"{self.command or 'boxofports'}: {elapsed:.3f}s elapsed, {cpu:.3f}s CPU"
+
+        base = self._report_base()
+        if self.mode == "cpu":
+            return self._cpu_report(base, header)
+        if self.mode == "wall":
+            return self._wall_report(base, header)
+        return self._alloc_report(base, header, snapshot, current, peak)
+
+    def _report_base(self) -> Path:
+        """Report path without suffix, unique within the directory."""
+        directory = self.directory or profiles_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", self.command).strip("-") or "boxofports"
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{self.mode}"
+        base = directory / stem
+        counter = 1
+        while base.with_suffix(".txt").exists():
+            counter += 1
+            base = directory / f"{stem}-{counter}"
+        return base
+
+    def _cpu_report(self, base: Path, header: str) -> ProfileReport:
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stream)
+        stats_path = base.with_suffix(".prof")
+        stats.dump_stats(stats_path)
+
+        total = stats.total_tt or 1.0
+        rows = []
+        ranked = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+        for (filename, line, name), (primitive, calls, own, cumulative, _) in ranked[:self.top]:
+            rows.append([
+                _describe((name, filename, line)),
+                str(calls) if calls == primitive else f"{calls}/{primitive}",
+                f"{own * 1000:.1f}ms",
+                f"{own / total:.1%}",
+                f"{cumulative * 1000:.1f}ms",
+            ])
+
+        stream.write(f"{header}\nCPU profile (cProfile, process time)\n")
+        stats.sort_stats("tottime").print_stats(_REPORT_ROWS)
+        stats.sort_stats("cumulative").print_stats(_REPORT_ROWS)
+        path = base.with_suffix(".txt")
+        path.write_text(stream.getvalue())
+
+        return ProfileReport(
+            mode="cpu",
+            command=self.command,
+            path=path,
+            summary=f"{header}, {stats.total_calls} calls",
+            columns=["Function", "Calls", "Self", "Self %", "Total"],
+            rows=rows,
+            extra_paths=[stats_path],
+        )
+
+    def _wall_report(self, base: Path, header: str) -> ProfileReport:
+        sampler = self._sampler
+        own: Counter[Frame] = Counter()
+        inclusive: Counter[Frame] = Counter()
+        for stack, count in sampler.stacks.items():
+            own[stack[-1]] += count
+            for frame in set(stack):
+                inclusive[frame] += count
+
+        samples = sampler.samples or 1
+        ranked = sorted(own, key=lambda frame: (own[frame], inclusive[frame]), reverse=True)
+        rows = [
+            [
+                _describe(frame),
+                str(own[frame]),
+                f"{own[frame] / samples:.1%}",
+                f"{inclusive[frame] / samples:.1%}",
+            ]
+            for frame in ranked[:self.top]
+        ]
+
+        folded_path = base.with_suffix(".folded")
+        with open(folded_path, "w") as folded:
+            for stack, count in sampler.stacks.most_common():
+                folded.write(";".join(_describe(frame) for frame in stack) + f" {count}\n")
+
+        lines = [
+            header,
+            f"Wall-clock profile: {sampler.samples} samples every {self.interval * 1000:g}ms",
+            "",
+            f"{'self':>8} {'self%':>7} {'total%':>7}  function",
+        ]
+        for frame in ranked[:_REPORT_ROWS]:
+            lines.append(
+                f"{own[frame]:>8} {own[frame] / samples:>7.1%} {inclusive[frame] / samples:>7.1%}  {_describe(frame)}"
+            )
+        lines += ["", f"{'total':>8} {'total%':>7}  function (by inclusive time)"]
+        for frame, count in inclusive.most_common(_REPORT_ROWS):
+            lines.append(f"{count:>8} {count / samples:>7.1%}  {_describe(frame)}")
+        path = base.with_suffix(".txt")
+        path.write_text("\n".join(lines) + "\n")
+
+        return ProfileReport(
+            mode="wall",
+            command=self.command,
+            path=path,
+            summary=f"{header}, {sampler.samples} samples",
+            columns=["Function", "Samples", "Self %", "Total %"],
+            rows=rows,
+            extra_paths=[folded_path],
+        )
+
+    def _alloc_report(
+        self, base: Path, header: str, snapshot: tracemalloc.Snapshot, current: int, peak: int
+    ) -> ProfileReport:
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+        by_line = snapshot.statistics("lineno")
+        held = sum(stat.size for stat in by_line) or 1
+
+        rows = []
+        for stat in by_line[:self.top]:
+            frame = stat.traceback[0]
+            rows.append([
+                f"{_short_path(frame.filename)}:{frame.lineno}",
+                linecache.getline(frame.filename, frame.lineno).strip()[:60],
+                _format_size(stat.size),
+                f"{stat.size / held:.1%}",
+                str(stat.count),
+            ])
+
+        lines = [
+            header,
+            f"Allocations (tracemalloc): {_format_size(current)} held at exit, {_format_size(peak)} peak",
+            "",
+            f"{'size':>10} {'count':>8}  location",
+        ]
+        for stat in by_line[:_REPORT_ROWS]:
+            frame = stat.traceback[0]
+            lines.append(f"{_format_size(stat.size):>10} {stat.count:>8}  {frame.filename}:{frame.lineno}")
+        lines += ["", "Largest allocation sites with their call stacks:"]
+        for stat in snapshot.statistics("traceback")[:10]:
+            lines.append("")
+            lines.append(f"{_format_size(stat.size)} in {stat.count} blocks")
+            lines.extend(stat.traceback.format())
+        path = base.with_suffix(".txt")
+        path.write_text("\n".join(lines) + "\n")
+
+        return ProfileReport(
+            mode="alloc",
+            command=self.command,
+            path=path,
+            summary=f"{header}, {_format_size(current)} held at exit, {_format_size(peak)} peak",
+            columns=["Location", "Source", "Size", "Share", "Blocks"],
+            rows=rows,
+        )
+
+
+def _short_path(filename: str) -> str:
+    """Trim a source path to its package-relative tail."""
+    parts = Path(filename).parts
+    if "site-packages" in parts:
+        index = len(parts) - 1 - parts[::-1].index("site-packages")
+        return "/".join(parts[index + 1:])
+    if "boxofports" in parts[:-1]:
+        index = len(parts) - 1 - parts[::-1].index("boxofports")
+        return "/".join(parts[index:])
+    return "/".join(parts[-2:])
+
+
+def _describe(frame: Frame) -> str:
+    """Readable label for a (function, file, line) triple."""
+    name, filename, line = frame
+    if filename == "~":
+        # Built-ins have no source location
+        return name
+    return f"{name} ({_short_path(filename)}:{line})"
+
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GiB"
@@ -0,0 +1,193 @@
+"""Retry pacing, retry budgets and circuit breakers for gateway requests.
+
+Transient failures (connection errors, timeouts, HTTP 5xx and 429) are
+retried with full-jitter exponential backoff: each wait is drawn
+uniformly between zero and an exponentially growing cap, so clients that
+failed together don't retry together.
+
+Two per-gateway guards keep a dead device from eating a fleet-wide run:
+
+- The retry budget lets retries add at most a fixed share of the
+  gateway's request volume (plus a small reserve), so retries stop
+  multiplying load once most requests fail.
+- The circuit breaker opens after a run of consecutive failures and then
+  fails requests immediately. After a cooldown it is half-open: one
+  request goes through as a probe and its outcome closes or reopens it.
+
+State is shared by every client of the same gateway in the process.
+"""
+
+import random
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+# Retries a gateway may always make before the budget ratio applies
+_BUDGET_RESERVE = 10.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Full-jitter delay before retry number attempt + 1."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class RetryBudget:
+    """Caps retries at a share of requests made to a gateway."""
+
+    def __init__(self, ratio: float = 0.2, reserve: float = _BUDGET_RESERVE):
+        self._lock = threading.Lock()
+        self.ratio = ratio
+        self.reserve = reserve
+        self._tokens = reserve
+        self.spent = 0
+        self.denied = 0
+
+    def record_request(self) -> None:
+        """Credit the budget for a new (first-attempt) request."""
+        with self._lock:
+            self._tokens = min(self.reserve, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget if any is left."""
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.spent += 1
+                return True
+            self.denied += 1
+            return False
+
+
+class CircuitBreaker:
+    """Fails fast for a gateway that keeps failing."""
+
+    def __init__(
+        self,
+        threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Create a closed breaker.
+
+        Args:
+            threshold: Consecutive failures that open it (0 disables it)
+            cooldown: Seconds to stay open before letting a probe through
+            clock: Monotonic time source
+        """
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probing = False
+        self._probe_started = 0.0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now.
+
+        When the cooldown has passed, the first caller is let through as
+        the half-open probe and others are rejected until it finishes (or
+        until another cooldown passes without an outcome).
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = self._clock()
+            if self.state == OPEN and now - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and (not self._probing or now - self._probe_started >= self.cooldown):
+                self._probing = True
+                self._probe_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe through."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.cooldown - (self._clock() - self.opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (self.threshold and self.failures >= self.threshold):
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = self._clock()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current state and counters."""
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_budgets: dict[str, RetryBudget] = {}
+_registry_lock = threading.Lock()
+
+
+def breaker_for(config) -> CircuitBreaker:
+    """The shared circuit breaker for a gateway, updated to the config's settings."""
+    with _registry_lock:
+        breaker = _breakers.get(config.base_url)
+        if breaker is None:
+            breaker = _breakers[config.base_url] = CircuitBreaker()
+        breaker.threshold = config.breaker_threshold
+        breaker.cooldown = config.breaker_cooldown
+        return breaker
+
+
+def budget_for(config) -> RetryBudget:
+    """The shared retry budget for a gateway, updated to the config's settings."""
+    with _registry_lock:
+        budget = _budgets.get(config.base_url)
+        if budget is None:
+            budget = _budgets[config.base_url] = RetryBudget()
+        budget.ratio = config.retry_budget
+        return budget
+
+
+def breaker_stats() -> dict[str, dict[str, Any]]:
+    """Snapshot of every gateway's breaker and retry budget, keyed by base URL."""
+    with _registry_lock:
+        breakers = dict(_breakers)
+        budgets = dict(_budgets)
+    stats = {key: breaker.snapshot() for key, breaker in breakers.items()}
+    for key, budget in budgets.items():
+        stats.setdefault(key, {}).update(retries=budget.spent, retries_denied=budget.denied)
+    return stats
+
+
+def reset_retry_state() -> None:
+    """Forget all breakers and budgets."""
+    with _registry_lock:
+        _breakers.clear()
+        _budgets.clear()
@@ -0,0 +1,203 @@
+"""Device status snapshot cache with TTL and request coalescing.
+
+Every device reports the state of all its ports from a single
+/goip_get_status.html call. This cache keeps the latest snapshot per
+gateway so IMEI lookups, port selection and lock/unlock flows can share
+one request instead of asking the device again each time.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".boxofports" / "cache" / "status"
+
+
+@dataclass
+class StatusSnapshot:
+    """A device status response and when it was fetched."""
+
+    data: dict[str, Any]
+    fetched_at: float
+    ttl: float
+
+    @property
+    def age(self) -> float:
+        """Seconds since the snapshot was fetched."""
+        return time.time() - self.fetched_at
+
+    def is_fresh(self, max_age: float | None = None) -> bool:
+        """Whether the snapshot is still within its TTL (or max_age)."""
+        limit = self.ttl if max_age is None else min(max_age, self.ttl)
+        return self.age <= limit
+
+
+@dataclass
+class _Flight:
+    """An in-progress fetch that concurrent callers wait on."""
+
+    done: threading.Event = field(default_factory=threading.Event)
+    snapshot: StatusSnapshot | None = None
+    error: BaseException | None = None
+
+
+class DeviceStatusCache:
+    """Per-gateway cache of device status snapshots.
+
+    Snapshots live in memory and, when a cache directory is set, on disk so
+    separate CLI invocations can reuse them. Concurrent callers asking for
+    the same stale gateway share a single in-flight fetch.
+    """
+
+    def __init__(self, cache_dir: Path | None = DEFAULT_CACHE_DIR, default_ttl: float = 30.0):
+        self.cache_dir = cache_dir
+        self.default_ttl = default_ttl
+        self._snapshots: dict[str, StatusSnapshot] = {}
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        key: str,
+        fetch: Callable[[], dict[str, Any]],
+        ttl: float | None = None,
+        max_age: float | None = None,
+    ) -> dict[str, Any]:
+        """Return a fresh-enough status for a gateway, fetching if needed.
+
+        Args:
+            key: Gateway identifier (e.g. its base URL)
+            fetch: Callable performing the device request
+            ttl: Lifetime for a newly fetched snapshot; capped by the
+                device's own 'expires' value
+            max_age: Per-call freshness requirement (0 forces a fetch)
+
+        Returns:
+            The device status response
+        """
+        with self._lock:
+            snapshot = self._lookup(key)
+            if snapshot and snapshot.is_fresh(max_age):
+                return snapshot.data
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.snapshot.data
+
+        try:
+            data = fetch()
+            flight.snapshot = self.put(key, data, ttl)
+            return data
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def put(self, key: str, data: dict[str, Any], ttl: float | None = None) -> StatusSnapshot:
+        """Store a status response for a gateway."""
+        ttl = self.default_ttl if ttl is None else ttl
+        expires = data.get("expires") if isinstance(data, dict) else None
+        if isinstance(expires, (int, float)) and expires > 0:
+            ttl = min(ttl, float(expires))
+
+        snapshot = StatusSnapshot(data=data, fetched_at=time.time(), ttl=ttl)
+        with self._lock:
+            self._snapshots[key] = snapshot
+        self._write(key, snapshot)
+        return snapshot
+
+    def peek(self, key: str) -> StatusSnapshot | None:
+        """Return the last known snapshot for a gateway regardless of age."""
+        with self._lock:
+            return self._lookup(key)
+
+    def invalidate(self, key: str) -> None:
+        """Forget the snapshot for a gateway, e.g. after changing port state."""
+        with self._lock:
+            self._snapshots.pop(key, None)
+        path = self._path(key)
+        if path is not None:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.debug(f"Could not remove status cache {path}: {e}")
+
+    def clear(self) -> None:
+        """Forget every in-memory snapshot."""
+        with self._lock:
+            self._snapshots.clear()
+
+    def _lookup(self, key: str) -> StatusSnapshot | None:
+        """Find a snapshot in memory, falling back to disk. Caller holds the lock."""
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            snapshot = self._read(key)
+            if snapshot is not None:
+                self._snapshots[key] = snapshot
+        return snapshot
+
+    def _path(self, key: str) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', key)}.json"
+
+    def _read(self, key: str) -> StatusSnapshot | None:
+        path = self._path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                raw = json.load(f)
+            return StatusSnapshot(data=raw["data"], fetched_at=raw["fetched_at"], ttl=raw["ttl"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug(f"Ignoring unreadable status cache {path}: {e}")
+            return None
+
+    def _write(self, key: str, snapshot: StatusSnapshot) -> None:
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # Snapshots carry IMEIs and numbers; mkstemp creates them 0o600
+            # like profiles.json
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {"data": snapshot.data, "fetched_at": snapshot.fetched_at, "ttl": snapshot.ttl},
+                        f,
+                    )
+                os.replace(tmp_name, path)
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+        except OSError as e:
+            logger.debug(f"Could not write status cache {path}: {e}")
+
+
+# Process-wide cache shared by all clients
+status_cache = DeviceStatusCache()
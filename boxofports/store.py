@@ -1,15 +1,69 @@
 """SQLite storage layer for local state management."""
 
 import json
+import re
 import sqlite3
 import threading
+import time
 from collections.abc import Iterator
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from typing import Any
 
-from .api_models import SMSTaskReport
+from . import metrics
+from .api_models import (
+    PortStatusCode,
+    SMSMessage,
+    SMSTaskReport,
+    get_status_description,
+)
+
+# Tables whose row counts are kept in store_counters by triggers
+_COUNTED_TABLES = ('sms_tasks', 'task_reports', 'inbox_messages', 'port_status')
+
+# Retention order and columns: table -> (timestamp column, result key,
+# built-in retention days or None to follow days_to_keep)
+_RETENTION_TABLES = {
+    'task_reports': ('updated_at', 'reports_deleted', None),
+    'inbox_messages': ('received_at', 'inbox_deleted', None),
+    'sms_tasks': ('submitted_at', 'tasks_deleted', None),
+    'delivery_results': ('ts', 'results_deleted', None),
+    'port_status_history': ('ts', 'history_deleted', None),
+    'port_status_minutely': ('bucket', 'minutely_deleted', 7),
+    'port_status_hourly': ('bucket', 'hourly_deleted', 365),
+}
+
+# Timestamp columns holding Unix seconds rather than SQLite datetimes
+_EPOCH_COLUMNS = {'ts', 'bucket'}
+
+# Port status fields whose change is recorded in port_status_history
+_PORT_STATE_FIELDS = ('status_code', 'operator', 'iccid', 'imei')
+
+# Port status 'st' values are a code, optionally followed by details
+_STATUS_CODE_RE = re.compile(r"^\s*(\d+)")
+
+# Port status rollup tables: table -> bucket width in seconds
+_PORT_STATUS_ROLLUPS = {
+    'port_status_minutely': 60,
+    'port_status_hourly': 3600,
+}
+
+# Tables that can be streamed out with iter_rows: table -> timestamp column
+_EXPORT_TABLES = {
+    'sms_tasks': 'submitted_at',
+    'task_reports': 'updated_at',
+    'inbox_messages': 'received_at',
+    'delivery_results': 'ts',
+    'port_status': 'updated_at',
+    'port_status_history': 'ts',
+}
+
+# Hourly activity buckets: kind -> (table, timestamp column)
+_ACTIVITY_BUCKETS = {
+    'tasks': ('sms_tasks', 'submitted_at'),
+    'inbox': ('inbox_messages', 'received_at'),
+}
 
 
 class EjoinStore:
@@ -24,6 +78,12 @@ class EjoinStore:
         """
         self.db_path = db_path
         self._local = threading.local()
+        # Every thread's connection, so close() can reach them all
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Last known state per (device_ip, port), loaded on first status save
+        self._port_state: dict[tuple[str, str], tuple] | None = None
+        self._port_state_lock = threading.Lock()
         self._initialize_db()
 
     def _get_connection(self) -> sqlite3.Connection:
@@ -37,23 +97,51 @@ class EjoinStore:
             self._local.connection.row_factory = sqlite3.Row
             # Enable foreign keys
             self._local.connection.execute("PRAGMA foreign_keys = ON")
+            # Fire delete triggers for rows removed by INSERT OR REPLACE so
+            # materialized counters stay exact
+            self._local.connection.execute("PRAGMA recursive_triggers = ON")
+            with self._connections_lock:
+                self._connections.append(self._local.connection)
         return self._local.connection
 
     @contextmanager
-    def _transaction(self) -> Iterator[sqlite3.Connection]:
-        """Context manager for database transactions."""
+    def _transaction(self, kind: str = "other") -> Iterator[sqlite3.Connection]:
+        """Context manager for database transactions.
+
+        Args:
+            kind: What the transaction does, reported to metrics hooks
+                with its duration and the number of rows it changed
+        """
         conn = self._get_connection()
+        instrumented = metrics.active()
+        if instrumented:
+            started = time.perf_counter()
+            changes_before = conn.total_changes
+        ok = False
         conn.execute("BEGIN")
         try:
             yield conn
             conn.execute("COMMIT")
+            ok = True
         except Exception:
             conn.execute("ROLLBACK")
             raise
+        finally:
+            if instrumented:
+                metrics.emit(
+                    "store",
+                    kind=kind,
+                    rows=conn.total_changes - changes_before if ok else 0,
+                    seconds=time.perf_counter() - started,
+                    ok=ok,
+                )
 
     def _initialize_db(self) -> None:
         """Initialize database schema."""
-        with self._transaction() as conn:
+        # Only takes effect for new files; must precede the first table
+        self._get_connection().execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+        with self._transaction("initialize") as conn:
             # SMS tasks table
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS sms_tasks (
@@ -133,18 +221,258 @@ class EjoinStore:
                 )
             """)
 
+            # Normalized delivery outcomes (one row per recipient per report)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS delivery_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    device_ip TEXT NOT NULL DEFAULT '',
+                    tid INTEGER,
+                    port TEXT NOT NULL,
+                    number TEXT NOT NULL,
+                    outcome TEXT NOT NULL,
+                    code INTEGER,
+                    ts INTEGER NOT NULL
+                )
+            """)
+
+            # Databases from before results were keyed by device
+            self._migrate_delivery_device(conn)
+
+            # Per-device, per-port, per-hour delivery rollups maintained by trigger
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS port_delivery_hourly (
+                    device_ip TEXT NOT NULL,
+                    port TEXT NOT NULL,
+                    hour INTEGER NOT NULL,
+                    sent INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    delivered INTEGER NOT NULL DEFAULT 0,
+                    undelivered INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (device_ip, port, hour)
+                ) WITHOUT ROWID
+            """)
+
+            # Rollups are only ever incremented so they outlive raw rows
+            # removed by retention
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_delivery_results_rollup
+                AFTER INSERT ON delivery_results
+                BEGIN
+                    INSERT INTO port_delivery_hourly
+                    (device_ip, port, hour, sent, failed, delivered, undelivered)
+                    VALUES (
+                        NEW.device_ip,
+                        NEW.port,
+                        NEW.ts - NEW.ts % 3600,
+                        NEW.outcome = 'sent',
+                        NEW.outcome = 'failed',
+                        NEW.outcome = 'delivered',
+                        NEW.outcome = 'undelivered'
+                    )
+                    ON CONFLICT (device_ip, port, hour) DO UPDATE SET
+                        sent = sent + excluded.sent,
+                        failed = failed + excluded.failed,
+                        delivered = delivered + excluded.delivered,
+                        undelivered = undelivered + excluded.undelivered;
+                END
+            """)
+
+            # Append-only log of port state changes
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS port_status_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    device_ip TEXT NOT NULL,
+                    port TEXT NOT NULL,
+                    status_code INTEGER NOT NULL,
+                    status_text TEXT NOT NULL,
+                    operator TEXT,
+                    iccid TEXT,
+                    imei TEXT,
+                    ts INTEGER NOT NULL
+                )
+            """)
+
+            # Downsampled change counts per port, filled from the history
+            for table, width in _PORT_STATUS_ROLLUPS.items():
+                conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        device_ip TEXT NOT NULL,
+                        port TEXT NOT NULL,
+                        bucket INTEGER NOT NULL,
+                        changes INTEGER NOT NULL DEFAULT 0,
+                        failures INTEGER NOT NULL DEFAULT 0,
+                        last_status_code INTEGER NOT NULL,
+                        PRIMARY KEY (device_ip, port, bucket)
+                    ) WITHOUT ROWID
+                """)
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_rollup
+                    AFTER INSERT ON port_status_history
+                    BEGIN
+                        INSERT INTO {table}
+                        (device_ip, port, bucket, changes, failures, last_status_code)
+                        VALUES (
+                            NEW.device_ip,
+                            NEW.port,
+                            NEW.ts - NEW.ts % {width},
+                            1,
+                            NEW.status_code != {PortStatusCode.REGISTERED.value},
+                            NEW.status_code
+                        )
+                        ON CONFLICT (device_ip, port, bucket) DO UPDATE SET
+                            changes = changes + 1,
+                            failures = failures + excluded.failures,
+                            last_status_code = excluded.last_status_code;
+                    END
+                """)
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table} (bucket)")
+
             # Create indexes
             conn.execute("CREATE INDEX IF NOT EXISTS idx_sms_tasks_submitted_at ON sms_tasks (submitted_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_task_reports_updated_at ON task_reports (updated_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_inbox_received_at ON inbox_messages (received_at)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_task_reports_tid ON task_reports (tid)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_inbox_ssrc_sms_id ON inbox_messages (ssrc, sms_id)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_port_status_device_port ON port_status (device_ip, port)")
+            conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_delivery_results_device_unique
+                ON delivery_results (device_ip, IFNULL(tid, -1), port, number, outcome, ts)
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_delivery_results_device_port_ts ON delivery_results (device_ip, port, ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_port_status_history_port_ts ON port_status_history (device_ip, port, ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_port_status_history_ts ON port_status_history (ts)")
+
+            self._initialize_counters(conn)
+
+    def _migrate_delivery_device(self, conn: sqlite3.Connection) -> None:
+        """Add the device_ip key to delivery tables created without it.
+
+        Existing results and rollups are kept under the empty device.
+        """
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(delivery_results)")}
+        if 'device_ip' in columns:
+            return
+        conn.execute("ALTER TABLE delivery_results ADD COLUMN device_ip TEXT NOT NULL DEFAULT ''")
+        conn.execute("DROP INDEX IF EXISTS idx_delivery_results_unique")
+        conn.execute("DROP INDEX IF EXISTS idx_delivery_results_port_ts")
+        conn.execute("DROP TRIGGER IF EXISTS trg_delivery_results_rollup")
+        conn.execute("ALTER TABLE port_delivery_hourly RENAME TO port_delivery_hourly_old")
+        conn.execute("""
+            CREATE TABLE port_delivery_hourly (
+                device_ip TEXT NOT NULL,
+                port TEXT NOT NULL,
+                hour INTEGER NOT NULL,
+                sent INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                delivered INTEGER NOT NULL DEFAULT 0,
+                undelivered INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (device_ip, port, hour)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            INSERT INTO port_delivery_hourly
+            SELECT '', port, hour, sent, failed, delivered, undelivered
+            FROM port_delivery_hourly_old
+        """)
+        conn.execute("DROP TABLE port_delivery_hourly_old")
+
+    def _initialize_counters(self, conn: sqlite3.Connection) -> None:
+        """Create trigger-maintained row counters and hourly activity buckets."""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS store_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS activity_hourly (
+                kind TEXT NOT NULL,
+                hour INTEGER NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (kind, hour)
+            ) WITHOUT ROWID
+        """)
+
+        for table in _COUNTED_TABLES:
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_count_insert
+                AFTER INSERT ON {table}
+                BEGIN
+                    UPDATE store_counters SET value = value + 1 WHERE name = '{table}';
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_count_delete
+                AFTER DELETE ON {table}
+                BEGIN
+                    UPDATE store_counters SET value = value - 1 WHERE name = '{table}';
+                END
+            """)
+
+        for kind, (table, column) in _ACTIVITY_BUCKETS.items():
+            hour = f"CAST(strftime('%s', {{row}}.{column}) AS INTEGER) / 3600 * 3600"
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_activity_insert
+                AFTER INSERT ON {table}
+                WHEN NEW.{column} IS NOT NULL
+                BEGIN
+                    INSERT INTO activity_hourly (kind, hour, count)
+                    VALUES ('{kind}', {hour.format(row='NEW')}, 1)
+                    ON CONFLICT (kind, hour) DO UPDATE SET count = count + 1;
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_activity_delete
+                AFTER DELETE ON {table}
+                WHEN OLD.{column} IS NOT NULL
+                BEGIN
+                    UPDATE activity_hourly SET count = count - 1
+                    WHERE kind = '{kind}' AND hour = {hour.format(row='OLD')};
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_activity_update
+                AFTER UPDATE OF {column} ON {table}
+                BEGIN
+                    UPDATE activity_hourly SET count = count - 1
+                    WHERE OLD.{column} IS NOT NULL
+                    AND kind = '{kind}' AND hour = {hour.format(row='OLD')};
+                    INSERT INTO activity_hourly (kind, hour, count)
+                    SELECT '{kind}', {hour.format(row='NEW')}, 1
+                    WHERE NEW.{column} IS NOT NULL
+                    ON CONFLICT (kind, hour) DO UPDATE SET count = count + 1;
+                END
+            """)
+
+        # Databases created before counters existed need a one-off backfill
+        seeded = conn.execute("SELECT COUNT(*) FROM store_counters").fetchone()[0]
+        if seeded < len(_COUNTED_TABLES):
+            self._rebuild_counters(conn)
+
+    def _rebuild_counters(self, conn: sqlite3.Connection) -> None:
+        """Recompute all counters and activity buckets from the source tables."""
+        for table in _COUNTED_TABLES:
+            conn.execute(f"""
+                INSERT OR REPLACE INTO store_counters (name, value)
+                SELECT '{table}', COUNT(*) FROM {table}
+            """)
+
+        conn.execute("DELETE FROM activity_hourly")
+        for kind, (table, column) in _ACTIVITY_BUCKETS.items():
+            conn.execute(f"""
+                INSERT INTO activity_hourly (kind, hour, count)
+                SELECT '{kind}', CAST(strftime('%s', {column}) AS INTEGER) / 3600 * 3600, COUNT(*)
+                FROM {table}
+                WHERE {column} IS NOT NULL
+                GROUP BY 2
+            """)
 
     # SMS Task Management
     def save_sms_task(self, tid: int, ports: list[str], to_number: str,
                       text_hash: str, template_text: str = None,
                       template_vars: dict[str, Any] = None) -> None:
         """Save an SMS task to the database."""
-        with self._transaction() as conn:
+        with self._transaction("save_sms_task") as conn:
             conn.execute("""
                 INSERT OR REPLACE INTO sms_tasks 
                 (tid, ports, to_number, text_hash, template_text, template_vars)
@@ -200,15 +528,23 @@ class EjoinStore:
 
     def update_task_status(self, tid: int, status: str) -> None:
         """Update task status."""
-        with self._transaction() as conn:
+        with self._transaction("update_task_status") as conn:
             conn.execute("""
                 UPDATE sms_tasks SET status = ? WHERE tid = ?
             """, (status, tid))
 
     # Task Report Management
-    def save_task_report(self, report: SMSTaskReport) -> None:
-        """Save a task report."""
-        with self._transaction() as conn:
+    def save_task_report(self, report: SMSTaskReport, device_ip: str = '') -> int:
+        """Save a task report and the delivery results it carries.
+
+        Args:
+            report: Report posted by the gateway (status-report rpts entry)
+            device_ip: Gateway the report came from
+
+        Returns:
+            Number of new delivery results recorded
+        """
+        with self._transaction("save_task_report") as conn:
             conn.execute("""
                 INSERT OR REPLACE INTO task_reports 
                 (tid, sending, sent, failed, unsent, sdr_details, fdr_details)
@@ -222,6 +558,7 @@ class EjoinStore:
                 json.dumps(report.sdr),
                 json.dumps(report.fdr)
             ))
+            return self._insert_delivery_results(conn, _delivery_rows_from_report(report, device_ip))
 
     def get_task_report(self, tid: int) -> dict[str, Any] | None:
         """Get the latest report for a task."""
@@ -278,12 +615,114 @@ class EjoinStore:
 
         return reports
 
+    # Delivery Result Management
+    def _insert_delivery_results(self, conn: sqlite3.Connection,
+                                 rows: list[tuple]) -> int:
+        """Insert delivery result rows, ignoring ones already recorded."""
+        result = conn.executemany("""
+            INSERT OR IGNORE INTO delivery_results
+            (device_ip, tid, port, number, outcome, code, ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        return max(result.rowcount, 0)
+
+    def save_delivery_reports(self, messages: list[SMSMessage], device_ip: str = '') -> int:
+        """Record delivery-report inbox messages as delivery results.
+
+        Non-report messages and reports without a parsed status code are
+        skipped. Returns the number of new results recorded.
+        """
+        rows = [
+            (
+                device_ip,
+                None,
+                msg.port,
+                msg.delivery_phone_number or msg.recipient or '',
+                'delivered' if msg.delivery_status_code == 0 else 'undelivered',
+                msg.delivery_status_code,
+                int(msg.timestamp.timestamp()),
+            )
+            for msg in messages
+            if msg.is_delivery_report and msg.delivery_status_code is not None
+        ]
+        if not rows:
+            return 0
+        with self._transaction("save_delivery_reports") as conn:
+            return self._insert_delivery_results(conn, rows)
+
+    def get_delivery_results(self, tid: int = None, port: str = None,
+                             limit: int = 100, device_ip: str = None) -> list[dict[str, Any]]:
+        """Get recent delivery results, optionally filtered by device, task or port."""
+        conn = self._get_connection()
+        clauses = []
+        params: list[Any] = []
+        if device_ip is not None:
+            clauses.append("device_ip = ?")
+            params.append(device_ip)
+        if tid is not None:
+            clauses.append("tid = ?")
+            params.append(tid)
+        if port:
+            clauses.append("port = ?")
+            params.append(port)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = conn.execute(f"""
+            SELECT device_ip, tid, port, number, outcome, code, ts FROM delivery_results
+            {where}
+            ORDER BY ts DESC
+            LIMIT ?
+        """, (*params, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_port_delivery_stats(self, since_ts: int = 0, device_ip: str = None) -> list[dict[str, Any]]:
+        """Get per-port delivery totals from the hourly rollups.
+
+        Args:
+            since_ts: Only include hours starting at or after this Unix time
+            device_ip: Only include this gateway (default: all gateways)
+
+        Returns:
+            One dict per device and port with outcome totals and success rates
+        """
+        conn = self._get_connection()
+        params: list[Any] = [since_ts - since_ts % 3600]
+        device_clause = ""
+        if device_ip is not None:
+            device_clause = "AND device_ip = ?"
+            params.append(device_ip)
+        rows = conn.execute(f"""
+            SELECT device_ip, port,
+                   SUM(sent) AS sent,
+                   SUM(failed) AS failed,
+                   SUM(delivered) AS delivered,
+                   SUM(undelivered) AS undelivered
+            FROM port_delivery_hourly
+            WHERE hour >= ? {device_clause}
+            GROUP BY device_ip, port
+        """, params).fetchall()
+
+        stats = []
+        for row in rows:
+            attempted = row['sent'] + row['failed']
+            reported = row['delivered'] + row['undelivered']
+            stats.append({
+                'device_ip': row['device_ip'],
+                'port': row['port'],
+                'sent': row['sent'],
+                'failed': row['failed'],
+                'delivered': row['delivered'],
+                'undelivered': row['undelivered'],
+                'send_rate': row['sent'] / attempted if attempted else None,
+                'delivery_rate': row['delivered'] / reported if reported else None,
+            })
+        return stats
+
     # Inbox Management
     def save_inbox_message(self, ssrc: str, sms_id: int, delivery_report: int,
                           port: str, timestamp: int, sender: str, recipient: str,
                           content: str, content_base64: str = None) -> None:
         """Save an inbox message."""
-        with self._transaction() as conn:
+        with self._transaction("save_inbox_message") as conn:
             conn.execute("""
                 INSERT OR IGNORE INTO inbox_messages 
                 (ssrc, sms_id, delivery_report, port, timestamp, sender, recipient, content, content_base64)
@@ -325,7 +764,7 @@ class EjoinStore:
     def save_device_status(self, device_ip: str, device_mac: str,
                           max_ports: int, max_slots: int) -> None:
         """Save device status."""
-        with self._transaction() as conn:
+        with self._transaction("save_device_status") as conn:
             conn.execute("""
                 INSERT OR REPLACE INTO device_status 
                 (device_ip, device_mac, max_ports, max_slots)
@@ -335,16 +774,131 @@ class EjoinStore:
     def save_port_status(self, device_ip: str, port: str, status_code: int,
                         status_text: str, balance: str = None, operator: str = None,
                         sim_number: str = None, imei: str = None,
-                        imsi: str = None, iccid: str = None) -> None:
-        """Save port status."""
-        with self._transaction() as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO port_status 
-                (device_ip, port, status_code, status_text, balance, operator, 
-                 sim_number, imei, imsi, iccid)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (device_ip, port, status_code, status_text, balance, operator,
-                  sim_number, imei, imsi, iccid))
+                        imsi: str = None, iccid: str = None,
+                        ts: int = None) -> bool:
+        """Save port status, appending to the history if the state changed.
+
+        Only changes to status code, operator, ICCID or IMEI are recorded
+        in port_status_history; balance updates just refresh port_status.
+        Returns True if a history row was written.
+        """
+        row = (port, status_code, status_text, balance, operator, sim_number, imei, imsi, iccid)
+        return self._save_port_rows(device_ip, [row], ts, "save_port_status") == 1
+
+    def save_status_snapshot(self, device_ip: str, status: dict[str, Any], ts: int = None) -> int:
+        """Save every port of a /goip_get_status.html response.
+
+        Ports are stored in '1A' style in one transaction, with the same
+        change detection as save_port_status. Returns the number of ports
+        whose state changed.
+        """
+        entries = status.get("status") if isinstance(status, dict) else None
+        rows = []
+        for entry in entries or ():
+            if not isinstance(entry, dict) or "port" not in entry:
+                continue
+            match = _STATUS_CODE_RE.match(str(entry.get("st", "")))
+            if not match:
+                continue
+            status_code = int(match.group(1))
+            rows.append((
+                _report_port(entry["port"]), status_code, get_status_description(status_code, "port"),
+                entry.get("bal"), entry.get("opr"), entry.get("sn"),
+                entry.get("imei"), entry.get("imsi"), entry.get("iccid"),
+            ))
+        if not rows:
+            return 0
+        return self._save_port_rows(device_ip, rows, ts, "save_status_snapshot")
+
+    def _save_port_rows(self, device_ip: str, rows: list[tuple], ts: int | None, kind: str) -> int:
+        """Write port status rows and history for the changed ones."""
+        ts = int(time.time()) if ts is None else ts
+        with self._port_state_lock:
+            if self._port_state is None:
+                self._port_state = self._load_port_state()
+
+            states = {}
+            changed = 0
+            with self._transaction(kind) as conn:
+                for port, status_code, status_text, balance, operator, sim_number, imei, imsi, iccid in rows:
+                    conn.execute("""
+                        INSERT OR REPLACE INTO port_status
+                        (device_ip, port, status_code, status_text, balance, operator,
+                         sim_number, imei, imsi, iccid)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (device_ip, port, status_code, status_text, balance, operator,
+                          sim_number, imei, imsi, iccid))
+
+                    state = (status_code, operator, iccid, imei)
+                    key = (device_ip, port)
+                    if states.get(key, self._port_state.get(key)) != state:
+                        conn.execute("""
+                            INSERT INTO port_status_history
+                            (device_ip, port, status_code, status_text, operator, iccid, imei, ts)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """, (device_ip, port, status_code, status_text, operator, iccid, imei, ts))
+                        changed += 1
+                    states[key] = state
+
+            self._port_state.update(states)
+        return changed
+
+    def _load_port_state(self) -> dict[tuple[str, str], tuple]:
+        """Load the last known state of every port from port_status."""
+        conn = self._get_connection()
+        fields = ', '.join(_PORT_STATE_FIELDS)
+        rows = conn.execute(f"SELECT device_ip, port, {fields} FROM port_status").fetchall()
+        return {(row[0], row[1]): tuple(row[2:]) for row in rows}
+
+    def get_port_status_history(self, device_ip: str, port: str,
+                                since_ts: int = 0, limit: int = 100) -> list[dict[str, Any]]:
+        """Get recorded state changes for a port, newest first."""
+        conn = self._get_connection()
+        rows = conn.execute("""
+            SELECT device_ip, port, status_code, status_text, operator, iccid, imei, ts
+            FROM port_status_history
+            WHERE device_ip = ? AND port = ? AND ts >= ?
+            ORDER BY ts DESC, id DESC
+            LIMIT ?
+        """, (device_ip, port, since_ts, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_port_health(self, device_ip: str, since_ts: int = 0,
+                        resolution: str = 'hour') -> list[dict[str, Any]]:
+        """Summarize port stability from the status rollups.
+
+        Args:
+            device_ip: Device to report on
+            since_ts: Only include buckets starting at or after this Unix time
+            resolution: 'minute' or 'hour' rollups
+
+        Returns:
+            One dict per port with change and failure counts and the
+            current status
+        """
+        tables = {'minute': 'port_status_minutely', 'hour': 'port_status_hourly'}
+        if resolution not in tables:
+            raise ValueError(f"Unknown resolution '{resolution}', expected minute or hour")
+        table = tables[resolution]
+        width = _PORT_STATUS_ROLLUPS[table]
+
+        conn = self._get_connection()
+        rows = conn.execute(f"""
+            SELECT r.port,
+                   SUM(r.changes) AS changes,
+                   SUM(r.failures) AS failures,
+                   COUNT(*) AS active_buckets,
+                   MAX(r.bucket) AS last_change,
+                   ps.status_code,
+                   ps.status_text,
+                   ps.operator
+            FROM {table} r
+            LEFT JOIN port_status ps
+              ON ps.device_ip = r.device_ip AND ps.port = r.port
+            WHERE r.device_ip = ? AND r.bucket >= ?
+            GROUP BY r.port
+        """, (device_ip, since_ts - since_ts % width)).fetchall()
+        return [dict(row) for row in rows]
 
     def get_port_status(self, device_ip: str, port: str = None) -> list[dict[str, Any]]:
         """Get port status for device."""
@@ -381,84 +935,353 @@ class EjoinStore:
         ]
 
     # Utility methods
-    def cleanup_old_data(self, days_to_keep: int = 30) -> dict[str, int]:
-        """Clean up old data from the database."""
-        cutoff_date = datetime.now().isoformat()[:-3]  # Remove microseconds
-
-        with self._transaction() as conn:
-            # Clean up old task reports
-            result = conn.execute(f"""
-                DELETE FROM task_reports 
-                WHERE updated_at < datetime('now', '-{days_to_keep} days')
-            """)
-            reports_deleted = result.rowcount
+    def cleanup_old_data(self, days_to_keep: int = 30,
+                         policies: dict[str, int] = None,
+                         batch_size: int = 5000,
+                         pause: float = 0.0) -> dict[str, Any]:
+        """Clean up old data from the database in bounded batches.
 
-            # Clean up old inbox messages
-            result = conn.execute(f"""
-                DELETE FROM inbox_messages 
-                WHERE received_at < datetime('now', '-{days_to_keep} days')
-            """)
-            inbox_deleted = result.rowcount
-
-            # Clean up old SMS tasks (keep if they have recent reports)
-            result = conn.execute(f"""
-                DELETE FROM sms_tasks 
-                WHERE submitted_at < datetime('now', '-{days_to_keep} days')
-                AND tid NOT IN (
-                    SELECT DISTINCT tid FROM task_reports 
-                    WHERE updated_at >= datetime('now', '-{days_to_keep} days')
-                )
-            """)
-            tasks_deleted = result.rowcount
+        Each batch is its own short transaction that walks the timestamp
+        index, so other writers are only blocked briefly. Freed pages are
+        returned to the filesystem with an incremental vacuum afterwards.
 
-        return {
-            'tasks_deleted': tasks_deleted,
-            'reports_deleted': reports_deleted,
-            'inbox_deleted': inbox_deleted
+        Args:
+            days_to_keep: Retention in days for tables without a built-in
+                policy (port status rollups keep 7 and 365 days)
+            policies: Per-table overrides, e.g. {'inbox_messages': 90}
+            batch_size: Maximum rows deleted per transaction
+            pause: Seconds to sleep between batches
+
+        Returns:
+            Per-table deletion counts plus batches, elapsed time,
+            throughput and pages freed
+        """
+        defaults = {
+            table: days_to_keep if default is None else default
+            for table, (_, _, default) in _RETENTION_TABLES.items()
         }
+        policies = {**defaults, **(policies or {})}
+        unknown = set(policies) - set(_RETENTION_TABLES)
+        if unknown:
+            raise ValueError(f"No retention policy support for: {', '.join(sorted(unknown))}")
 
-    def get_stats(self) -> dict[str, Any]:
-        """Get database statistics."""
+        started = time.monotonic()
+        now = datetime.now(UTC)
+        result: dict[str, Any] = {'batches': 0}
+
+        # task_reports precede sms_tasks so tasks freed by the first pass
+        # can go in the second
+        for table, (column, result_key, _) in _RETENTION_TABLES.items():
+            cutoff_dt = now - timedelta(days=policies[table])
+            if column in _EPOCH_COLUMNS:
+                cutoff: Any = int(cutoff_dt.timestamp())
+            else:
+                cutoff = cutoff_dt.strftime('%Y-%m-%d %H:%M:%S')
+
+            extra = ""
+            if table == 'sms_tasks':
+                # Tasks that still have reports are kept
+                extra = """AND NOT EXISTS (
+                    SELECT 1 FROM task_reports tr WHERE tr.tid = sms_tasks.tid
+                )"""
+
+            # Rollup tables are WITHOUT ROWID and are keyed by their primary key
+            key = 'device_ip, port, bucket' if table in _PORT_STATUS_ROLLUPS else 'rowid'
+
+            deleted = 0
+            while True:
+                with self._transaction("cleanup_old_data") as conn:
+                    count = conn.execute(f"""
+                        DELETE FROM {table} WHERE ({key}) IN (
+                            SELECT {key} FROM {table}
+                            WHERE {column} < ? {extra}
+                            ORDER BY {column}
+                            LIMIT ?
+                        )
+                    """, (cutoff, batch_size)).rowcount
+                result['batches'] += 1
+                deleted += count
+                if count < batch_size:
+                    break
+                if pause:
+                    time.sleep(pause)
+            result[result_key] = deleted
+
+        result['pages_freed'] = self.incremental_vacuum()
+
+        elapsed = time.monotonic() - started
+        total = sum(result[key] for _, key, _ in _RETENTION_TABLES.values())
+        result['elapsed_seconds'] = round(elapsed, 3)
+        result['rows_per_second'] = round(total / elapsed) if elapsed > 0 else total
+        return result
+
+    def incremental_vacuum(self, max_pages: int = 0) -> int:
+        """Release free pages back to the filesystem.
+
+        Only effective when the database uses auto_vacuum=INCREMENTAL, which
+        is the default for databases created by this store; older files can
+        be converted with enable_incremental_vacuum().
+
+        Args:
+            max_pages: Upper bound on pages to release (0 = all)
+
+        Returns:
+            Number of pages released
+        """
         conn = self._get_connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # executescript steps the pragma to completion; execute() would
+        # release only a single page
+        if max_pages > 0:
+            conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)})")
+        else:
+            conn.executescript("PRAGMA incremental_vacuum")
+        after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return before - after
 
-        stats = {}
+    def enable_incremental_vacuum(self) -> bool:
+        """Switch an existing database to incremental auto-vacuum.
 
-        # Task stats
-        row = conn.execute("SELECT COUNT(*) FROM sms_tasks").fetchone()
-        stats['total_tasks'] = row[0]
+        Requires a full VACUUM, which rewrites the file once.
+        Returns True if the database was converted.
+        """
+        conn = self._get_connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
 
-        row = conn.execute("SELECT COUNT(*) FROM task_reports").fetchone()
-        stats['total_reports'] = row[0]
+    def get_stats(self) -> dict[str, Any]:
+        """Get database statistics.
 
-        row = conn.execute("SELECT COUNT(*) FROM inbox_messages").fetchone()
-        stats['total_inbox'] = row[0]
+        Totals come from trigger-maintained counters and recent activity
+        from hourly buckets, so the cost does not grow with the database.
+        The 24h figures have hour granularity.
+        """
+        conn = self._get_connection()
 
-        row = conn.execute("SELECT COUNT(*) FROM port_status").fetchone()
-        stats['total_ports'] = row[0]
+        counters = {
+            row['name']: row['value']
+            for row in conn.execute("SELECT name, value FROM store_counters")
+        }
 
-        # Recent activity
-        row = conn.execute("""
-            SELECT COUNT(*) FROM sms_tasks 
-            WHERE submitted_at >= datetime('now', '-1 day')
-        """).fetchone()
-        stats['tasks_last_24h'] = row[0]
+        stats = {
+            'total_tasks': counters.get('sms_tasks', 0),
+            'total_reports': counters.get('task_reports', 0),
+            'total_inbox': counters.get('inbox_messages', 0),
+            'total_ports': counters.get('port_status', 0),
+        }
 
-        row = conn.execute("""
-            SELECT COUNT(*) FROM inbox_messages 
-            WHERE received_at >= datetime('now', '-1 day')
-        """).fetchone()
-        stats['inbox_last_24h'] = row[0]
+        # Recent activity
+        since_ts = int(datetime.now().timestamp()) - 24 * 3600
+        activity = self.get_hourly_activity(since_ts=since_ts)
+        stats['tasks_last_24h'] = sum(b['count'] for b in activity if b['kind'] == 'tasks')
+        stats['inbox_last_24h'] = sum(b['count'] for b in activity if b['kind'] == 'inbox')
 
         return stats
 
+    def get_hourly_activity(self, kind: str = None, since_ts: int = 0) -> list[dict[str, Any]]:
+        """Get hourly task/inbox activity buckets.
+
+        Args:
+            kind: 'tasks' or 'inbox' (default: both)
+            since_ts: Only include the hour containing this Unix time and later
+
+        Returns:
+            Buckets ordered by hour, each with kind, hour and count
+        """
+        conn = self._get_connection()
+        hour = since_ts - since_ts % 3600
+        if kind:
+            rows = conn.execute("""
+                SELECT kind, hour, count FROM activity_hourly
+                WHERE kind = ? AND hour >= ? AND count > 0
+                ORDER BY hour
+            """, (kind, hour)).fetchall()
+        else:
+            rows = conn.execute("""
+                SELECT kind, hour, count FROM activity_hourly
+                WHERE hour >= ? AND count > 0
+                ORDER BY hour, kind
+            """, (hour,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def check_counters(self, repair: bool = False) -> dict[str, tuple[int, int]]:
+        """Compare materialized counters against real row counts.
+
+        Args:
+            repair: Rebuild counters and activity buckets if any drift is found
+
+        Returns:
+            Mapping of counter name -> (stored, actual) for mismatches only
+        """
+        conn = self._get_connection()
+        stored = {
+            row['name']: row['value']
+            for row in conn.execute("SELECT name, value FROM store_counters")
+        }
+
+        mismatches = {}
+        for table in _COUNTED_TABLES:
+            actual = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            if stored.get(table) != actual:
+                mismatches[table] = (stored.get(table, 0), actual)
+
+        for kind, (table, column) in _ACTIVITY_BUCKETS.items():
+            actual_buckets = dict(conn.execute(f"""
+                SELECT CAST(strftime('%s', {column}) AS INTEGER) / 3600 * 3600, COUNT(*)
+                FROM {table} WHERE {column} IS NOT NULL GROUP BY 1
+            """).fetchall())
+            stored_buckets = dict(conn.execute("""
+                SELECT hour, count FROM activity_hourly WHERE kind = ? AND count != 0
+            """, (kind,)).fetchall())
+            if actual_buckets != stored_buckets:
+                mismatches[f'activity:{kind}'] = (
+                    sum(stored_buckets.values()), sum(actual_buckets.values())
+                )
+
+        if mismatches and repair:
+            with self._transaction("check_counters") as conn:
+                self._rebuild_counters(conn)
+
+        return mismatches
+
+    def table_columns(self, table: str) -> list[tuple[str, str]]:
+        """(name, declared type) for each column of an exportable table."""
+        if table not in _EXPORT_TABLES:
+            raise ValueError(
+                f"Unknown table '{table}'. Exportable tables: {', '.join(_EXPORT_TABLES)}"
+            )
+        rows = self._get_connection().execute(f"PRAGMA table_info({table})").fetchall()
+        return [(row['name'], row['type'].upper()) for row in rows]
+
+    def _select_rows(self, table: str, since: datetime | None, until: datetime | None,
+                     filters: dict[str, Any] | None) -> sqlite3.Cursor:
+        """Open a cursor over a table with time-range and equality filters."""
+        columns = {name for name, _ in self.table_columns(table)}
+        column = _EXPORT_TABLES[table]
+
+        clauses = []
+        params: list[Any] = []
+        for op, bound in (('>=', since), ('<', until)):
+            if bound is None:
+                continue
+            clauses.append(f"{column} {op} ?")
+            if column in _EPOCH_COLUMNS:
+                params.append(int(bound.timestamp()))
+            else:
+                params.append(bound.astimezone(UTC).strftime('%Y-%m-%d %H:%M:%S'))
+        for name, value in (filters or {}).items():
+            if name not in columns:
+                raise ValueError(f"Table '{table}' has no column '{name}'")
+            clauses.append(f"{name} = ?")
+            params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        return self._get_connection().execute(
+            f"SELECT * FROM {table} {where} ORDER BY {column}", params
+        )
+
+    def iter_rows(self, table: str, since: datetime = None, until: datetime = None,
+                  filters: dict[str, Any] = None,
+                  batch_size: int = 1000) -> Iterator[dict[str, Any]]:
+        """Stream rows from a table in timestamp order.
+
+        Rows are fetched batch_size at a time, so exports of any size use
+        bounded memory.
+
+        Args:
+            table: One of the exportable tables (see export_tables())
+            since: Only rows at or after this time
+            until: Only rows before this time
+            filters: Column equality filters, e.g. {'port': '1A'}
+            batch_size: Rows fetched from SQLite per round trip
+
+        Yields:
+            One dict per row
+        """
+        for names, rows in self._iter_fetches(table, since, until, filters, batch_size):
+            for row in rows:
+                yield dict(zip(names, row, strict=True))
+
+    def iter_column_batches(self, table: str, since: datetime = None,
+                            until: datetime = None, filters: dict[str, Any] = None,
+                            batch_size: int = 10000) -> Iterator[dict[str, list]]:
+        """Stream a table as column-oriented batches for columnar writers.
+
+        Takes the same arguments as iter_rows; each batch maps column names
+        to lists of up to batch_size values.
+        """
+        for names, rows in self._iter_fetches(table, since, until, filters, batch_size):
+            yield dict(zip(names, map(list, zip(*rows, strict=True)), strict=True))
+
+    def _iter_fetches(self, table: str, since: datetime | None, until: datetime | None,
+                      filters: dict[str, Any] | None,
+                      batch_size: int) -> Iterator[tuple[list[str], list[sqlite3.Row]]]:
+        cursor = self._select_rows(table, since, until, filters)
+        names = [column[0] for column in cursor.description]
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield names, rows
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def export_tables() -> list[str]:
+        """Names of the tables iter_rows can stream."""
+        return list(_EXPORT_TABLES)
+
     def close(self) -> None:
-        """Close database connections."""
-        if hasattr(self._local, 'connection'):
-            self._local.connection.close()
+        """Close the database connections of all threads."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for connection in connections:
+            connection.close()
+
+
+def _report_port(port: Any) -> str:
+    """Convert a report port like '1.01' to the '1A' style used in the inbox."""
+    return SMSMessage._format_port(str(port))
+
+
+def _report_code(reason: Any) -> int | None:
+    """Extract the numeric code from a '<code> <details>' report reason."""
+    head = str(reason).split(' ', 1)[0] if reason is not None else ''
+    try:
+        return int(head)
+    except ValueError:
+        return None
+
+
+def _delivery_rows_from_report(report: SMSTaskReport, device_ip: str = '') -> list[tuple]:
+    """Flatten a task report's sdr/fdr arrays into delivery result rows.
+
+    sdr entries are [index, number, port, ts]; fdr entries append the
+    progress reason and carrier reason as "<code> <details>" strings.
+    """
+    rows = []
+    for entry in report.sdr:
+        if len(entry) >= 4:
+            rows.append((device_ip, report.tid, _report_port(entry[2]), str(entry[1]),
+                         'sent', 0, int(entry[3])))
+    for entry in report.fdr:
+        if len(entry) >= 4:
+            code = _report_code(entry[4]) if len(entry) >= 5 else None
+            rows.append((device_ip, report.tid, _report_port(entry[2]), str(entry[1]),
+                         'failed', code, int(entry[3])))
+    return rows
 
 
 # Global store instance (will be initialized by config)
 _store: EjoinStore | None = None
+_store_path: Path | None = None
 
 
 def get_store() -> EjoinStore:
@@ -469,7 +1292,20 @@ def get_store() -> EjoinStore:
 
 
 def initialize_store(db_path: Path) -> EjoinStore:
-    """Initialize the global store instance."""
-    global _store
-    _store = EjoinStore(db_path)
+    """Initialize the global store instance.
+
+    Relative paths are resolved against the current directory now, so a
+    long-running process keeps using the same file after changing
+    directory. An already open store for the same database file is
+    reused; a store for another file is closed when replaced.
+    """
+    global _store, _store_path
+    path = Path(db_path).expanduser().absolute()
+    if _store is not None and _store_path == path:
+        return _store
+    previous = _store
+    _store = EjoinStore(path)
+    _store_path = path
+    if previous is not None:
+        previous.close()
     return _store
@@ -5,16 +5,25 @@ These utilities help export table data to CSV and JSON formats.
 Like ripples in still water, when there is no pebble tossed...
 """
 
-import csv
-import json
+import heapq
 import re
+from collections.abc import Iterable, Iterator, Sequence
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Callable, Optional
+from datetime import datetime, timedelta
+from typing import Any, Callable
 
 from rich.console import Console
 from rich.table import Table
 
+from .export_stream import (
+    open_export,
+    peek_rows,
+    stream_export,
+    write_csv,
+    write_json_array,
+    write_ndjson,
+)
+
 console = Console()
 
 
@@ -34,9 +43,9 @@ class ColumnSpec:
     key: str
     is_timestamp: bool = False
     is_port: bool = False
-    style: Optional[str] = None
-    display_transform: Optional[Callable[[Any], str]] = None
-    export_transform: Optional[Callable[[Any], Any]] = None
+    style: str | None = None
+    display_transform: Callable[[Any], str] | None = None
+    export_transform: Callable[[Any], Any] | None = None
 
 
 @dataclass
@@ -49,7 +58,7 @@ class SortTerm:
     ascending: bool
 
 
-def parse_sort_option(spec: Optional[str], columns: list[ColumnSpec]) -> list[SortTerm]:
+def parse_sort_option(spec: str | None, columns: list[ColumnSpec]) -> list[SortTerm]:
     """Parse a sort specification into sort terms.
     
     Args:
@@ -128,12 +137,33 @@ def default_sort_terms(columns: list[ColumnSpec]) -> list[SortTerm]:
         return []  # No columns to sort by
 
 
-def coerce_timestamp(value: Any) -> Optional[datetime]:
+_TIMESTAMP_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%m-%d %H:%M',
+    '%Y-%m-%d',
+)
+
+_PORT_PATTERN = re.compile(r'(\d+)([ABCD])')
+_NUMBER_PATTERN = re.compile(r'(\d+)')
+_SLOT_ORDER = {'A': 1, 'B': 2, 'C': 3, 'D': 4}
+
+
+def coerce_timestamp(value: Any) -> datetime | None:
     """Coerce a value to a datetime for sorting.
     
     Handles ISO format strings, epoch seconds, and other common formats.
     Returns None if the value cannot be parsed as a timestamp.
     """
+    return _coerce_timestamp(value, list(_TIMESTAMP_FORMATS))
+
+
+def _coerce_timestamp(value: Any, formats: list[str]) -> datetime | None:
+    """coerce_timestamp with a mutable format list.
+
+    The first strptime format that matches is moved to the front, so a
+    column whose values share one format stops paying for failed attempts.
+    """
     if isinstance(value, datetime):
         return value
         
@@ -158,19 +188,15 @@ def coerce_timestamp(value: Any) -> Optional[datetime]:
     except (ValueError, TypeError):
         pass
         
-    # Try common date formats
-    formats = [
-        '%Y-%m-%d %H:%M:%S',
-        '%Y-%m-%d %H:%M',
-        '%m-%d %H:%M',
-        '%Y-%m-%d',
-    ]
-    
-    for fmt in formats:
+    # Try common date formats (a value can only match one of them)
+    for index, fmt in enumerate(formats):
         try:
-            return datetime.strptime(str_val, fmt)
+            parsed = datetime.strptime(str_val, fmt)
         except (ValueError, TypeError):
             continue
+        if index:
+            formats.insert(0, formats.pop(index))
+        return parsed
             
     return None
 
@@ -198,21 +224,15 @@ def coerce_port(value: Any) -> tuple[int, int, str]:
     
     # Look for port patterns like 1A, 2B, 10D, etc.
     # Also handles ranges like "1A-1D" by taking the first port
-    port_pattern = r'(\d+)([ABCD])'
-    match = re.search(port_pattern, str_val)
+    match = _PORT_PATTERN.search(str_val)
     
     if match:
         board_num = int(match.group(1))
-        slot_letter = match.group(2)
-        
-        # Map slot letters to order
-        slot_map = {'A': 1, 'B': 2, 'C': 3, 'D': 4}
-        slot_order = slot_map.get(slot_letter, 999)  # Unknown letters sort last
-        
+        slot_order = _SLOT_ORDER[match.group(2)]
         return (board_num, slot_order, str_val)
     
     # Try to extract just numbers
-    num_match = re.search(r'(\d+)', str_val)
+    num_match = _NUMBER_PATTERN.search(str_val)
     if num_match:
         board_num = int(num_match.group(1))
         return (board_num, 0, str_val)  # Numeric-only ports sort before lettered ones
@@ -246,51 +266,129 @@ def coerce_generic(value: Any) -> tuple[int, Any]:
     return (0, str_val)
 
 
-def sort_rows(rows: list[dict], columns: list[ColumnSpec], terms: list[SortTerm]) -> list[dict]:
+# Sorts after every real timestamp key, like (1, datetime.min) after (0, ts)
+_MISSING_TIMESTAMP = float('inf')
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _timestamp_key(value: datetime) -> int:
+    """Microseconds since 0001-01-01 as an int, which sorts faster than datetimes.
+
+    Aware values are compared by their UTC instant, as datetime does.
+    """
+    if value.tzinfo is not None and value.utcoffset() is not None:
+        value = (value - value.utcoffset()).replace(tzinfo=None)
+    return (value - datetime.min) // _MICROSECOND
+
+
+def _column_sort_key(col_spec: ColumnSpec) -> Callable[[Any], Any]:
+    """Build the key function for one column.
+
+    Port and generic columns repeat values heavily (ports, types, aliases),
+    so each distinct string is coerced once per sort. Timestamps are mostly
+    unique; their column instead remembers which format matched.
+    """
+    if col_spec.is_timestamp:
+        formats = list(_TIMESTAMP_FORMATS)
+
+        def timestamp_key(value: Any) -> Any:
+            coerced = _coerce_timestamp(value, formats)
+            # For timestamps, None sorts last (oldest)
+            return _MISSING_TIMESTAMP if coerced is None else _timestamp_key(coerced)
+
+        return timestamp_key
+
+    if col_spec.is_port:
+        coerce = coerce_port
+    else:
+        coerce = coerce_generic
+
+    memo: dict[str, Any] = {}
+
+    def key(value: Any) -> Any:
+        if type(value) is not str:
+            return coerce(value)
+        try:
+            return memo[value]
+        except KeyError:
+            result = memo[value] = coerce(value)
+            return result
+
+    return key
+
+
+def _sorted_indices(
+    key_columns: list[list[Any]],
+    terms: list[SortTerm],
+    limit: int | None = None,
+) -> list[int]:
+    """Row indices ordered by the precomputed key columns.
+
+    With several terms each key is replaced by its rank among the column's
+    distinct keys (inverted for descending terms), and the ranks are packed
+    into one integer per row, so the final sort compares plain ints. With a
+    limit smaller than the row count only the first rows are selected, using
+    a bounded heap instead of a full sort.
+    """
+    count = len(key_columns[0])
+    partial = limit is not None and limit < count
+
+    if len(key_columns) == 1:
+        keys = key_columns[0]
+        if not partial:
+            return sorted(range(count), key=keys.__getitem__, reverse=not terms[0].ascending)
+        # nsmallest/nlargest match sorted(...)[:limit], ties included
+        select = heapq.nsmallest if terms[0].ascending else heapq.nlargest
+        return select(limit, range(count), key=keys.__getitem__)
+
+    composite = [0] * count
+    for keys, term in zip(key_columns, terms, strict=True):
+        distinct = sorted(set(keys), reverse=not term.ascending)
+        rank = {key: index for index, key in enumerate(distinct)}
+        width = len(distinct)
+        composite = [packed * width + rank[key] for packed, key in zip(composite, keys, strict=True)]
+    if partial:
+        return heapq.nsmallest(limit, range(count), key=composite.__getitem__)
+    return sorted(range(count), key=composite.__getitem__)
+
+
+def sort_rows(
+    rows: list[dict],
+    columns: list[ColumnSpec],
+    terms: list[SortTerm],
+    limit: int | None = None,
+) -> list[dict]:
     """Sort table rows by multiple criteria.
     
-    Uses stable sorting to preserve relative order of equal elements.
-    Sorts from the last term to the first to achieve the correct precedence,
-    like laying down tracks from the end back to the beginning.
+    Each row's key for every term is computed once up front and the rows
+    are sorted once on a composite key, with descending terms handled by
+    inverting their ranks. Like a stable sort laid down from the last term
+    back to the first, equal rows keep their relative order.
     
     Args:
         rows: List of row dictionaries
         columns: Column specifications
         terms: Sort terms in order of precedence
+        limit: Return only the first N rows of the ordering (None for all)
         
     Returns:
         New list of sorted rows (original list is unchanged)
     """
+    if limit is not None and limit < 0:
+        raise ValueError(f"limit must be >= 0: {limit}")
+    terms = [term for term in terms if term.col_index < len(columns)]
     if not rows or not terms:
-        return rows.copy()
+        return rows[:limit]
     
-    # Work on a copy to avoid modifying the original
-    sorted_rows = rows.copy()
-    
-    # Apply sorts in reverse order for correct precedence
-    # (Python's sort is stable, so later sorts take precedence)
-    for term in reversed(terms):
-        if term.col_index >= len(columns):
-            continue
-            
+    # Decorate: one list of precomputed keys per term
+    key_columns = []
+    for term in terms:
         col_spec = columns[term.col_index]
-        
-        def sort_key(row: dict) -> Any:
-            value = row.get(col_spec.key)
-            
-            # Choose coercion based on column characteristics
-            if col_spec.is_timestamp:
-                coerced = coerce_timestamp(value)
-                # For timestamps, None sorts last (oldest)
-                return (1, datetime.min) if coerced is None else (0, coerced)
-            elif col_spec.is_port:
-                return coerce_port(value)
-            else:
-                return coerce_generic(value)
-        
-        sorted_rows.sort(key=sort_key, reverse=not term.ascending)
-    
-    return sorted_rows
+        key = _column_sort_key(col_spec)
+        key_columns.append([key(row.get(col_spec.key)) for row in rows])
+
+    order = _sorted_indices(key_columns, terms, limit)
+    return [rows[index] for index in order]
 
 
 # ============================================================================= 
@@ -402,6 +500,11 @@ def get_profiles_columns() -> list[ColumnSpec]:
             key="Username", 
             style="yellow"
         ),
+        ColumnSpec(
+            title="Tags",
+            key="Tags",
+            style="white"
+        ),
         ColumnSpec(
             title="Status", 
             key="Status", 
@@ -496,30 +599,271 @@ def get_inbox_delivery_reports_columns() -> list[ColumnSpec]:
     ]
 
 
+def get_report_ports_columns() -> list[ColumnSpec]:
+    """Column specs for per-port delivery analytics tables."""
+    return [
+        ColumnSpec(
+            title="Device Alias",
+            key="Device Alias",
+            style="magenta"
+        ),
+        ColumnSpec(
+            title="Port",
+            key="Port",
+            is_port=True,
+            style="green"
+        ),
+        ColumnSpec(
+            title="Sent",
+            key="Sent",
+            style="cyan"
+        ),
+        ColumnSpec(
+            title="Failed",
+            key="Failed",
+            style="red"
+        ),
+        ColumnSpec(
+            title="Send %",
+            key="Send %",
+            style="yellow"
+        ),
+        ColumnSpec(
+            title="Delivered",
+            key="Delivered",
+            style="cyan"
+        ),
+        ColumnSpec(
+            title="Undelivered",
+            key="Undelivered",
+            style="red"
+        ),
+        ColumnSpec(
+            title="Delivery %",
+            key="Delivery %",
+            style="yellow"
+        ),
+    ]
+
+
+def get_report_health_columns() -> list[ColumnSpec]:
+    """Column specs for port stability (status history) tables."""
+    return [
+        ColumnSpec(
+            title="Device Alias",
+            key="Device Alias",
+            style="magenta"
+        ),
+        ColumnSpec(
+            title="Port",
+            key="Port",
+            is_port=True,
+            style="green"
+        ),
+        ColumnSpec(
+            title="Status",
+            key="Status",
+            style="blue"
+        ),
+        ColumnSpec(
+            title="Operator",
+            key="Operator",
+            style="yellow"
+        ),
+        ColumnSpec(
+            title="Changes",
+            key="Changes",
+            style="cyan"
+        ),
+        ColumnSpec(
+            title="Failures",
+            key="Failures",
+            style="red"
+        ),
+        ColumnSpec(
+            title="Last Change",
+            key="Last Change",
+            is_timestamp=True,
+            style="magenta"
+        ),
+    ]
+
+
 # ============================================================================= 
 # Centralized Table Rendering and Export
 # One function to rule them all, like a conductor leading the orchestra
 # =============================================================================
 
+# Row count above which tables are paged or written as plain lines
+LARGE_TABLE_ROWS = 500
+
+# Rows inspected to size columns of large tables
+_WIDTH_SAMPLE_ROWS = 200
+
+# Narrowest a column is squeezed to when fitting the terminal width
+_MIN_COLUMN_WIDTH = 4
+
+_COLUMN_GAP = "  "
+
+
+def _display_cells(row: dict[str, Any], columns: list[ColumnSpec]) -> list[str]:
+    """Display strings for one row, applying each column's transform."""
+    cells = []
+    for col_spec in columns:
+        raw_value = row.get(col_spec.key, '')
+        if col_spec.display_transform:
+            display_value = col_spec.display_transform(raw_value)
+        else:
+            display_value = raw_value
+        cells.append(str(display_value) if display_value is not None else '')
+    return cells
+
+
+def _build_table(
+    title: str | None,
+    columns: list[ColumnSpec],
+    rows: list[dict[str, Any]],
+    widths: list[int] | None = None,
+) -> Table:
+    """A Rich table for rows, auto-sized unless fixed widths are given."""
+    table = Table(title=title)
+    for index, col_spec in enumerate(columns):
+        if widths is None:
+            table.add_column(col_spec.title, style=col_spec.style)
+        else:
+            table.add_column(
+                col_spec.title,
+                style=col_spec.style,
+                width=widths[index],
+                no_wrap=True,
+                overflow="ellipsis",
+            )
+    for row in rows:
+        table.add_row(*_display_cells(row, columns))
+    return table
+
+
+def _sample_widths(columns: list[ColumnSpec], rows: list[dict[str, Any]], max_width: int) -> list[int]:
+    """Column widths from an evenly spread sample of rows.
+
+    Only the sampled rows are formatted, so sizing costs the same however
+    many rows there are. Widths are squeezed, widest first, until the row
+    fits in max_width.
+    """
+    step = max(1, len(rows) // _WIDTH_SAMPLE_ROWS)
+    widths = [len(col_spec.title) for col_spec in columns]
+    for row in rows[::step]:
+        for index, cell in enumerate(_display_cells(row, columns)):
+            if len(cell) > widths[index]:
+                widths[index] = len(cell)
+
+    available = max_width - len(_COLUMN_GAP) * (len(columns) - 1)
+    while sum(widths) > available:
+        widest = max(range(len(widths)), key=widths.__getitem__)
+        if widths[widest] <= _MIN_COLUMN_WIDTH:
+            break
+        widths[widest] -= 1
+    return widths
+
+
+def _fit(text: str, width: int) -> str:
+    """Pad or cut text to exactly width characters."""
+    if len(text) > width:
+        return text[:width - 1] + "…"
+    return text.ljust(width)
+
+
+def _write_fixed_width(
+    display_console: Console,
+    title: str | None,
+    columns: list[ColumnSpec],
+    rows: list[dict[str, Any]],
+    widths: list[int],
+) -> None:
+    """Write rows as plain aligned lines, one at a time.
+
+    Skips Rich layout entirely, so the first line appears immediately and
+    the cost per row is constant. Used when output is not a terminal.
+    """
+    out = display_console.file
+    if title:
+        out.write(f"{title}\n")
+    out.write(_COLUMN_GAP.join(_fit(col.title, w) for col, w in zip(columns, widths, strict=True)).rstrip() + "\n")
+    out.write(_COLUMN_GAP.join("-" * w for w in widths) + "\n")
+    for row in rows:
+        cells = _display_cells(row, columns)
+        out.write(_COLUMN_GAP.join(_fit(cell, w) for cell, w in zip(cells, widths, strict=True)).rstrip() + "\n")
+    out.flush()
+
+
+def _page_table(
+    display_console: Console,
+    title: str | None,
+    columns: list[ColumnSpec],
+    rows: list[dict[str, Any]],
+    widths: list[int],
+) -> None:
+    """Show rows a screen at a time, formatting each page only when reached."""
+    # Leave room for the title, header, borders and prompt
+    page_size = max(display_console.height - 7, 5)
+    total = len(rows)
+    for start in range(0, total, page_size):
+        page = rows[start:start + page_size]
+        display_console.print(_build_table(title if start == 0 else None, columns, page, widths))
+
+        end = start + len(page)
+        if end >= total:
+            break
+        try:
+            answer = display_console.input(
+                f"[dim]-- rows 1-{end} of {total}: Enter for more, q to quit --[/dim] "
+            )
+        except (EOFError, KeyboardInterrupt):
+            break
+        if answer.strip().lower().startswith("q"):
+            break
+
+
+def _render_large_table(
+    display_console: Console,
+    title: str | None,
+    columns: list[ColumnSpec],
+    rows: list[dict[str, Any]],
+) -> None:
+    """Render a large result set without laying out every row at once.
+
+    Interactive terminals get a pager; anything else (pipes, files) gets
+    fixed-width lines. Column widths come from a sample of rows.
+    """
+    widths = _sample_widths(columns, rows, display_console.width)
+    if display_console.is_terminal and display_console.is_interactive:
+        _page_table(display_console, title, columns, rows, widths)
+    else:
+        _write_fixed_width(display_console, title, columns, rows, widths)
+
+
 def render_and_export_table(
     title: str,
     columns: list[ColumnSpec],
     rows: list[dict[str, Any]],
-    profile_name: Optional[str],
+    profile_name: str | None,
     command_name: str,
-    sort_option: Optional[str],
-    csv_filename: Optional[str] = None,
-    json_filename: Optional[str] = None,
+    sort_option: str | None,
+    csv_filename: str | None = None,
+    json_filename: str | None = None,
     export_csv: bool = False,
     export_json: bool = False,
-    table_console: Optional[Console] = None,
+    table_console: Console | None = None,
+    limit: int | None = None,
 ) -> bool:
     """Render a sorted table and handle exports in one unified flow.
     
     This function orchestrates the complete table workflow:
     1. Parse sort options and apply sorting
     2. Export to CSV/JSON if requested
-    3. Render Rich table unless in console-only mode
+    3. Render Rich table unless in console-only mode; results over
+       LARGE_TABLE_ROWS are paged on a terminal or written as fixed-width
+       lines otherwise
     
     Args:
         title: Table title for display
@@ -533,6 +877,8 @@ def render_and_export_table(
         export_csv: Whether to export CSV to stdout
         export_json: Whether to export JSON to stdout
         table_console: Console for table output (uses module console if None)
+        limit: Show and export only the first N sorted rows (None or 0 for all);
+            a note reports how many rows were shown
         
     Returns:
         True if console-only export mode (suppresses other output)
@@ -555,9 +901,13 @@ def render_and_export_table(
             )
         return False
     
-    # Step 1: Parse sort options and sort the data
+    # Step 1: Parse sort options and sort the data, selecting only the
+    # top rows when a limit is given
+    total_rows = len(rows)
+    if not limit or limit >= total_rows:
+        limit = None
     sort_terms = parse_sort_option(sort_option, columns)
-    sorted_rows = sort_rows(rows, columns, sort_terms)
+    sorted_rows = sort_rows(rows, columns, sort_terms, limit)
     
     # Step 2: Handle exports (this might trigger console-only mode)
     console_only_mode = False
@@ -576,39 +926,72 @@ def render_and_export_table(
     if console_only_mode:
         return True
     
-    # Step 4: Build and display Rich table
+    # Step 4: Build and display the table; large results are paged or
+    # written as plain fixed-width lines instead of one Rich layout
     display_console = table_console or console
-    table = Table(title=title)
-    
-    # Add columns with their styling
-    for col_spec in columns:
-        table.add_column(
-            col_spec.title,
-            style=col_spec.style,
-            width=None  # Let Rich auto-size
-        )
-    
-    # Add rows with display transforms
-    for row in sorted_rows:
-        table_row = []
-        for col_spec in columns:
-            raw_value = row.get(col_spec.key, '')
-            
-            # Apply display transform if present
-            if col_spec.display_transform:
-                display_value = col_spec.display_transform(raw_value)
-            else:
-                display_value = str(raw_value) if raw_value is not None else ''
-                
-            table_row.append(display_value)
-        
-        table.add_row(*table_row)
-    
-    # Print the table
-    display_console.print(table)
+    if len(sorted_rows) > LARGE_TABLE_ROWS:
+        _render_large_table(display_console, title, columns, sorted_rows)
+    else:
+        display_console.print(_build_table(title, columns, sorted_rows))
+    if limit is not None:
+        display_console.print(f"[dim]Showing {len(sorted_rows)} of {total_rows} rows[/dim]")
     return False
 
 
+def stream_table_export(
+    columns: list[ColumnSpec],
+    items: Sequence[Any],
+    to_row: Callable[[Any], dict[str, Any]],
+    sort_option: str | None,
+    export_csv: bool = False,
+    export_json: bool = False,
+    limit: int | None = None,
+) -> bool:
+    """Export items to stdout as CSV and/or JSON, building rows as they are written.
+
+    Rows come out in the same order, and with the same limit, as
+    render_and_export_table, but only the sort keys are held in memory;
+    each row is rebuilt from its item when it is written.
+
+    Args:
+        columns: Column specifications (sort keys and their order)
+        items: Source objects, e.g. inbox messages
+        to_row: Builds one export row from an item
+        sort_option: Sort specification string (e.g. "2,1d,4a")
+        export_csv: Whether to export CSV to stdout
+        export_json: Whether to export JSON to stdout
+        limit: Export only the first N sorted rows (None or 0 for all)
+
+    Returns:
+        True if console-only export mode (something was exported)
+    """
+    import sys
+
+    if not (export_csv or export_json) or not items:
+        return False
+
+    if not limit or limit >= len(items):
+        limit = None
+    terms = [term for term in parse_sort_option(sort_option, columns) if term.col_index < len(columns)]
+    if terms:
+        specs = [columns[term.col_index] for term in terms]
+        keys = [_column_sort_key(spec) for spec in specs]
+        key_columns = [[] for _ in terms]
+        for item in items:
+            row = to_row(item)
+            for key_column, spec, key in zip(key_columns, specs, keys, strict=True):
+                key_column.append(key(row.get(spec.key)))
+        order = _sorted_indices(key_columns, terms, limit)
+    else:
+        order = range(len(items))[:limit]
+
+    if export_csv:
+        write_csv((to_row(items[index]) for index in order), sys.stdout)
+    if export_json:
+        write_json_array((to_row(items[index]) for index in order), sys.stdout, indent=2)
+    return True
+
+
 def generate_export_filename(
     profile_name: str | None,
     command_name: str,
@@ -641,103 +1024,102 @@ def generate_export_filename(
 
 
 def export_table_data_to_csv(
-    data: list[dict[str, Any]],
+    data: Iterable[dict[str, Any]],
     filename: str,
     fieldnames: list[str] | None = None
 ) -> None:
     """
     Export table data to CSV format.
     
+    Rows are streamed to the file, so data may be any iterable. A '.gz' or
+    '.zst' suffix compresses the output on the fly.
+
     Args:
-        data: List of dictionaries representing table rows
+        data: Iterable of dictionaries representing table rows
         filename: Output filename
         fieldnames: Column names (optional, will be inferred from first row if not provided)
     """
-    if not data:
+    first, rows = peek_rows(data)
+    if first is None:
         console.print("[yellow]No data to export to CSV[/yellow]")
         return
 
-    # Infer fieldnames from first row if not provided
-    if not fieldnames:
-        fieldnames = list(data[0].keys())
-
     try:
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
-
+        stream_export(rows, filename, "csv", fieldnames=fieldnames)
         console.print(f"[green]✓ CSV export written to: {filename}[/green]")
     except Exception as e:
         console.print(f"[red]Failed to write CSV export: {e}[/red]")
 
 
 def export_table_data_to_json(
-    data: list[dict[str, Any]],
+    data: Iterable[dict[str, Any]],
     filename: str,
     indent: int = 2
 ) -> None:
     """
     Export table data to JSON format.
     
+    Rows are streamed to the file as a JSON array, or as one object per line
+    when the filename ends in '.ndjson' or '.jsonl'. A '.gz' or '.zst'
+    suffix compresses the output on the fly.
+
     Args:
-        data: List of dictionaries representing table rows
+        data: Iterable of dictionaries representing table rows
         filename: Output filename
         indent: JSON indentation level
     """
-    if not data:
+    first, rows = peek_rows(data)
+    if first is None:
         console.print("[yellow]No data to export to JSON[/yellow]")
         return
 
-    try:
-        with open(filename, 'w', encoding='utf-8') as jsonfile:
-            json.dump(data, jsonfile, indent=indent, ensure_ascii=False, default=str)
+    name = filename.lower()
+    for suffix in ('.gz', '.gzip', '.zst', '.zstd'):
+        name = name.removesuffix(suffix)
+    line_delimited = name.endswith(('.ndjson', '.jsonl'))
 
+    try:
+        with open_export(filename) as stream:
+            if line_delimited:
+                write_ndjson(rows, stream)
+            else:
+                write_json_array(rows, stream, indent=indent)
         console.print(f"[green]✓ JSON export written to: {filename}[/green]")
     except Exception as e:
         console.print(f"[red]Failed to write JSON export: {e}[/red]")
 
 
 def export_table_data_to_csv_console(
-    data: list[dict[str, Any]],
+    data: Iterable[dict[str, Any]],
     fieldnames: list[str] | None = None
 ) -> None:
     """
     Export table data to CSV format directly to console (stdout) for pipeline integration.
     
     Args:
-        data: List of dictionaries representing table rows
+        data: Iterable of dictionaries representing table rows
         fieldnames: Column names (optional, will be inferred from first row if not provided)
     """
-    if not data:
-        return
-
-    # Infer fieldnames from first row if not provided
-    if not fieldnames:
-        fieldnames = list(data[0].keys())
-
     import sys
-    writer = csv.DictWriter(sys.stdout, fieldnames=fieldnames)
-    writer.writeheader()
-    writer.writerows(data)
+    write_csv(data, sys.stdout, fieldnames)
 
 
 def export_table_data_to_json_console(
-    data: list[dict[str, Any]],
+    data: Iterable[dict[str, Any]],
     indent: int = 2
 ) -> None:
     """
     Export table data to JSON format directly to console (stdout) for pipeline integration.
     
     Args:
-        data: List of dictionaries representing table rows
+        data: Iterable of dictionaries representing table rows
         indent: JSON indentation level
     """
-    if not data:
-        return
-
     import sys
-    json.dump(data, sys.stdout, indent=indent, ensure_ascii=False, default=str)
+    first, rows = peek_rows(data)
+    if first is None:
+        return
+    write_json_array(rows, sys.stdout, indent=indent)
 
 
 def handle_table_export(
@@ -856,11 +1238,49 @@ def profiles_to_export_data(profiles_data: list[dict[str, Any]]) -> list[dict[st
             'Device Alias': str(profile.get('device_alias', '')),
             'Host:Port': str(profile.get('host_port', '')),
             'Username': str(profile.get('username', '')),
+            'Tags': ', '.join(profile.get('tags') or []),
             'Status': str(profile.get('status', ''))
         })
     return export_data
 
 
+def port_stats_to_export_data(stats: list[dict[str, Any]], device_alias: str = "") -> list[dict[str, str]]:
+    """Convert per-port delivery stats to export format."""
+    def percent(rate: float | None) -> str:
+        return f"{rate * 100:.1f}" if rate is not None else 'N/A'
+
+    export_data = []
+    for row in stats:
+        export_data.append({
+            'Device Alias': device_alias,
+            'Port': str(row.get('port', '')),
+            'Sent': str(row.get('sent', 0)),
+            'Failed': str(row.get('failed', 0)),
+            'Send %': percent(row.get('send_rate')),
+            'Delivered': str(row.get('delivered', 0)),
+            'Undelivered': str(row.get('undelivered', 0)),
+            'Delivery %': percent(row.get('delivery_rate')),
+        })
+    return export_data
+
+
+def port_health_to_export_data(health: list[dict[str, Any]], device_alias: str = "") -> list[dict[str, str]]:
+    """Convert port stability summaries to export format."""
+    export_data = []
+    for row in health:
+        last_change = row.get('last_change')
+        export_data.append({
+            'Device Alias': device_alias,
+            'Port': str(row.get('port', '')),
+            'Status': str(row.get('status_text') or 'Unknown'),
+            'Operator': str(row.get('operator') or ''),
+            'Changes': str(row.get('changes', 0)),
+            'Failures': str(row.get('failures', 0)),
+            'Last Change': datetime.fromtimestamp(last_change).isoformat() if last_change else '',
+        })
+    return export_data
+
+
 def messages_to_export_data(messages: list[Any], message_type: str = 'standard', device_alias: str = "") -> list[dict[str, str]]:
     """
     Convert message objects to export format.
@@ -870,33 +1290,44 @@ def messages_to_export_data(messages: list[Any], message_type: str = 'standard',
         message_type: Type of messages ('standard', 'delivery_reports', 'search', 'stop')
         device_alias: Device alias to include in export data
     """
-    export_data = []
+    return list(iter_messages_export_data(messages, message_type, device_alias))
+
 
+def iter_messages_export_data(messages: Iterable[Any], message_type: str = 'standard', device_alias: str = "") -> Iterator[dict[str, str]]:
+    """
+    Yield export rows for messages one at a time.
+
+    Streaming counterpart of messages_to_export_data for feeding the
+    export writers without building the full row list.
+    """
     for msg in messages:
-        base_data = {
-            'ID': str(msg.id),
-            'Device Alias': device_alias,
-            'Type': msg.message_type.value if hasattr(msg, 'message_type') else 'unknown',
-            'Port': str(msg.port),
-            'From': str(msg.sender),
-            'Time': msg.timestamp.isoformat() if hasattr(msg.timestamp, 'isoformat') else str(msg.timestamp),
-        }
-
-        if message_type == 'delivery_reports':
-            # Special format for delivery reports
-            base_data.update({
-                'To': str(msg.delivery_phone_number or msg.recipient or 'N/A'),
-                'Status': str(msg.delivery_status_code) if msg.delivery_status_code is not None else 'N/A'
-            })
+        yield message_export_row(msg, message_type, device_alias)
+
+
+def message_export_row(msg: Any, message_type: str = 'standard', device_alias: str = "") -> dict[str, str]:
+    """Export row for a single message."""
+    base_data = {
+        'ID': str(msg.id),
+        'Device Alias': device_alias,
+        'Type': msg.message_type.value if hasattr(msg, 'message_type') else 'unknown',
+        'Port': str(msg.port),
+        'From': str(msg.sender),
+        'Time': msg.timestamp.isoformat() if hasattr(msg.timestamp, 'isoformat') else str(msg.timestamp),
+    }
+
+    if message_type == 'delivery_reports':
+        # Special format for delivery reports
+        base_data.update({
+            'To': str(msg.delivery_phone_number or msg.recipient or 'N/A'),
+            'Status': str(msg.delivery_status_code) if msg.delivery_status_code is not None else 'N/A'
+        })
+    else:
+        # Standard format
+        if hasattr(msg, 'is_delivery_report') and msg.is_delivery_report and msg.delivery_status_code is not None:
+            content = f"Status: {msg.delivery_status_code} → {msg.delivery_phone_number or 'N/A'}"
         else:
-            # Standard format
-            if hasattr(msg, 'is_delivery_report') and msg.is_delivery_report and msg.delivery_status_code is not None:
-                content = f"Status: {msg.delivery_status_code} → {msg.delivery_phone_number or 'N/A'}"
-            else:
-                content = str(msg.content)
-
-            base_data['Content'] = content
+            content = str(msg.content)
 
-        export_data.append(base_data)
+        base_data['Content'] = content
 
-    return export_data
+    return base_data
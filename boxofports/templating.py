@@ -1,10 +1,16 @@
 """Jinja2 templating system for SMS message templates."""
 
+import time
 from datetime import UTC, datetime
 from typing import Any
 
 import jinja2
 
+from . import metrics
+
+# Compiled templates kept per engine; SMS templates are few and short
+_COMPILED_CACHE_SIZE = 256
+
 
 class SMSTemplateEngine:
     """Template engine for SMS messages with built-in variables and filters."""
@@ -16,6 +22,7 @@ class SMSTemplateEngine:
             trim_blocks=True,
             lstrip_blocks=True,
         )
+        self._compiled: dict[str, jinja2.Template] = {}
 
         # Register custom filters
         self.env.filters.update({
@@ -34,6 +41,15 @@ class SMSTemplateEngine:
             'format_time': self._format_time,
         })
 
+    def _compile(self, template_str: str) -> jinja2.Template:
+        """Compile a template once and reuse it for later renders."""
+        template = self._compiled.get(template_str)
+        if template is None:
+            if len(self._compiled) >= _COMPILED_CACHE_SIZE:
+                self._compiled.clear()
+            template = self._compiled[template_str] = self.env.from_string(template_str)
+        return template
+
     def render(self, template_str: str, **variables) -> str:
         """
         Render a template with the given variables.
@@ -53,11 +69,18 @@ class SMSTemplateEngine:
         Raises:
             jinja2.TemplateError: If template rendering fails
         """
+        instrumented = metrics.active()
+        if instrumented:
+            started = time.perf_counter()
+            cached = template_str in self._compiled
         try:
-            template = self.env.from_string(template_str)
+            template = self._compile(template_str)
             return template.render(**variables)
         except jinja2.TemplateError as e:
             raise ValueError(f"Template rendering error: {e}") from e
+        finally:
+            if instrumented:
+                metrics.emit("template", seconds=time.perf_counter() - started, cached=cached)
 
     def render_for_port(self, template_str: str, port: str, idx: int = 0, profile_vars: dict | None = None, **variables) -> str:
         """
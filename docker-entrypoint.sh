@@ -6,6 +6,10 @@ export BOXOFPORTS_DATA_DIR=${BOXOFPORTS_DATA_DIR:-/app/data}
 export BOXOFPORTS_CONFIG_DIR=${BOXOFPORTS_CONFIG_DIR:-/app/config}
 export BOXOFPORTS_LOG_LEVEL=${BOXOFPORTS_LOG_LEVEL:-INFO}
 
+# Socket of the resident daemon (`boxofports daemon start --foreground`).
+# While it is up, commands run here via `docker exec` are handed to it.
+export BOXOFPORTS_DAEMON_SOCKET=${BOXOFPORTS_DAEMON_SOCKET:-/tmp/boxofports-daemon.sock}
+
 # Create directories if they don't exist
 mkdir -p "$BOXOFPORTS_DATA_DIR" "$BOXOFPORTS_CONFIG_DIR"
 
@@ -8,6 +8,14 @@ _boxofports_completion() {
     cur="${COMP_WORDS[COMP_CWORD]}"
     prev="${COMP_WORDS[COMP_CWORD-1]}"
     
+    # Fast path: answers from cached command, profile and port data
+    # without loading the full CLI
+    if command -v boxofports-complete >/dev/null 2>&1; then
+        local IFS=$'\n'
+        COMPREPLY=($(boxofports-complete "${COMP_WORDS[@]:1:COMP_CWORD}"))
+        return 0
+    fi
+    
     # Main commands
     local main_commands="sms ops status inbox config test-connection"
     
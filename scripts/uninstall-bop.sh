@@ -441,6 +441,8 @@ interactive_removal() {
                     ;;
                 "docker_image")
                     local image_name=${path#docker:}
+                    # Warm containers started by bop hold the image
+                    docker ps -aq --filter "label=io.boxofports.bop-warm=1" | xargs -r docker rm -f >/dev/null 2>&1 || true
                     docker rmi "$image_name" 2>/dev/null && echo "✓ Removed Docker image: $image_name" || echo "✗ Failed to remove Docker image: $image_name"
                     ;;
                 "config"|"data"|"development")
@@ -534,6 +536,8 @@ main() {
                     rm -f "$path" && echo "✓ Removed: $path"
                 elif [[ "$method" == "docker_image" ]]; then
                     local image_name=${path#docker:}
+                    # Warm containers started by bop hold the image
+                    docker ps -aq --filter "label=io.boxofports.bop-warm=1" | xargs -r docker rm -f >/dev/null 2>&1 || true
                     docker rmi "$image_name" 2>/dev/null && echo "✓ Removed Docker image: $image_name"
                 fi
             fi
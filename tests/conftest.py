@@ -16,6 +16,34 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Keep on-disk caches out of the user's home directory during tests."""
+    from boxofports import csv_port_parser, governor, retry, status_cache
+
+    monkeypatch.setattr(csv_port_parser, "csv_cache", csv_port_parser.CSVCache(tmp_path / "csv-cache"))
+    monkeypatch.setattr(status_cache.status_cache, "cache_dir", tmp_path / "status-cache")
+    status_cache.status_cache.clear()
+    governor.reset_governors()
+    retry.reset_retry_state()
+
+
+@pytest.fixture
+def isolated_config(tmp_path, monkeypatch):
+    """Keep profiles and the local database out of the user's home and cwd."""
+    from boxofports import cli, config, store
+
+    manager = config.ConfigManager(config_dir=tmp_path / "config")
+    monkeypatch.setattr(config, "config_manager", manager)
+    monkeypatch.setattr(cli, "config_manager", manager)
+    monkeypatch.setattr(store, "_store", None)
+    monkeypatch.setattr(store, "_store_path", None)
+    monkeypatch.setenv("EJOIN_DB_PATH", str(tmp_path / "boxofports.db"))
+    yield manager
+    if store._store is not None:
+        store._store.close()
+
+
 @pytest.fixture
 def temp_dir():
     """Create a temporary directory for test files."""
@@ -0,0 +1,119 @@
+"""Tests for the fast shell-completion entry point."""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from boxofports.completion import (
+    build_command_tree,
+    complete,
+    known_ports,
+    load_command_tree,
+)
+from boxofports.config import EjoinConfig
+from boxofports.status_cache import DeviceStatusCache
+from tests.test_startup import HEAVY_MODULES, REPO_ROOT, import_times
+
+
+@pytest.fixture(scope="module")
+def tree():
+    return build_command_tree()
+
+
+@pytest.fixture
+def config_dir(temp_dir):
+    """A config directory with two profiles and a status snapshot for 'lab'."""
+    profiles = {
+        "lab": {"host": "10.0.0.5", "port": 8080, "username": "u", "password": "p", "tags": ["test"]},
+        "prod": {"host": "10.0.0.6", "port": 80, "username": "u", "password": "p"},
+    }
+    (temp_dir / "profiles.json").write_text(json.dumps(profiles))
+    (temp_dir / "current_profile").write_text("lab")
+
+    base_url = EjoinConfig(host="10.0.0.5", port=8080, username="u", password="p").base_url
+    cache = DeviceStatusCache(cache_dir=temp_dir / "cache" / "status")
+    cache.put(base_url, {"type": "dev-status", "status": [{"port": "1A"}, {"port": "1B"}, {"port": "2A"}]})
+    return temp_dir
+
+
+class TestComplete:
+    """Test candidates for subcommands, options, profiles and ports."""
+
+    def test_top_level_commands(self, tree, config_dir):
+        candidates = complete(["in"], tree, config_dir)
+        assert candidates == ["inbox"]
+
+    def test_subcommands(self, tree, config_dir):
+        candidates = complete(["inbox", ""], tree, config_dir)
+        assert {"list", "search", "summary"} <= set(candidates)
+
+    def test_options(self, tree, config_dir):
+        candidates = complete(["inbox", "list", "--so"], tree, config_dir)
+        assert candidates == ["--sort"]
+
+    def test_option_values_are_skipped(self, tree, config_dir):
+        """A value option's argument isn't mistaken for a subcommand."""
+        candidates = complete(["--host", "1.2.3.4", "con"], tree, config_dir)
+        assert candidates == ["config"]
+
+    def test_profile_names(self, tree, config_dir):
+        assert complete(["config", "switch", ""], tree, config_dir) == ["lab", "prod"]
+        assert complete(["config", "switch", "lab", ""], tree, config_dir) == []
+
+    def test_target_selectors(self, tree, config_dir):
+        (config_dir / "groups.json").write_text(json.dumps({"labs": "tag:test"}))
+        assert complete(["--target", "l"], tree, config_dir) == ["lab"]
+        assert complete(["--target", "lab,"], tree, config_dir) == [
+            "lab,all", "lab,lab", "lab,prod", "lab,tag:test", "lab,group:labs",
+        ]
+
+    def test_ports_from_status_snapshot(self, tree, config_dir):
+        candidates = complete(["ops", "lock", "--ports", "1"], tree, config_dir)
+        assert candidates == ["1A", "1B"]
+
+    def test_ports_in_comma_list(self, tree, config_dir):
+        candidates = complete(["ops", "lock", "--ports", "1A,2"], tree, config_dir)
+        assert candidates == ["1A,2A"]
+
+    def test_port_selectors_without_snapshot(self, tree, temp_dir):
+        assert known_ports(temp_dir) == []
+        candidates = complete(["ops", "lock", "--ports", "a"], tree, temp_dir)
+        assert "all" in candidates
+
+
+class TestCommandTreeCache:
+    """Test the on-disk command tree cache."""
+
+    def test_cache_is_reused(self, temp_dir, tree):
+        cache_file = temp_dir / "completion.json"
+        assert load_command_tree(cache_file) == tree
+        assert cache_file.exists()
+
+        # A matching fingerprint is served from disk without rebuilding
+        cached = json.loads(cache_file.read_text())
+        cached["tree"]["commands"]["marker"] = {"options": [], "value_options": [], "arguments": [], "commands": {}}
+        cache_file.write_text(json.dumps(cached))
+        assert "marker" in load_command_tree(cache_file)["commands"]
+
+    def test_stale_cache_is_rebuilt(self, temp_dir, tree):
+        cache_file = temp_dir / "completion.json"
+        cache_file.write_text(json.dumps({"fingerprint": "old", "tree": {}}))
+        assert load_command_tree(cache_file) == tree
+
+    def test_warm_completion_skips_heavy_modules(self, temp_dir):
+        """With a warm cache, completing imports neither typer nor rich."""
+        env = {"HOME": str(temp_dir), "PYTHONPATH": str(REPO_ROOT)}
+        warm = subprocess.run(
+            [sys.executable, "-m", "boxofports.completion", "in"],
+            capture_output=True, text=True, env=env, cwd=temp_dir, timeout=60,
+        )
+        assert warm.stdout.split() == ["inbox"]
+
+        times = import_times(
+            "from boxofports.completion import main\nmain(['inbox', 'li'])",
+            temp_dir,
+        )
+        loaded = [name for name in (*HEAVY_MODULES, "typer", "rich", "click") if name in times]
+        assert loaded == []
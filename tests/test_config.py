@@ -1,11 +1,13 @@
 """Tests for configuration management and host:port parsing."""
 
+import json
 import os
+import threading
 from unittest.mock import patch
 
 import pytest
 
-from boxofports.config import EjoinConfig, parse_host_port
+from boxofports.config import ConfigManager, EjoinConfig, parse_host_port
 
 
 def test_parse_host_port_basic():
@@ -114,9 +116,9 @@ def test_ejoin_config_missing_host():
                 EjoinConfig.from_env()
 
 
-def test_config_manager_basic():
+def test_config_manager_basic(temp_dir):
     """Test basic configuration manager functionality."""
-    manager = ConfigManager()
+    manager = ConfigManager(config_dir=temp_dir)
 
     # Test adding and retrieving profiles
     config = EjoinConfig(host="test.example.com", port=80)
@@ -128,6 +130,101 @@ def test_config_manager_basic():
     assert retrieved.port == 80
 
 
+def test_config_manager_is_lazy(temp_dir):
+    """Creating a manager touches nothing on disk."""
+    config_dir = temp_dir / "cfg"
+    manager = ConfigManager(config_dir=config_dir)
+    assert not config_dir.exists()
+    assert manager.list_profiles() == []
+
+
+def test_config_manager_builds_profiles_on_demand(temp_dir):
+    """Only requested profiles become configs, and loading never rewrites the file."""
+    profiles = {f"gw{i}": {"host": f"10.0.0.{i}", "port": 80} for i in range(50)}
+    profiles["broken"] = {"port": 80}
+    profiles_file = temp_dir / "profiles.json"
+    profiles_file.write_text(json.dumps(profiles))
+    original = profiles_file.read_text()
+
+    manager = ConfigManager(config_dir=temp_dir)
+    assert len(manager.list_profiles()) == 50
+    assert "broken" not in manager.list_profiles()
+
+    config = manager.get_profile_config("gw7")
+    assert config.host == "10.0.0.7"
+    assert config.device_alias == "gw7"
+    assert list(manager._profiles) == ["gw7"]
+    assert manager.get_profile_config("gw7") is config
+    assert profiles_file.read_text() == original
+
+
+def test_config_manager_default_alias(temp_dir):
+    """Profiles without an alias get their name's first word everywhere."""
+    (temp_dir / "profiles.json").write_text(json.dumps({
+        "east gateway": {"host": "10.0.0.1", "port": 80, "tags": ["east"]},
+        "named": {"host": "10.0.0.2", "port": 80, "device_alias": "custom"},
+    }))
+    manager = ConfigManager(config_dir=temp_dir)
+
+    assert manager.get_profile_data("east gateway")["device_alias"] == "east"
+    assert manager.get_profile_data("named")["device_alias"] == "custom"
+    assert manager.get_profile_config("east gateway").device_alias == "east"
+    assert manager.resolve_targets("tag:east") == ["east gateway"]
+
+    manager.add_profile("west lab", EjoinConfig(host="10.0.0.3"))
+    saved = json.loads((temp_dir / "profiles.json").read_text())
+    assert saved["west lab"]["device_alias"] == "west"
+
+
+def test_config_manager_sees_other_writers(temp_dir):
+    """Changes saved by another manager are picked up on next access."""
+    first = ConfigManager(config_dir=temp_dir)
+    second = ConfigManager(config_dir=temp_dir)
+
+    first.add_profile("lab", EjoinConfig(host="10.0.0.1"))
+    assert first.switch_profile("lab")
+    assert second.list_profiles() == ["lab"]
+    assert second.get_current_profile() == "lab"
+
+    second.add_profile("prod", EjoinConfig(host="10.0.0.2"))
+    assert first.list_profiles() == ["lab", "prod"]
+    assert first.remove_profile("lab")
+    assert second.get_current_profile() == "prod"
+
+
+def test_config_manager_atomic_write(temp_dir):
+    """A failed save leaves the previous file intact and no temp files behind."""
+    manager = ConfigManager(config_dir=temp_dir)
+    manager.add_profile("lab", EjoinConfig(host="10.0.0.1"))
+    original = (temp_dir / "profiles.json").read_text()
+
+    with patch("boxofports.config.os.replace", side_effect=OSError("disk full")):
+        manager.add_profile("prod", EjoinConfig(host="10.0.0.2"))
+
+    assert (temp_dir / "profiles.json").read_text() == original
+    assert sorted(p.name for p in temp_dir.iterdir()) == [".lock", "profiles.json"]
+
+
+def test_config_manager_concurrent_writers_keep_every_change(temp_dir):
+    """Read-modify-writes by separate managers never drop each other's edits."""
+    managers = [ConfigManager(config_dir=temp_dir) for _ in range(4)]
+
+    def add_profiles(worker, manager):
+        for n in range(10):
+            manager.add_profile(f"gw{worker}-{n}", EjoinConfig(host=f"10.0.{worker}.{n}"))
+            manager.set_group(f"group{worker}-{n}", f"gw{worker}-{n}")
+
+    threads = [threading.Thread(target=add_profiles, args=item) for item in enumerate(managers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    fresh = ConfigManager(config_dir=temp_dir)
+    assert len(fresh.list_profiles()) == 40
+    assert len(fresh.list_groups()) == 40
+
+
 def test_config_auth_params():
     """Test authentication parameter generation."""
     config = EjoinConfig(
@@ -36,6 +36,15 @@ class TestCSVDetection:
         assert is_csv_file("") is False
         assert is_csv_file(None) is False
 
+    def test_extensionless_file_detection(self, tmp_path):
+        """Files without .csv are detected by their header line."""
+        manifest = tmp_path / "manifest"
+        manifest.write_text("port,slot\n1,A\n")
+        assert is_csv_file(str(manifest)) is True
+
+        manifest.write_text("hello world again and again\n")
+        assert is_csv_file(str(manifest)) is False
+
 
 class TestPortExtraction:
     """Test port and slot extraction."""
@@ -249,3 +258,66 @@ class TestExpansionFunctions:
         """Test IMEI expansion function with non-CSV input."""
         result = expand_csv_imeis_if_needed("123456789012345,987654321098765")
         assert result is None  # Should return None for non-CSV input
+
+
+class TestCSVCache:
+    """Test caching of parsed CSV manifests."""
+
+    def test_cached_until_file_changes(self, tmp_path, monkeypatch):
+        """A second load is served from cache; edits invalidate it."""
+        from boxofports import csv_port_parser
+
+        csv_file = tmp_path / "ports.csv"
+        csv_file.write_text("port\n1A\n2B\n")
+        assert parse_ports_from_csv(csv_file) == ["1A", "2B"]
+
+        calls = []
+        original = csv_port_parser._parse_port_rows
+
+        def counting(header, rows):
+            calls.append(1)
+            return original(header, rows)
+
+        monkeypatch.setattr(csv_port_parser, "_parse_port_rows", counting)
+        assert expand_csv_ports_if_needed(str(csv_file)) == ["1A", "2B"]
+        assert calls == []
+
+        csv_file.write_text("port\n1A\n2B\n3C\n")
+        assert expand_csv_ports_if_needed(str(csv_file)) == ["1A", "2B", "3C"]
+        assert calls == [1]
+
+    def test_cache_holds_normalized_ports(self, tmp_path):
+        """Ports are normalized and de-duplicated before they are cached."""
+        from boxofports.ports import parse_port_spec
+
+        csv_file = tmp_path / "ports.csv"
+        csv_file.write_text("port\n4\n4A\n1.1\n1.01\n2B\n")
+        assert parse_ports_from_csv(csv_file) == ["4A", "1.01", "2B"]
+        assert parse_port_spec(str(csv_file)) == ["4A", "1.01", "2B"]
+
+        csv_file.write_text("port\n1A\n0\n")
+        with pytest.raises(CSVPortParseError, match="row 3"):
+            parse_ports_from_csv(csv_file)
+
+    def test_disk_cache_shared_across_instances(self, tmp_path, monkeypatch):
+        """A fresh process reuses entries persisted by another."""
+        from boxofports import csv_port_parser
+
+        csv_file = tmp_path / "imeis.csv"
+        csv_file.write_text("imei\n123456789012345\n")
+        assert parse_imeis_from_csv(csv_file) == ["123456789012345"]
+
+        fresh = csv_port_parser.CSVCache(csv_port_parser.csv_cache.cache_dir)
+        monkeypatch.setattr(csv_port_parser, "csv_cache", fresh)
+        monkeypatch.setattr(csv_port_parser, "_parse_imei_rows", None)
+        assert parse_imeis_from_csv(csv_file) == ["123456789012345"]
+
+    def test_extensionless_manifest_is_sniffed(self, tmp_path):
+        """Files without .csv are parsed only when the header matches."""
+        manifest = tmp_path / "manifest"
+        manifest.write_text("port,slot\n1,A\n2,02\n")
+        assert expand_csv_ports_if_needed(str(manifest)) == ["1A", "2.02"]
+
+        other = tmp_path / "notes"
+        other.write_text("hello world again and again\n")
+        assert expand_csv_ports_if_needed(str(other)) is None
@@ -0,0 +1,173 @@
+"""Tests for the resident daemon and the warm resources it holds."""
+
+import io
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from boxofports.config import EjoinConfig
+from boxofports.daemon import DaemonServer, control, forward, runs_locally
+from boxofports.http import (
+    close_client_pool,
+    create_sync_client,
+    enable_client_pool,
+    pooled_clients,
+)
+
+# Prompts before doing anything, so it waits on the client's stdin
+SET_IMEI = [
+    "--host", "127.0.0.1", "--port", "1", "--user", "u", "--pass", "p",
+    "ops", "set-imei", "--ports", "1A", "--imeis", "123456789012345",
+]
+
+
+def forward_when_idle(argv, path):
+    """Forward once the daemon has finished its previous command."""
+    deadline = time.monotonic() + 10
+    while (code := forward(argv, path)) is None:
+        assert time.monotonic() < deadline, "daemon stayed busy"
+        time.sleep(0.05)
+    return code
+
+
+@pytest.fixture
+def daemon(temp_dir, isolated_config):
+    """A daemon serving from a background thread."""
+    path = temp_dir / "daemon.sock"
+    server = DaemonServer(path)
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 30
+    while control("ping", path) is None:
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.05)
+
+    yield path
+
+    control("stop", path)
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert not path.exists()
+
+
+class TestDaemon:
+    """Test forwarding commands to a running daemon."""
+
+    def test_no_daemon(self, temp_dir):
+        """Without a daemon the caller runs the command itself."""
+        assert forward(["config", "current"], temp_dir / "missing.sock") is None
+        assert control("ping", temp_dir / "missing.sock") is None
+
+    def test_forwards_output_and_exit_code(self, daemon, capsys):
+        assert forward(["daemon", "--help"], daemon) == 0
+        assert "start" in capsys.readouterr().out
+
+        assert forward(["no-such-command"], daemon) == 2
+        assert "No such command" in capsys.readouterr().err
+
+    def test_status_counts_commands(self, daemon, capsys):
+        forward(["daemon", "--help"], daemon)
+        forward(["daemon", "--help"], daemon)
+        capsys.readouterr()
+
+        status = control("ping", daemon)
+        assert status["served"] == 2
+        assert status["socket"] == str(daemon)
+
+    def test_prompts_read_client_stdin(self, daemon, capsys):
+        """Confirmation prompts are answered from the client's stdin."""
+        args = SET_IMEI
+        assert forward(args, daemon, stdin=io.BytesIO(b"n\n")) == 0
+        out = capsys.readouterr().out
+        assert "Proceed with IMEI changes? [y/N]:" in out
+        assert "Operation cancelled" in out
+
+        # End of input aborts the prompt instead of hanging
+        assert forward(args, daemon, stdin=io.BytesIO(b"")) == 1
+        assert "Operation cancelled" not in capsys.readouterr().out
+
+    def test_busy_daemon_sends_callers_local(self, daemon, capsys):
+        """While a command waits on its prompt, other callers run locally."""
+        asked, answered = threading.Event(), threading.Event()
+
+        class SlowStdin:
+            def readline(self, size=-1):
+                asked.set()
+                answered.wait(10)
+                return b"n\n"
+
+        codes = []
+        waiting = threading.Thread(target=lambda: codes.append(forward(SET_IMEI, daemon, stdin=SlowStdin())))
+        waiting.start()
+        assert asked.wait(10)
+        assert forward(["daemon", "--help"], daemon) is None
+
+        answered.set()
+        waiting.join(timeout=10)
+        assert codes == [0]
+        assert forward_when_idle(["daemon", "--help"], daemon) == 0
+
+    def test_interrupt_cancels_command(self, daemon, capsys):
+        """Ctrl-C on the client stops the command in the daemon."""
+        class InterruptedStdin:
+            def readline(self, size=-1):
+                raise KeyboardInterrupt
+
+        assert forward(SET_IMEI, daemon, stdin=InterruptedStdin()) == 1
+        capsys.readouterr()
+
+        assert forward_when_idle(["daemon", "--help"], daemon) == 0
+        assert control("ping", daemon)["served"] == 2
+
+    def test_repeating_commands_run_locally(self):
+        assert runs_locally(["daemon", "start"])
+        assert runs_locally(["db", "cleanup", "--every", "60"])
+        assert runs_locally(["db", "cleanup", "--every=60"])
+        assert not runs_locally(["db", "cleanup"])
+        assert not runs_locally([])
+
+    def test_relative_database_follows_caller_cwd(self, daemon, temp_dir, monkeypatch):
+        """A relative db_path opens in each caller's directory."""
+        from boxofports import store
+
+        monkeypatch.setenv("EJOIN_DB_PATH", "history.db")
+        connections = []
+        for name in ("first", "second"):
+            (temp_dir / name).mkdir()
+            monkeypatch.chdir(temp_dir / name)
+            assert forward(["db", "stats", "--json"], daemon) == 0
+            assert (temp_dir / name / "history.db").exists()
+            connections.append(list(store.get_store()._connections))
+
+        assert store.get_store().db_path == temp_dir / "second" / "history.db"
+        # The replaced store's connections are closed rather than leaked
+        assert connections[0]
+        for connection in connections[0]:
+            with pytest.raises(sqlite3.ProgrammingError):
+                connection.execute("SELECT 1")
+
+
+class TestClientPool:
+    """Test kept-alive HTTP clients shared per gateway."""
+
+    def test_clients_are_pooled_per_gateway(self):
+        config = EjoinConfig(host="10.0.0.5", username="u", password="p")
+        other = EjoinConfig(host="10.0.0.6", username="u", password="p")
+
+        assert create_sync_client(config) is not create_sync_client(config)
+
+        enable_client_pool()
+        try:
+            client = create_sync_client(config)
+            assert client.keep_alive
+            assert create_sync_client(config) is client
+            assert create_sync_client(other) is not client
+            assert pooled_clients() == 2
+        finally:
+            close_client_pool()
+
+        assert pooled_clients() == 0
+        assert not create_sync_client(config).keep_alive
@@ -0,0 +1,144 @@
+"""Tests for the streaming export writers."""
+
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from boxofports.export_stream import (
+    ExportError,
+    detect_compression,
+    stream_export,
+    write_csv,
+    write_json_array,
+    write_ndjson,
+)
+from boxofports.table_export import (
+    get_inbox_messages_columns,
+    message_export_row,
+    messages_to_export_data,
+    render_and_export_table,
+    stream_table_export,
+)
+
+ROWS = [
+    {"ID": "1", "Port": "1A", "Content": "hello\nworld"},
+    {"ID": "2", "Port": "2B", "Content": "ünïcode, \"quoted\""},
+]
+
+
+def generate_rows(count):
+    """Yield rows lazily, as a store cursor would."""
+    for i in range(count):
+        yield {"ID": str(i), "Port": f"{i % 32 + 1}A", "Content": f"message {i}"}
+
+
+class TestWriters:
+    """Test CSV, NDJSON and JSON array output."""
+
+    def test_csv_from_iterator(self):
+        """CSV writing consumes a generator and infers the header."""
+        out = io.StringIO()
+        assert write_csv(generate_rows(3), out) == 3
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        assert [row["ID"] for row in rows] == ["0", "1", "2"]
+
+    def test_empty_input_writes_nothing(self):
+        """No header is written without rows."""
+        out = io.StringIO()
+        assert write_csv(iter([]), out) == 0
+        assert out.getvalue() == ""
+
+    def test_ndjson_one_object_per_line(self):
+        """Each row is one line, even with embedded newlines."""
+        out = io.StringIO()
+        assert write_ndjson(iter(ROWS), out) == 2
+        lines = out.getvalue().splitlines()
+        assert [json.loads(line) for line in lines] == ROWS
+
+    @pytest.mark.parametrize("rows", [ROWS, [], [{"a": {"b": [1, 2]}}]])
+    def test_json_array_matches_json_dump(self, rows):
+        """Streaming array output is byte-identical to json.dump."""
+        out = io.StringIO()
+        write_json_array(iter(rows), out)
+        assert out.getvalue() == json.dumps(rows, indent=2, ensure_ascii=False)
+
+
+class TestStreamExport:
+    """Test file targets and on-the-fly compression."""
+
+    def test_compression_from_suffix(self):
+        """Suffixes select the codec."""
+        assert detect_compression("out.csv.gz") == "gzip"
+        assert detect_compression("out.ndjson.zst") == "zstd"
+        assert detect_compression("out.csv") is None
+        assert detect_compression("-") is None
+
+    def test_gzip_file(self, temp_dir):
+        """A .gz target is compressed while rows are written."""
+        path = temp_dir / "inbox.ndjson.gz"
+        assert stream_export(generate_rows(1000), path, "ndjson") == 1000
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 1000
+        assert json.loads(lines[-1])["ID"] == "999"
+
+    def test_zstd_file(self, temp_dir):
+        """zstd output round-trips when the optional package is present."""
+        zstandard = pytest.importorskip("zstandard")
+        path = temp_dir / "inbox.csv.zst"
+        stream_export(iter(ROWS), path, "csv")
+
+        with open(path, "rb") as f:
+            data = zstandard.ZstdDecompressor().stream_reader(f).read().decode("utf-8")
+        assert list(csv.DictReader(io.StringIO(data))) == ROWS
+
+    def test_unknown_format_and_compression(self, temp_dir):
+        """Bad options fail before anything is written."""
+        with pytest.raises(ExportError):
+            stream_export(iter(ROWS), temp_dir / "out.xml", "xml")
+        with pytest.raises(ExportError):
+            stream_export(iter(ROWS), temp_dir / "out.csv", "csv", compression="lz4")
+
+
+class TestTableExport:
+    """Test streamed table exports against the list-based ones."""
+
+    @pytest.fixture
+    def messages(self):
+        start = datetime(2025, 1, 1)
+        return [
+            SimpleNamespace(
+                id=i, port=f"{i % 4 + 1}A", sender=f"+1555{i % 3}", content=f"message {i}",
+                timestamp=start + timedelta(minutes=(i * 7) % 10), is_delivery_report=False,
+                delivery_status_code=None, delivery_phone_number=None, recipient=None,
+            )
+            for i in range(10)
+        ]
+
+    @pytest.mark.parametrize("sort, limit", [(None, None), ("4,1d", None), ("6", 3)])
+    def test_matches_render_and_export_table(self, messages, capsys, sort, limit):
+        columns = get_inbox_messages_columns()
+        render_and_export_table(
+            "Inbox", columns, messages_to_export_data(messages, device_alias="gw"), None, "inbox-list",
+            sort, export_csv=True, export_json=True, limit=limit,
+        )
+        expected = capsys.readouterr().out
+
+        def to_row(msg):
+            return message_export_row(msg, device_alias="gw")
+
+        assert stream_table_export(columns, messages, to_row, sort, export_csv=True, export_json=True, limit=limit)
+        assert capsys.readouterr().out == expected
+        assert expected.startswith("ID,Device Alias,")
+
+    def test_nothing_to_export(self, messages, capsys):
+        columns = get_inbox_messages_columns()
+        assert not stream_table_export(columns, [], message_export_row, None, export_csv=True)
+        assert not stream_table_export(columns, messages, message_export_row, None)
+        assert capsys.readouterr().out == ""
@@ -0,0 +1,154 @@
+"""Tests for the per-gateway rate limiter and concurrency window."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from boxofports.config import EjoinConfig
+from boxofports.governor import (
+    GatewayGovernor,
+    governor_for,
+    governor_stats,
+    is_overload_response,
+)
+from boxofports.http import EjoinClient, EjoinHTTPError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestTokenBucket:
+    """Test the request rate cap."""
+
+    def test_burst_then_rate(self, clock):
+        governor = GatewayGovernor(rate_limit=2, rate_burst=3, max_concurrency=10, clock=clock)
+        for _ in range(3):
+            assert governor.try_acquire() == 0
+            governor.release(None)
+        assert governor.try_acquire() == pytest.approx(0.5)
+
+        clock.now += 0.5
+        assert governor.try_acquire() == 0
+
+    def test_no_cap_by_default(self, clock):
+        governor = GatewayGovernor(max_concurrency=1000, clock=clock)
+        governor.window = 1000
+        assert all(governor.try_acquire() == 0 for _ in range(500))
+
+
+class TestConcurrencyWindow:
+    """Test additive increase and multiplicative decrease."""
+
+    def test_window_bounds_in_flight(self, clock):
+        governor = GatewayGovernor(max_concurrency=4, clock=clock)
+        assert governor.try_acquire() == 0
+        assert governor.try_acquire() == 0
+        assert governor.try_acquire() > 0
+        governor.release(0.1)
+        assert governor.try_acquire() == 0
+
+    def test_additive_increase_up_to_ceiling(self, clock):
+        governor = GatewayGovernor(max_concurrency=4, clock=clock)
+        for _ in range(50):
+            governor.try_acquire()
+            governor.release(0.1)
+        assert governor.window == 4
+
+    def test_decrease_once_per_round_trip(self, clock):
+        governor = GatewayGovernor(max_concurrency=8, clock=clock)
+        governor.window = 8
+        governor.release(0.5)
+        governor.release(0.5, congested=True)
+        governor.release(0.5, congested=True)
+        assert governor.window == 4
+        assert governor.congestion_events == 2
+
+        clock.now += 1
+        governor.record_overload()
+        assert governor.window == 2
+        assert governor.overloads == 1
+
+    def test_slow_responses_shrink_window(self, clock):
+        governor = GatewayGovernor(max_concurrency=8, latency_target=1.0, clock=clock)
+        governor.window = 8
+        governor.release(3.0)
+        assert governor.window == 4
+
+    def test_overload_at_floor_pauses(self, clock):
+        governor = GatewayGovernor(max_concurrency=1, clock=clock)
+        governor.release(0.2)
+        governor.record_overload()
+        assert governor.try_acquire() == pytest.approx(0.2)
+
+        clock.now += 0.2
+        assert governor.try_acquire() == 0
+
+    def test_slowness_at_floor_does_not_pause(self, clock):
+        governor = GatewayGovernor(max_concurrency=1, latency_target=1.0, clock=clock)
+        governor.release(3.0)
+        assert governor.try_acquire() == 0
+
+
+class TestGovernorRegistry:
+    """Test governors shared per gateway."""
+
+    def test_shared_per_gateway_and_reconfigured(self):
+        config = EjoinConfig(host="10.0.0.5", max_concurrency=4)
+        governor = governor_for(config)
+        assert governor_for(EjoinConfig(host="10.0.0.5", max_concurrency=2)) is governor
+        assert governor.max_concurrency == 2
+        assert governor_for(EjoinConfig(host="10.0.0.6")) is not governor
+        assert set(governor_stats()) == {"http://10.0.0.5:80", "http://10.0.0.6:80"}
+
+    def test_overload_responses(self):
+        assert is_overload_response({"code": 16, "reason": "Too many task"})
+        assert is_overload_response({"type": "task-status", "status": [{"tid": 1, "status": "16 Too Many Task"}]})
+        assert not is_overload_response({"type": "task-status", "status": [{"tid": 1, "status": "0 OK"}]})
+        assert not is_overload_response([])
+
+
+class TestClientIntegration:
+    """Test that EjoinClient reports outcomes to its governor."""
+
+    def run(self, handler, path="/goip_get_status.html"):
+        config = EjoinConfig(host="10.0.0.9", max_retries=0)
+        client = EjoinClient(config)
+        client._client = httpx.AsyncClient(base_url=config.base_url, transport=httpx.MockTransport(handler))
+
+        async def call():
+            try:
+                return await client.get_json(path)
+            finally:
+                await client.close()
+
+        return asyncio.run(call()), governor_for(config)
+
+    def test_success_is_recorded(self):
+        data, governor = self.run(lambda request: httpx.Response(200, json={"code": 0}))
+        assert data == {"code": 0}
+        stats = governor.snapshot()
+        assert stats["requests"] == 1
+        assert stats["in_flight"] == 0
+        assert stats["latency_ewma_ms"] is not None
+
+    def test_too_many_task_is_recorded(self):
+        _, governor = self.run(lambda request: httpx.Response(200, json={"code": 16, "reason": "Too many task"}))
+        assert governor.overloads == 1
+
+    def test_overload_status_is_congestion(self):
+        with pytest.raises(EjoinHTTPError):
+            self.run(lambda request: httpx.Response(503, json={"reason": "busy"}))
+        governor = governor_for(EjoinConfig(host="10.0.0.9"))
+        assert governor.congestion_events == 1
+        assert governor.in_flight == 0
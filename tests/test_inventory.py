@@ -0,0 +1,175 @@
+"""Tests for the gateway inventory and target selectors."""
+
+import json
+import threading
+
+import pytest
+import typer
+
+from boxofports import cli
+from boxofports.config import ConfigManager, EjoinConfig
+from boxofports.inventory import Inventory, TargetError, parse_attributes
+
+
+@pytest.fixture
+def inventory():
+    profiles = {
+        "gw-east-1": {"host": "10.0.0.1", "tags": ["prod", "lte"], "attributes": {"site": "nyc"}},
+        "gw-east-2": {"host": "10.0.0.2", "tags": ["prod"], "attributes": {"site": "bos"}},
+        "gw-west-1": {"host": "10.0.1.1", "tags": ["lab"], "attributes": {"site": "sfo"}},
+        "legacy": {"host": "10.0.2.1"},
+    }
+    groups = {"east": "gw-east-*", "prod-nyc": "@east&site=nyc", "loop": "@loop"}
+    return Inventory(profiles, groups)
+
+
+class TestSelectors:
+    """Test resolving target selectors."""
+
+    def test_names_and_globs(self, inventory):
+        assert inventory.select("legacy") == ["legacy"]
+        assert inventory.select("gw-*-1") == ["gw-east-1", "gw-west-1"]
+
+    def test_tags_and_attributes(self, inventory):
+        assert inventory.select("tag:prod") == ["gw-east-1", "gw-east-2"]
+        assert inventory.select("site=sfo") == ["gw-west-1"]
+        assert inventory.select("tag:unused") == []
+
+    def test_groups(self, inventory):
+        assert inventory.select("group:east") == ["gw-east-1", "gw-east-2"]
+        assert inventory.select("@prod-nyc") == ["gw-east-1"]
+
+    def test_union_keeps_profile_order(self, inventory):
+        assert inventory.select("legacy,tag:lab,gw-east-1") == ["gw-east-1", "gw-west-1", "legacy"]
+
+    def test_exclusion_and_intersection(self, inventory):
+        assert inventory.select("all,!tag:prod") == ["gw-west-1", "legacy"]
+        assert inventory.select("tag:prod&site=bos") == ["gw-east-2"]
+        # Terms apply left to right, so a later term can add back
+        assert inventory.select("all,!@east,gw-east-2") == ["gw-east-2", "gw-west-1", "legacy"]
+
+    def test_leading_exclusion_starts_from_all(self, inventory):
+        assert inventory.select("!tag:lab") == ["gw-east-1", "gw-east-2", "legacy"]
+        assert inventory.select("!@east,!legacy") == ["gw-west-1"]
+        assert inventory.select("tag:lab,!tag:lab") == []
+
+    def test_errors(self, inventory):
+        with pytest.raises(TargetError, match="Unknown gateway"):
+            inventory.select("gw-north-1")
+        with pytest.raises(TargetError, match="Unknown group"):
+            inventory.select("@north")
+        with pytest.raises(TargetError, match="includes itself"):
+            inventory.select("@loop")
+
+    def test_parse_attributes(self):
+        assert parse_attributes(["site=nyc", "rack="]) == {"site": "nyc", "rack": ""}
+        with pytest.raises(TargetError):
+            parse_attributes(["site"])
+
+
+class TestConfigManagerInventory:
+    """Test tags, attributes and groups stored with profiles."""
+
+    @pytest.fixture
+    def manager(self, temp_dir):
+        manager = ConfigManager(config_dir=temp_dir)
+        for name in ("gw1", "gw2", "gw3"):
+            manager.add_profile(name, EjoinConfig(host=f"10.0.0.{name[-1]}"))
+        return manager
+
+    def test_tags_and_attributes_persist(self, manager, temp_dir):
+        assert manager.update_inventory("gw1", add_tags=["prod", "prod"], attributes={"site": "nyc"})
+        assert manager.update_inventory("gw2", add_tags=["prod"])
+        assert not manager.update_inventory("missing", add_tags=["prod"])
+
+        fresh = ConfigManager(config_dir=temp_dir)
+        assert fresh.resolve_targets("tag:prod") == ["gw1", "gw2"]
+        assert fresh.get_profile_config("gw1").tags == ["prod"]
+        assert fresh.get_profile_config("gw1").attributes == {"site": "nyc"}
+
+        fresh.update_inventory("gw1", remove_tags=["prod"], attributes={"site": ""})
+        assert fresh.resolve_targets("tag:prod") == ["gw2"]
+        assert fresh.get_profile_config("gw1").attributes == {}
+
+    def test_groups(self, manager, temp_dir):
+        manager.set_group("pair", "gw1,gw3")
+        assert ConfigManager(config_dir=temp_dir).resolve_targets("@pair") == ["gw1", "gw3"]
+        assert json.loads((temp_dir / "groups.json").read_text()) == {"pair": "gw1,gw3"}
+
+        with pytest.raises(TargetError):
+            manager.set_group("broken", "gw9")
+        assert "broken" not in manager.list_groups()
+
+        assert manager.remove_group("pair")
+        assert not manager.remove_group("pair")
+
+    def test_index_is_cached_until_files_change(self, manager):
+        index = manager.inventory()
+        assert manager.inventory() is index
+
+        manager.update_inventory("gw3", add_tags=["lab"])
+        assert manager.inventory() is not index
+        assert manager.resolve_targets("tag:lab") == ["gw3"]
+
+    def test_targets_leave_current_profile_alone(self, manager):
+        manager.switch_profile("gw2")
+        for name in manager.resolve_targets("all"):
+            assert manager.get_config(name).host == f"10.0.0.{name[-1]}"
+        assert manager.get_current_profile() == "gw2"
+
+
+class TestFanOut:
+    """Test running one command on several gateways."""
+
+    @pytest.fixture
+    def fleet(self, isolated_config, tmp_path):
+        for name in ("gw1", "gw2", "gw3"):
+            config = EjoinConfig(host=f"10.0.0.{name[-1]}", db_path=tmp_path / "boxofports.db")
+            isolated_config.add_profile(name, config)
+        return isolated_config
+
+    def run(self, *args):
+        command = typer.main.get_command(cli.app)
+        return command.main(args=list(args), prog_name="boxofports", standalone_mode=False)
+
+    def test_gateways_run_concurrently_with_ordered_output(self, fleet, monkeypatch, capsys):
+        from boxofports.store import EjoinStore
+
+        barrier = threading.Barrier(3, timeout=10)
+
+        def stats(self, since_ts=0, device_ip=None):
+            # Every gateway must be running at once to get past the barrier
+            barrier.wait()
+            print(f"stats for {device_ip}")
+            if device_ip == "10.0.0.2":
+                raise RuntimeError("boom")
+            return []
+
+        monkeypatch.setattr(EjoinStore, "get_port_delivery_stats", stats)
+        assert self.run("--target", "all", "report", "ports") == 1
+
+        out = capsys.readouterr().out
+        lines = [line.strip(" ─") for line in out.splitlines() if line.strip(" ─")]
+        assert lines == [
+            "gw1", "stats for 10.0.0.1", "No delivery results recorded for this period",
+            "gw2", "stats for 10.0.0.2", "Error building port report: boom",
+            "gw3", "stats for 10.0.0.3", "No delivery results recorded for this period",
+            "Failed on 1 of 3 gateways: gw2",
+        ]
+
+    def test_parallel_one_runs_in_turn(self, fleet, monkeypatch, capsys):
+        from boxofports.store import EjoinStore
+
+        running = []
+
+        def stats(self, since_ts=0, device_ip=None):
+            running.append(threading.current_thread())
+            return []
+
+        monkeypatch.setattr(EjoinStore, "get_port_delivery_stats", stats)
+        assert self.run("--parallel", "1", "--target", "!gw2", "report", "ports") == 0
+        assert running == [threading.main_thread()] * 2
+
+        out = capsys.readouterr().out
+        assert "gw1" in out and "gw3" in out and "gw2" not in out
+        assert "Completed on 2 gateways" in out
@@ -0,0 +1,235 @@
+"""Tests for instrumentation hooks, histograms and metrics export."""
+
+import asyncio
+import random
+import socket
+import threading
+import time
+import urllib.request
+
+import httpx
+import pytest
+
+from boxofports import metrics
+from boxofports.config import EjoinConfig
+from boxofports.daemon import DaemonServer, control, fetch_metrics
+from boxofports.http import EjoinClient
+from boxofports.metrics import Histogram, MetricsRegistry
+from boxofports.store import EjoinStore
+from boxofports.templating import SMSTemplateEngine
+
+
+@pytest.fixture
+def recorder():
+    """A registry receiving every event for the duration of a test."""
+    registry = MetricsRegistry()
+    metrics.add_hook(registry)
+    yield registry
+    metrics.remove_hook(registry)
+
+
+def histogram_for(registry, name):
+    matches = [histogram for metric, _, histogram in registry.histograms() if metric == name]
+    assert len(matches) == 1, f"expected one {name} histogram"
+    return matches[0]
+
+
+class TestHistogram:
+    """Test log-linear bucketing and percentiles."""
+
+    def test_small_values_are_exact(self):
+        histogram = Histogram()
+        for value in (0, 1, 5, 100):
+            histogram.record(value)
+        assert histogram.percentile(25) == 0
+        assert histogram.percentile(75) == 5
+        assert histogram.percentile(100) == 100
+
+    def test_relative_error_is_bounded(self):
+        histogram = Histogram(scale=1e6)
+        rng = random.Random(7)
+        values = sorted(rng.lognormvariate(-3, 1.5) for _ in range(5000))
+        for value in values:
+            histogram.record(value)
+
+        for percent in (50, 90, 99):
+            exact = values[round(len(values) * percent / 100) - 1]
+            assert histogram.percentile(percent) == pytest.approx(exact, rel=1 / 64)
+        assert histogram.count == 5000
+        assert histogram.mean == pytest.approx(sum(values) / len(values))
+
+    def test_memory_grows_with_log_of_range(self):
+        histogram = Histogram()
+        for value in range(1_000_000):
+            histogram.record(value)
+        assert len(histogram.counts) < 64 * 20
+
+    def test_empty(self):
+        assert Histogram().percentile(99) == 0.0
+        assert Histogram().mean == 0.0
+
+
+class TestHooks:
+    """Test registering hooks and emitting events."""
+
+    def test_emit_reaches_hooks(self):
+        events = []
+
+        def hook(event, fields):
+            events.append((event, fields))
+
+        assert not metrics.active()
+        metrics.add_hook(hook)
+        try:
+            assert metrics.active()
+            metrics.emit("store", kind="save_sms", rows=1)
+        finally:
+            metrics.remove_hook(hook)
+
+        assert events == [("store", {"kind": "save_sms", "rows": 1})]
+        assert not metrics.active()
+
+    def test_failing_hook_is_ignored(self, recorder):
+        def broken(event, fields):
+            raise RuntimeError("boom")
+
+        metrics.add_hook(broken)
+        try:
+            metrics.emit("template", seconds=0.001, cached=True)
+        finally:
+            metrics.remove_hook(broken)
+        assert histogram_for(recorder, "boxofports_template_render_duration_seconds").count == 1
+
+
+class TestRegistry:
+    """Test turning events into metrics and exporting them."""
+
+    def test_http_events(self):
+        registry = MetricsRegistry()
+        for seconds in (0.1, 0.2, 0.3):
+            registry("http", {"gateway": "http://gw", "endpoint": "/x", "status": 200,
+                              "bytes": 10, "seconds": seconds, "retries": 1})
+
+        histograms = registry.histograms()
+        name, labels, histogram = histograms[0]
+        assert name == "boxofports_http_request_duration_seconds"
+        assert labels == {"endpoint": "/x", "gateway": "http://gw", "status": "200"}
+        assert histogram.percentile(50) == pytest.approx(0.2, rel=0.01)
+        assert registry.counters() == [
+            ("boxofports_http_retries_total", {"endpoint": "/x", "gateway": "http://gw"}, 3),
+        ]
+
+    def test_prometheus_format(self):
+        registry = MetricsRegistry()
+        registry("store", {"kind": "save_sms", "rows": 2, "seconds": 0.5, "ok": True})
+        text = registry.prometheus([("boxofports_up", "Up", {"gateway": 'a"b'}, 1)])
+
+        assert "# TYPE boxofports_store_transaction_duration_seconds summary" in text
+        assert 'boxofports_store_transaction_duration_seconds{kind="save_sms",outcome="ok",quantile="0.99"} 0.5' in text
+        assert 'boxofports_store_transaction_rows_count{kind="save_sms"} 1' in text
+        assert "# TYPE boxofports_up gauge" in text
+        assert 'boxofports_up{gateway="a\\"b"} 1' in text
+        assert text.endswith("\n")
+
+    def test_empty_export(self):
+        assert MetricsRegistry().prometheus() == ""
+
+
+class TestInstrumentation:
+    """Test that the store, templater and HTTP client emit events."""
+
+    def test_store_transactions(self, recorder, temp_dir):
+        store = EjoinStore(temp_dir / "metrics.db")
+        with store._transaction("save_sms") as conn:
+            conn.execute("INSERT INTO delivery_results (port, number, outcome, ts) VALUES ('1A', '123', 'sent', 0)")
+        with pytest.raises(RuntimeError):
+            with store._transaction("save_sms"):
+                raise RuntimeError("rolled back")
+
+        kinds = {(labels.get("kind"), labels.get("outcome")) for name, labels, _ in recorder.histograms()
+                 if name == "boxofports_store_transaction_duration_seconds"}
+        assert ("initialize", "ok") in kinds
+        assert ("save_sms", "ok") in kinds
+        assert ("save_sms", "error") in kinds
+        rows = [histogram for name, labels, histogram in recorder.histograms()
+                if name == "boxofports_store_transaction_rows" and labels == {"kind": "save_sms"}]
+        # Rows written by triggers (rollups, counters) count too
+        assert rows[0].max >= 1
+
+    def test_template_renders(self, recorder):
+        templater = SMSTemplateEngine()
+        templater.render("Hi {{ port }}", port="1A")
+        templater.render("Hi {{ port }}", port="2A")
+        assert histogram_for(recorder, "boxofports_template_render_duration_seconds").count == 2
+
+    def test_http_requests(self, recorder):
+        config = EjoinConfig(host="10.0.0.9", max_retries=0)
+        client = EjoinClient(config)
+        client._client = httpx.AsyncClient(
+            base_url=config.base_url,
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"code": 0})),
+        )
+
+        async def call():
+            try:
+                return await client.get_json("/goip_get_status.html")
+            finally:
+                await client.close()
+
+        asyncio.run(call())
+
+        [(name, labels, histogram)] = [item for item in recorder.histograms()
+                                      if item[0] == "boxofports_http_request_duration_seconds"]
+        assert labels == {"endpoint": "/goip_get_status.html", "gateway": config.base_url, "status": "200"}
+        assert histogram.count == 1
+        assert histogram_for(recorder, "boxofports_http_response_bytes").max == len(b'{"code":0}')
+
+    def test_no_events_without_hooks(self, temp_dir, monkeypatch):
+        def unexpected(event, /, **fields):
+            raise AssertionError(f"{event} emitted with no hooks")
+
+        monkeypatch.setattr(metrics, "emit", unexpected)
+        EjoinStore(temp_dir / "quiet.db")
+        SMSTemplateEngine().render("quiet")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestDaemonMetrics:
+    """Test the daemon's Prometheus export."""
+
+    @pytest.fixture
+    def daemon(self, temp_dir, isolated_config):
+        path = temp_dir / "daemon.sock"
+        server = DaemonServer(path, metrics_port=free_port())
+        thread = threading.Thread(target=server.serve, daemon=True)
+        thread.start()
+
+        deadline = time.monotonic() + 30
+        while control("ping", path) is None:
+            assert time.monotonic() < deadline, "daemon did not start"
+            time.sleep(0.05)
+
+        yield server
+
+        control("stop", path)
+        thread.join(timeout=10)
+        assert not metrics.active()
+
+    def test_control_and_http_export(self, daemon):
+        text = fetch_metrics(daemon.path)
+        assert "# TYPE boxofports_daemon_uptime_seconds gauge" in text
+        assert "boxofports_daemon_commands 0" in text
+
+        url = control("ping", daemon.path)["metrics_url"]
+        with urllib.request.urlopen(url, timeout=10) as response:
+            assert response.status == 200
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "boxofports_daemon_uptime_seconds" in response.read().decode()
+
+    def test_no_daemon(self, temp_dir):
+        assert fetch_metrics(temp_dir / "missing.sock") is None
@@ -4,6 +4,7 @@ import pytest
 
 from boxofports.ports import (
     PortParseError,
+    compile_port_spec,
     format_ports_for_api,
     parse_port_spec,
     port_to_alpha,
@@ -51,6 +52,14 @@ def test_parse_invalid_port():
         parse_port_spec("1A-2.01")  # Mixed range types
 
 
+def test_decimal_slots_match_alpha_slots():
+    """Decimal slots are limited to 01-04, the same slots as A-D."""
+    assert parse_port_spec("1.04") == ["1.04"]
+    for spec in ("1.05", "1.00", "2.01-2.08", "1.05,!1.01"):
+        with pytest.raises(PortParseError, match="Slot must be between 1 and 4"):
+            parse_port_spec(spec)
+
+
 def test_port_conversions():
     """Test port format conversions."""
     # Alpha to decimal
@@ -91,3 +100,82 @@ def test_numeric_port_default():
     """Test that numeric ports default to slot A."""
     assert parse_port_spec("5") == ["5A"]
     assert parse_port_spec("1,2") == ["1A", "2A"]
+
+
+DEVICE_STATUS = {
+    "type": "dev-status",
+    "seq": 1,
+    "expires": 180,
+    "mac": "00-30-f1-01-02-03",
+    "ip": "192.168.1.67",
+    "max-ports": 8,
+    "max-slots": 2,
+    "status": [
+        {"port": "1A", "st": "3 OK"},
+        {"port": "2.02", "st": "1"},
+        {"port": "3A", "st": "5 No balance"},
+        {"port": "4A", "st": "3"},
+    ],
+}
+
+
+def test_device_selectors():
+    """Test that device selectors resolve against the device status."""
+    assert parse_port_spec("all", status=DEVICE_STATUS) == ["1A", "2B", "3A", "4A"]
+    assert parse_port_spec("registered", status=DEVICE_STATUS) == ["1A", "4A"]
+    assert parse_port_spec("idle,no-balance", status=DEVICE_STATUS) == ["2B", "3A"]
+    assert parse_port_spec("slot:B", status=DEVICE_STATUS) == [f"{i}B" for i in range(1, 9)]
+    assert parse_port_spec("registered,7A", status=DEVICE_STATUS) == ["1A", "4A", "7A"]
+
+
+def test_device_selectors_use_layout_without_entries():
+    """Test that "all" falls back to max-ports when no port states are reported."""
+    status = {**DEVICE_STATUS, "max-ports": 64, "status": []}
+    assert len(parse_port_spec("*", status=status)) == 64
+    assert parse_port_spec("registered", status=status) == []
+
+
+def test_device_selectors_require_status():
+    """Test that device selectors are validated."""
+    assert parse_port_spec("all") == [f"{i}A" for i in range(1, 33)]
+
+    with pytest.raises(PortParseError):
+        parse_port_spec("registered")
+
+    with pytest.raises(PortParseError):
+        parse_port_spec("slot:C", status=DEVICE_STATUS)  # Device has 2 slots
+
+
+def test_port_spec_exclusion_and_intersection():
+    """Test set algebra in port specifications."""
+    assert parse_port_spec("1-6,!3A,-5-6") == ["1A", "2A", "4A"]
+    assert parse_port_spec("all,!registered", status=DEVICE_STATUS) == ["2B", "3A"]
+    assert parse_port_spec("!2B", status=DEVICE_STATUS) == ["1A", "3A", "4A"]
+    assert parse_port_spec("registered&1-2", status=DEVICE_STATUS) == ["1A"]
+    assert parse_port_spec("slot:AB&1A-2D", status=DEVICE_STATUS) == ["1A", "1B", "2A", "2B"]
+    assert parse_port_spec("status:1+5", status=DEVICE_STATUS) == ["2B", "3A"]
+
+    with pytest.raises(PortParseError):
+        parse_port_spec("!3A")  # Exclusion from "all" needs device status
+
+
+def test_compiled_plan_is_reusable():
+    """Test that a compiled plan evaluates against different statuses."""
+    plan = compile_port_spec("registered,!1A")
+    assert plan is compile_port_spec("registered,!1A")
+    assert plan.needs_status
+
+    other = {**DEVICE_STATUS, "status": [{"port": "1A", "st": "3"}, {"port": "6A", "st": "3"}]}
+    assert plan.evaluate(DEVICE_STATUS) == ["4A"]
+    assert plan.evaluate(other) == ["6A"]
+    assert not compile_port_spec("1-4,!2").needs_status
+
+
+def test_large_range_expansion():
+    """Test that ranges crossing many ports expand in port/slot order."""
+    ports = parse_port_spec("1C-3B")
+    assert ports == ["1C", "1D", "2A", "2B", "2C", "2D", "3A", "3B"]
+    assert len(parse_port_spec("1A-2500D")) == 10000
+
+    with pytest.raises(PortParseError):
+        parse_port_spec("3A-1A")
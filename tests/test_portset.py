@@ -0,0 +1,72 @@
+"""Tests for PortId and bitmap-backed PortSet."""
+
+import gc
+import pickle
+
+import pytest
+
+from boxofports.portset import PortId, PortSet
+
+
+def test_port_id_parsing_and_interning():
+    """Test that both notations parse to the same interned identity."""
+    port = PortId.parse("3B")
+    assert port is PortId.parse("3.02")
+    assert port is PortId(3, 2)
+    assert (port.alpha, port.decimal) == ("3B", "3.02")
+    assert PortId.parse("5") is PortId(5, 1)
+    assert pickle.loads(pickle.dumps(port)) is port
+
+    with pytest.raises(AttributeError):
+        port.port = 4
+
+
+def test_port_id_intern_table_is_bounded_by_use():
+    """Test that unused identities are dropped from the intern table."""
+    port = PortId(987654, 4)
+    assert PortId(987654, 4) is port
+    assert (987654, 4) in PortId._interned
+
+    del port
+    gc.collect()
+    assert (987654, 4) not in PortId._interned
+
+
+def test_port_id_invalid():
+    """Test that invalid identifiers are rejected."""
+    for text in ("", "1X", "0A", "1.05", "A1"):
+        with pytest.raises(ValueError):
+            PortId.parse(text)
+
+
+def test_port_set_membership_and_order():
+    """Test add, discard, membership and ordered iteration."""
+    ports = PortSet(8, 2, ["4A", "1.02", "1A", "4A"])
+    assert len(ports) == 3
+    assert ports.to_list() == ["1A", "1B", "4A"]
+    assert ports.format("decimal") == "1.01,1.02,4.01"
+    assert "1.01" in ports
+    assert "9A" not in ports  # Outside the device
+    assert "1C" not in ports
+
+    ports.discard("1B")
+    ports.discard("9A")
+    assert ports.to_list() == ["1A", "4A"]
+
+    with pytest.raises(ValueError):
+        ports.add("9A")
+
+
+def test_port_set_algebra():
+    """Test union, intersection, difference and complement."""
+    slot_a = PortSet.full(4, 2, slots=[1])
+    low = PortSet(4, 2, ["1A", "1B", "2A"])
+
+    assert (slot_a | low).to_list() == ["1A", "1B", "2A", "3A", "4A"]
+    assert (slot_a & low).to_list() == ["1A", "2A"]
+    assert (slot_a - low).to_list() == ["3A", "4A"]
+    assert (~slot_a).to_list() == ["1B", "2B", "3B", "4B"]
+    assert len(PortSet.full(64, 4)) == 256
+
+    with pytest.raises(ValueError):
+        slot_a | PortSet(8, 2)
@@ -0,0 +1,112 @@
+"""Tests for profiling single CLI invocations."""
+
+import pstats
+import time
+
+import pytest
+import typer
+
+from boxofports import cli
+from boxofports.profiling import PROFILE_MODES, CommandProfiler
+
+
+def busy_work():
+    total = 0
+    for value in range(200_000):
+        total += value * value
+    return total
+
+
+def sleepy_work():
+    time.sleep(0.1)
+
+
+def hungry_work():
+    return [bytearray(1024) for _ in range(2000)]
+
+
+class TestCommandProfiler:
+    """Test the three profiling modes and their reports."""
+
+    def test_cpu(self, temp_dir):
+        profiler = CommandProfiler("cpu", command="sms send", directory=temp_dir)
+        profiler.start()
+        busy_work()
+        report = profiler.stop()
+
+        assert report.path.name.endswith("-sms-send-cpu.txt")
+        assert "busy_work" in report.path.read_text()
+        assert any("busy_work" in row[0] for row in report.rows)
+        # The raw stats load with pstats (and snakeviz)
+        [stats_path] = report.extra_paths
+        assert pstats.Stats(str(stats_path)).total_calls > 0
+
+    def test_wall(self, temp_dir):
+        profiler = CommandProfiler("wall", command="inbox list", directory=temp_dir, interval=0.002)
+        profiler.start()
+        sleepy_work()
+        report = profiler.stop()
+
+        top_function, samples = report.rows[0][:2]
+        assert "sleepy_work" in top_function
+        assert int(samples) > 5
+        [folded] = report.extra_paths
+        line = folded.read_text().splitlines()[0]
+        stack, count = line.rsplit(" ", 1)
+        assert stack.split(";")[-1].startswith("sleepy_work")
+        assert int(count) > 0
+
+    def test_alloc(self, temp_dir):
+        profiler = CommandProfiler("alloc", directory=temp_dir)
+        profiler.start()
+        kept = hungry_work()
+        report = profiler.stop()
+
+        assert len(kept) == 2000
+        location, source = report.rows[0][:2]
+        assert "test_profiling.py:" in location
+        assert "bytearray(1024)" in source
+        assert "peak" in report.summary
+        assert report.path.name.endswith("-boxofports-alloc.txt")
+
+    def test_reports_do_not_overwrite(self, temp_dir):
+        paths = set()
+        for _ in range(3):
+            profiler = CommandProfiler("cpu", command="config list", directory=temp_dir)
+            profiler.start()
+            paths.add(profiler.stop().path)
+        assert len(paths) == 3
+
+    def test_default_directory(self, temp_dir, monkeypatch):
+        monkeypatch.setenv("BOXOFPORTS_PROFILE_DIR", str(temp_dir / "profiles"))
+        profiler = CommandProfiler("cpu")
+        profiler.start()
+        report = profiler.stop()
+        assert report.path.parent == temp_dir / "profiles"
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError, match="Unknown profile mode"):
+            CommandProfiler("gpu")
+
+
+class TestProfileOption:
+    """Test parsing the root --profile option."""
+
+    def parse(self, args):
+        command = typer.main.get_command(cli.app)
+        ctx = command.make_context("boxofports", args, resilient_parsing=True)
+        return ctx.params["profile"], ctx.meta["boxofports.command"]
+
+    def test_modes(self):
+        assert cli.PROFILE_MODES == PROFILE_MODES
+        assert self.parse(["config", "list"]) == (None, "config list")
+        assert self.parse(["--profile=wall", "config", "list"]) == ("wall", "config list")
+        assert self.parse(["--profile", "alloc", "sms", "send"]) == ("alloc", "sms send")
+
+    def test_bare_flag_defaults_to_cpu(self):
+        assert self.parse(["--profile", "config", "list"]) == ("cpu", "config list")
+        assert self.parse(["--host", "10.0.0.1", "--profile", "-v", "welcome"]) == ("cpu", "welcome")
+        assert self.parse(["--profile"]) == ("cpu", "")
+
+    def test_command_path_stops_at_arguments(self):
+        assert self.parse(["--profile", "config", "switch", "gw1"]) == ("cpu", "config switch")
@@ -0,0 +1,204 @@
+"""Tests for jittered backoff, retry budgets and circuit breakers."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from boxofports import http
+from boxofports.config import EjoinConfig
+from boxofports.http import (
+    EjoinAuthError,
+    EjoinCircuitOpenError,
+    EjoinClient,
+    EjoinHTTPError,
+    EjoinTimeoutError,
+)
+from boxofports.retry import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    RetryBudget,
+    backoff_delay,
+    breaker_for,
+    breaker_stats,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestBackoff:
+    """Test full-jitter delays."""
+
+    def test_delays_stay_under_exponential_cap(self):
+        for attempt in range(8):
+            delays = [backoff_delay(attempt, base=1.0, cap=10.0) for _ in range(200)]
+            assert all(0 <= d <= min(10.0, 2 ** attempt) for d in delays)
+        # Jittered, not fixed
+        assert len({backoff_delay(3) for _ in range(20)}) > 1
+
+
+class TestRetryBudget:
+    """Test the share of retries per request."""
+
+    def test_reserve_then_ratio(self):
+        budget = RetryBudget(ratio=0.5, reserve=2)
+        assert budget.try_spend()
+        assert budget.try_spend()
+        assert not budget.try_spend()
+
+        budget.record_request()
+        budget.record_request()
+        assert budget.try_spend()
+        assert not budget.try_spend()
+        assert (budget.spent, budget.denied) == (3, 2)
+
+
+class TestCircuitBreaker:
+    """Test closed, open and half-open transitions."""
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(threshold=3, cooldown=10, clock=FakeClock())
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+    def test_half_open_probe(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(threshold=1, cooldown=10, clock=clock)
+        breaker.record_failure()
+        assert breaker.retry_after() == 10
+
+        clock.now += 10
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()
+
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        clock.now += 10
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.allow()
+
+    def test_lost_probe_is_replaced(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(threshold=1, cooldown=10, clock=clock)
+        breaker.record_failure()
+        clock.now += 10
+        assert breaker.allow()
+        clock.now += 10
+        assert breaker.allow()
+
+    def test_zero_threshold_disables(self):
+        breaker = CircuitBreaker(threshold=0, clock=FakeClock())
+        for _ in range(50):
+            breaker.record_failure()
+        assert breaker.allow()
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(http, "backoff_delay", lambda attempt: 0.0)
+
+
+def run_request(handler, probe=False, **settings):
+    config = EjoinConfig(host="10.0.0.9", **settings)
+    client = EjoinClient(config)
+    client._client = httpx.AsyncClient(base_url=config.base_url, transport=httpx.MockTransport(handler))
+
+    async def call():
+        try:
+            return await client.get_json("/goip_get_status.html", probe=probe)
+        finally:
+            await client.close()
+
+    return asyncio.run(call())
+
+
+class Responder:
+    """Mock transport handler replaying a list of outcomes."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def __call__(self, request):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, json={"code": 0, "reason": "busy" if outcome >= 400 else "OK"})
+
+
+class TestClientRetries:
+    """Test the retry loop in EjoinClient._make_request."""
+
+    def test_server_errors_are_retried(self, no_backoff):
+        responder = Responder(500, 503, 200)
+        assert run_request(responder) == {"code": 0, "reason": "OK"}
+        assert responder.calls == 3
+
+    def test_gives_up_after_max_retries(self, no_backoff):
+        responder = Responder(502)
+        with pytest.raises(EjoinHTTPError, match="HTTP 502: busy"):
+            run_request(responder, max_retries=2, breaker_threshold=0)
+        assert responder.calls == 3
+
+    def test_client_errors_are_not_retried(self, no_backoff):
+        responder = Responder(401)
+        with pytest.raises(EjoinAuthError):
+            run_request(responder)
+        assert responder.calls == 1
+
+    def test_timeouts_raise_timeout_error(self, no_backoff):
+        responder = Responder(httpx.ReadTimeout("slow"))
+        with pytest.raises(EjoinTimeoutError, match="after 1 retries"):
+            run_request(responder, max_retries=1)
+
+    def test_deadline_stops_retries(self, monkeypatch):
+        monkeypatch.setattr(http, "backoff_delay", lambda attempt: 5.0)
+        responder = Responder(503)
+        with pytest.raises(EjoinHTTPError):
+            run_request(responder, request_deadline=1.0)
+        assert responder.calls == 1
+
+    def test_budget_stops_retries(self, no_backoff):
+        responder = Responder(httpx.ConnectError("refused"))
+        with pytest.raises(EjoinHTTPError, match="Connection failed"):
+            run_request(responder, max_retries=20, retry_budget=0, breaker_threshold=0)
+        # The reserve of ten retries, then no more
+        assert responder.calls == 11
+
+    def test_breaker_fails_fast(self, no_backoff):
+        responder = Responder(httpx.ConnectError("refused"))
+        with pytest.raises(EjoinCircuitOpenError):
+            run_request(responder, max_retries=10, breaker_threshold=3)
+        assert responder.calls == 3
+
+        with pytest.raises(EjoinCircuitOpenError):
+            run_request(responder, breaker_threshold=3)
+        assert responder.calls == 3
+        assert breaker_stats()["http://10.0.0.9:80"]["state"] == OPEN
+
+    def test_probe_passes_open_breaker_and_closes_it(self, no_backoff):
+        breaker = breaker_for(EjoinConfig(host="10.0.0.9"))
+        breaker.threshold = 1
+        breaker.record_failure()
+
+        assert run_request(Responder(200), probe=True) == {"code": 0, "reason": "OK"}
+        assert breaker.state == CLOSED
@@ -4,14 +4,20 @@ Unit tests for sorting utilities and type coercion in table_export.py
 Also validates help text consistency for --sort, --csv, and --json options
 across all table-producing commands.
 """
-import pytest
 import re
 from datetime import datetime
+
+import pytest
+
 from boxofports.table_export import (
-    ColumnSpec, SortTerm,
-    parse_sort_option, default_sort_terms,
-    coerce_timestamp, coerce_port, coerce_generic,
-    sort_rows
+    ColumnSpec,
+    SortTerm,
+    coerce_generic,
+    coerce_port,
+    coerce_timestamp,
+    default_sort_terms,
+    parse_sort_option,
+    sort_rows,
 )
 
 
@@ -547,6 +553,154 @@ class TestSortRows:
         names = [row["name"] for row in sorted_rows]
         assert names == ["Alice", "Bob", "Charlie", "Diana"]
 
+    def test_sort_matches_sequential_stable_sorts(self):
+        """Test that the single composite sort matches one stable sort per term."""
+        import random
+
+        columns, _ = self.get_test_data()
+        rng = random.Random(7)
+        rows = [
+            {
+                "id": str(i),
+                "name": rng.choice(["Alice", "bob", "", None]),
+                "port": rng.choice(["1A", "1B", "2A", "10D", "", "x"]),
+                "time": rng.choice(["2023-12-25T10:00:00", "2023-12-25 09:00", "12-25 08:00", "", None]),
+                "value": rng.choice(["1", "2.5", "10", ""]),
+            }
+            for i in range(300)
+        ]
+
+        for spec in ["3,4d", "4d,2", "2d,3d,5", "5,3d,4"]:
+            terms = parse_sort_option(spec, columns)
+            expected = rows.copy()
+            for term in reversed(terms):
+                column = columns[term.col_index]
+
+                def key(row, c=column):
+                    value = row.get(c.key)
+                    if c.is_timestamp:
+                        stamp = coerce_timestamp(value)
+                        return (1, datetime.min) if stamp is None else (0, stamp)
+                    if c.is_port:
+                        return coerce_port(value)
+                    return coerce_generic(value)
+
+                expected.sort(key=key, reverse=not term.ascending)
+
+            assert sort_rows(rows, columns, terms) == expected
+
+    def test_limit_matches_full_sort_prefix(self):
+        """Test that a limited sort returns the head of the full ordering."""
+        import random
+
+        columns, _ = self.get_test_data()
+        rng = random.Random(11)
+        rows = [
+            {"id": str(i), "name": rng.choice(["Alice", "bob", ""]), "port": f"{rng.randint(1, 8)}A",
+             "time": "", "value": str(rng.randint(0, 5))}
+            for i in range(200)
+        ]
+
+        for spec in ["2", "2d", "3,5d", "5d,2,3"]:
+            terms = parse_sort_option(spec, columns)
+            full = sort_rows(rows, columns, terms)
+            for limit in (0, 1, 7, 200, 500):
+                assert sort_rows(rows, columns, terms, limit=limit) == full[:limit]
+
+        assert sort_rows(rows, columns, [], limit=3) == rows[:3]
+        with pytest.raises(ValueError):
+            sort_rows(rows, columns, [], limit=-1)
+
+    def test_render_limit_reports_shown_rows(self):
+        """Test that a limited table formats only shown rows and says so."""
+        from io import StringIO
+
+        from rich.console import Console
+
+        from boxofports.table_export import render_and_export_table
+
+        formatted = []
+        columns = [ColumnSpec(title="N", key="n", display_transform=lambda v: formatted.append(v) or str(v))]
+        rows = [{"n": i} for i in range(50)]
+        output = StringIO()
+
+        render_and_export_table(
+            title="Numbers", columns=columns, rows=rows, profile_name=None,
+            command_name="test", sort_option="1d",
+            table_console=Console(file=output, width=80), limit=5,
+        )
+
+        assert formatted == [49, 48, 47, 46, 45]
+        assert "Showing 5 of 50 rows" in output.getvalue()
+
+
+class TestLargeTableRendering:
+    """Test paged and fixed-width rendering of large result sets."""
+
+    def make_table(self, count):
+        formatted = []
+        columns = [
+            ColumnSpec(title="ID", key="id"),
+            ColumnSpec(title="Content", key="content",
+                       display_transform=lambda v: formatted.append(v) or v),
+        ]
+        rows = [{"id": str(i), "content": f"message {i}"} for i in range(count)]
+        return columns, rows, formatted
+
+    def render(self, columns, rows, table_console):
+        from boxofports.table_export import render_and_export_table
+
+        render_and_export_table(
+            title="Inbox", columns=columns, rows=rows, profile_name=None,
+            command_name="test", sort_option=None, table_console=table_console,
+        )
+
+    def test_non_terminal_gets_fixed_width_lines(self):
+        """Piped output is one aligned plain line per row."""
+        from io import StringIO
+
+        from rich.console import Console
+
+        from boxofports.table_export import LARGE_TABLE_ROWS
+
+        columns, rows, _ = self.make_table(LARGE_TABLE_ROWS + 1)
+        output = StringIO()
+        self.render(columns, rows, Console(file=output, width=80))
+
+        lines = output.getvalue().splitlines()
+        assert lines[0] == "Inbox"
+        assert lines[1].split() == ["ID", "Content"]
+        assert len(lines) == 3 + len(rows)
+        assert [str(LARGE_TABLE_ROWS), "message", str(LARGE_TABLE_ROWS)] in [line.split() for line in lines]
+
+    def test_terminal_pages_lazily(self):
+        """Only the first page is formatted when the user quits."""
+        from io import StringIO
+
+        from rich.console import Console
+
+        columns, rows, formatted = self.make_table(5000)
+        table_console = Console(file=StringIO(), width=80, height=30,
+                                force_terminal=True, force_interactive=True)
+        table_console.input = lambda prompt="": "q"
+        self.render(columns, rows, table_console)
+
+        # Width sampling touches a bounded number of rows, paging one screen
+        assert len(formatted) < 300
+        assert "message 0" in table_console.file.getvalue()
+        assert "message 4999" not in table_console.file.getvalue()
+
+    def test_small_tables_keep_rich_layout(self):
+        """Results under the threshold render as a normal Rich table."""
+        from io import StringIO
+
+        from rich.console import Console
+
+        columns, rows, _ = self.make_table(3)
+        output = StringIO()
+        self.render(columns, rows, Console(file=output, width=80))
+        assert "┃ ID" in output.getvalue()
+
 
 class TestCLIHelpTextConsistency:
     """Test consistency of help text across commands for sorting and export options."""
@@ -554,6 +708,7 @@ class TestCLIHelpTextConsistency:
     def get_command_help_patterns(self):
         """Extract help text patterns from CLI commands."""
         import inspect
+
         from boxofports import cli
         
         # Find all functions that are CLI commands with table output
@@ -0,0 +1,84 @@
+"""Cold-start checks for the CLI entry point.
+
+Each check runs a fresh interpreter with ``-X importtime`` so module caches
+from the test session don't hide import costs.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Modules only specific commands need; importing the CLI must not load them
+HEAVY_MODULES = (
+    "httpx",
+    "jinja2",
+    "pydantic",
+    "boxofports.api_models",
+    "boxofports.http",
+    "boxofports.store",
+    "boxofports.table_export",
+    "boxofports.templating",
+)
+
+# Cumulative import time allowed for boxofports.cli; override on slow machines
+STARTUP_BUDGET_MS = float(os.getenv("BOXOFPORTS_STARTUP_BUDGET_MS", "250"))
+
+
+def import_times(code: str, home: Path) -> dict[str, int]:
+    """Run code in a fresh interpreter; map module name -> cumulative microseconds."""
+    env = {
+        **os.environ,
+        "HOME": str(home),
+        "PYTHONPATH": str(REPO_ROOT),
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env, cwd=home, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestStartup:
+    """Test that cheap commands don't pay for heavy imports."""
+
+    def test_cli_import_skips_heavy_modules(self, temp_dir):
+        """Importing the CLI loads only what building the command tree needs."""
+        times = import_times("import boxofports.cli", temp_dir)
+        assert "boxofports.cli" in times
+        assert [name for name in HEAVY_MODULES if name in times] == []
+
+    @pytest.mark.parametrize("args", [["--help"], ["config", "current"], ["config", "list", "--help"]])
+    def test_cheap_commands_skip_heavy_modules(self, temp_dir, args):
+        """Help and profile lookups never touch the HTTP or template stacks."""
+        code = (
+            "from boxofports.cli import app\n"
+            f"try:\n    app({args!r}, standalone_mode=False)\n"
+            "except SystemExit:\n    pass\n"
+        )
+        times = import_times(code, temp_dir)
+        assert [name for name in HEAVY_MODULES if name in times] == []
+
+    def test_cli_import_within_budget(self, temp_dir):
+        """The CLI module imports within the cold-start budget (best of three)."""
+        best_us = min(
+            import_times("import boxofports.cli", temp_dir)["boxofports.cli"]
+            for _ in range(3)
+        )
+        assert best_us / 1000 < STARTUP_BUDGET_MS, (
+            f"boxofports.cli took {best_us / 1000:.0f}ms to import "
+            f"(budget {STARTUP_BUDGET_MS:.0f}ms)"
+        )
@@ -0,0 +1,154 @@
+"""Tests for the device status snapshot cache."""
+
+import threading
+import time
+
+import pytest
+
+from boxofports import status_cache
+from boxofports.config import EjoinConfig
+from boxofports.http import SyncEjoinClient
+from boxofports.status_cache import DeviceStatusCache
+
+KEY = "http://10.0.0.1:80"
+
+
+@pytest.fixture
+def cache(temp_dir):
+    """Create a cache persisting into a temporary directory."""
+    return DeviceStatusCache(cache_dir=temp_dir / "status", default_ttl=30.0)
+
+
+class Counter:
+    """Fetch callable that counts device round trips."""
+
+    def __init__(self, data=None, delay=0.0):
+        self.calls = 0
+        self.data = data or {"type": "dev-status", "status": [{"port": "1A", "st": 3}]}
+        self.delay = delay
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.data
+
+
+class TestDeviceStatusCache:
+    """Test TTL handling, persistence and coalescing."""
+
+    def test_fresh_snapshot_is_reused(self, cache):
+        """A second read within the TTL does not hit the device."""
+        fetch = Counter()
+        assert cache.get(KEY, fetch) == fetch.data
+        assert cache.get(KEY, fetch) == fetch.data
+        assert fetch.calls == 1
+
+    def test_max_age_zero_forces_fetch(self, cache):
+        """A caller can demand a live read."""
+        fetch = Counter()
+        cache.get(KEY, fetch)
+        cache.get(KEY, fetch, max_age=0)
+        assert fetch.calls == 2
+
+    def test_ttl_capped_by_device_expires(self, cache):
+        """The device's own 'expires' hint shortens the TTL."""
+        snapshot = cache.put(KEY, {"type": "dev-status", "expires": 5}, ttl=60)
+        assert snapshot.ttl == 5
+
+        snapshot = cache.put(KEY, {"type": "dev-status", "expires": -1}, ttl=60)
+        assert snapshot.ttl == 60
+
+    def test_expired_snapshot_is_refetched(self, cache):
+        """Snapshots past their TTL trigger a new fetch."""
+        fetch = Counter()
+        cache.get(KEY, fetch, ttl=0.01)
+        time.sleep(0.02)
+        cache.get(KEY, fetch)
+        assert fetch.calls == 2
+
+    def test_snapshot_persists_across_instances(self, cache, temp_dir):
+        """A new process can reuse a snapshot written by another."""
+        cache.get(KEY, Counter())
+
+        other = DeviceStatusCache(cache_dir=temp_dir / "status")
+        fetch = Counter()
+        other.get(KEY, fetch)
+        assert fetch.calls == 0
+        assert other.peek(KEY) is not None
+
+    def test_snapshot_is_private_to_the_user(self, cache, temp_dir):
+        """Snapshots on disk are readable by their owner only."""
+        cache.get(KEY, Counter())
+
+        files = list((temp_dir / "status").iterdir())
+        assert len(files) == 1
+        assert files[0].stat().st_mode & 0o777 == 0o600
+        assert (temp_dir / "status").stat().st_mode & 0o777 == 0o700
+
+    def test_invalidate_removes_memory_and_disk(self, cache, temp_dir):
+        """Invalidated snapshots are gone for every instance."""
+        cache.get(KEY, Counter())
+        cache.invalidate(KEY)
+
+        assert cache.peek(KEY) is None
+        assert DeviceStatusCache(cache_dir=temp_dir / "status").peek(KEY) is None
+
+    def test_concurrent_callers_share_one_fetch(self, cache):
+        """Parallel requests for the same gateway coalesce."""
+        fetch = Counter(delay=0.1)
+        results = []
+
+        def worker():
+            results.append(cache.get(KEY, fetch))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert fetch.calls == 1
+        assert len(results) == 8
+        assert all(r == fetch.data for r in results)
+
+    def test_errors_are_not_cached(self, cache):
+        """A failed fetch propagates and the next call retries."""
+        def failing():
+            raise RuntimeError("device unreachable")
+
+        with pytest.raises(RuntimeError):
+            cache.get(KEY, failing)
+
+        fetch = Counter()
+        cache.get(KEY, fetch)
+        assert fetch.calls == 1
+
+
+class TestClientInvalidation:
+    """Test that writes through the client drop the gateway's snapshot."""
+
+    @pytest.fixture
+    def client(self):
+        client = SyncEjoinClient(EjoinConfig(host="10.0.0.1", username="u", password="p"))
+        status_cache.status_cache.get(client.config.base_url, Counter())
+        return client
+
+    def cached(self, client):
+        fetch = Counter()
+        status_cache.status_cache.get(client.config.base_url, fetch)
+        return fetch.calls == 0
+
+    def test_set_imei_batch(self, client, monkeypatch):
+        monkeypatch.setattr(client, "post_json", lambda *args, **kwargs: {"code": 0, "reason": "OK"})
+        assert self.cached(client)
+        client.set_imei_batch([{"port": 1, "slot": 1, "imei": "123456789012345"}])
+        assert not self.cached(client)
+
+    def test_failed_set_imei_batch_keeps_snapshot(self, client, monkeypatch):
+        def refused(*args, **kwargs):
+            raise RuntimeError("connection refused")
+
+        monkeypatch.setattr(client, "post_json", refused)
+        with pytest.raises(RuntimeError):
+            client.set_imei_batch([{"port": 1, "slot": 1, "imei": "123456789012345"}])
+        assert self.cached(client)
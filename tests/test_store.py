@@ -0,0 +1,439 @@
+"""Tests for the EjoinStore SQLite state layer."""
+
+import json
+import time
+
+import pytest
+import typer
+
+from boxofports import cli
+from boxofports import store as store_module
+from boxofports.api_models import SMSMessage, SMSTaskReport
+from boxofports.http import SyncEjoinClient
+from boxofports.store import EjoinStore
+
+
+@pytest.fixture
+def store(temp_dir):
+    """Create a store backed by a temporary database."""
+    store = EjoinStore(temp_dir / "test.db")
+    yield store
+    store.close()
+
+
+HOUR = 1_760_000_400  # an hour boundary
+
+
+class TestDeliveryResults:
+    """Test normalized delivery results and their hourly rollups."""
+
+    @pytest.fixture(autouse=True)
+    def task(self, store):
+        store.save_sms_task(tid=42, ports=["1A", "2A"], to_number="+1555", text_hash="abc")
+
+    def make_report(self):
+        return SMSTaskReport(
+            tid=42,
+            sent=2,
+            failed=1,
+            sdr=[[0, "+15550001", "1.01", HOUR + 10], [1, "+15550002", "2.01", HOUR + 20]],
+            fdr=[[2, "+15550003", "1.01", HOUR + 30, "6 Timeout", "0 "]],
+        )
+
+    def test_task_report_populates_results(self, store):
+        """sdr/fdr entries become one row each with alpha ports."""
+        assert store.save_task_report(self.make_report(), device_ip="10.0.0.1") == 3
+
+        results = store.get_delivery_results(tid=42)
+        assert len(results) == 3
+        failed = [r for r in results if r['outcome'] == 'failed']
+        assert failed == [{
+            'device_ip': '10.0.0.1', 'tid': 42, 'port': '1A', 'number': '+15550003',
+            'outcome': 'failed', 'code': 6, 'ts': HOUR + 30,
+        }]
+
+    def test_duplicate_reports_are_ignored(self, store):
+        """Re-saving the same report does not double count."""
+        store.save_task_report(self.make_report())
+        assert store.save_task_report(self.make_report()) == 0
+
+        assert len(store.get_delivery_results(tid=42)) == 3
+        stats = {s['port']: s for s in store.get_port_delivery_stats()}
+        assert stats['1A']['sent'] == 1
+        assert stats['1A']['failed'] == 1
+        assert stats['1A']['send_rate'] == 0.5
+        assert stats['2A']['send_rate'] == 1.0
+        assert stats['2A']['delivery_rate'] is None
+
+    def test_inbox_delivery_reports(self, store):
+        """Delivery-report messages roll up as delivered/undelivered."""
+        messages = [
+            SMSMessage.from_api_data(1, [1, "1.01", HOUR + 5, "SMSC", "", "0 +15550001"]),
+            SMSMessage.from_api_data(2, [1, "1.01", HOUR + 6, "SMSC", "", "134 +15550002"]),
+            SMSMessage.from_api_data(3, [0, "1.01", HOUR + 7, "+1555", "", "aGVsbG8="]),
+        ]
+
+        assert store.save_delivery_reports(messages) == 2
+        assert store.save_delivery_reports(messages) == 0
+
+        stats = store.get_port_delivery_stats()
+        assert len(stats) == 1
+        assert stats[0]['delivered'] == 1
+        assert stats[0]['undelivered'] == 1
+        assert stats[0]['delivery_rate'] == 0.5
+
+    def test_results_are_kept_per_device(self, store):
+        """The same port on two gateways is reported separately."""
+        store.save_task_report(self.make_report(), device_ip="10.0.0.1")
+        store.save_task_report(self.make_report(), device_ip="10.0.0.2")
+
+        assert len(store.get_delivery_results(tid=42)) == 6
+        assert len(store.get_delivery_results(tid=42, device_ip="10.0.0.2")) == 3
+        stats = store.get_port_delivery_stats(device_ip="10.0.0.1")
+        assert {(s['device_ip'], s['port']) for s in stats} == {("10.0.0.1", "1A"), ("10.0.0.1", "2A")}
+        assert {s['port']: s['sent'] for s in stats} == {"1A": 1, "2A": 1}
+        assert len(store.get_port_delivery_stats()) == 4
+
+    def test_databases_without_device_are_migrated(self, temp_dir):
+        """Results recorded before the device key stay under the empty device."""
+        import sqlite3
+
+        path = temp_dir / "old.db"
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE delivery_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, tid INTEGER, port TEXT NOT NULL,
+                number TEXT NOT NULL, outcome TEXT NOT NULL, code INTEGER, ts INTEGER NOT NULL
+            );
+            CREATE TABLE port_delivery_hourly (
+                port TEXT NOT NULL, hour INTEGER NOT NULL,
+                sent INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0,
+                delivered INTEGER NOT NULL DEFAULT 0, undelivered INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (port, hour)
+            ) WITHOUT ROWID;
+            INSERT INTO delivery_results (tid, port, number, outcome, code, ts)
+            VALUES (1, '1A', '+1555', 'sent', 0, 1760000410);
+            INSERT INTO port_delivery_hourly VALUES ('1A', 1760000400, 1, 0, 0, 0);
+        """)
+        conn.close()
+
+        store = EjoinStore(path)
+        store.save_sms_task(tid=42, ports=["1A", "2A"], to_number="+1555", text_hash="abc")
+        store.save_task_report(self.make_report(), device_ip="10.0.0.1")
+
+        assert store.get_delivery_results(tid=1)[0]['device_ip'] == ''
+        stats = {(s['device_ip'], s['port']): s['sent'] for s in store.get_port_delivery_stats()}
+        assert stats == {('', '1A'): 1, ('10.0.0.1', '1A'): 1, ('10.0.0.1', '2A'): 1}
+        store.close()
+
+    def test_stats_since_filters_hours(self, store):
+        """Rollups older than the requested window are excluded."""
+        store.save_task_report(self.make_report())
+
+        assert store.get_port_delivery_stats(since_ts=HOUR + 3600) == []
+        assert len(store.get_port_delivery_stats(since_ts=HOUR + 59)) == 2
+
+
+class TestCounters:
+    """Test trigger-maintained counters behind get_stats."""
+
+    def test_counts_follow_inserts_and_replaces(self, store):
+        """INSERT OR REPLACE must not double count."""
+        store.save_sms_task(tid=1, ports=["1A"], to_number="+1", text_hash="a")
+        store.save_sms_task(tid=2, ports=["1A"], to_number="+1", text_hash="b")
+        store.save_sms_task(tid=2, ports=["2A"], to_number="+1", text_hash="c")
+        store.save_inbox_message("s", 1, 0, "1A", 0, "+1", "+2", "hi")
+        store.save_inbox_message("s", 1, 0, "1A", 0, "+1", "+2", "hi")
+        store.save_port_status("10.0.0.1", "1A", 3, "Registered")
+        store.save_port_status("10.0.0.1", "1A", 1, "Idle")
+
+        stats = store.get_stats()
+        assert stats['total_tasks'] == 2
+        assert stats['total_inbox'] == 1
+        assert stats['total_ports'] == 1
+        assert stats['tasks_last_24h'] == 2
+        assert stats['inbox_last_24h'] == 1
+        assert store.check_counters() == {}
+
+    def test_check_detects_and_repairs_drift(self, store):
+        """Drifted counters are reported and rebuilt on request."""
+        store.save_sms_task(tid=1, ports=["1A"], to_number="+1", text_hash="a")
+        conn = store._get_connection()
+        conn.execute("UPDATE store_counters SET value = 7 WHERE name = 'sms_tasks'")
+        conn.execute("DELETE FROM activity_hourly")
+
+        mismatches = store.check_counters(repair=True)
+        assert mismatches['sms_tasks'] == (7, 1)
+        assert mismatches['activity:tasks'] == (0, 1)
+        assert store.check_counters() == {}
+        assert store.get_stats()['total_tasks'] == 1
+
+    def test_existing_database_is_backfilled(self, temp_dir):
+        """Opening a pre-counter database seeds counters from its rows."""
+        db_path = temp_dir / "old.db"
+        store = EjoinStore(db_path)
+        store.save_sms_task(tid=1, ports=["1A"], to_number="+1", text_hash="a")
+        conn = store._get_connection()
+        conn.execute("DELETE FROM store_counters")
+        store.close()
+
+        reopened = EjoinStore(db_path)
+        assert reopened.get_stats()['total_tasks'] == 1
+        reopened.close()
+
+
+class TestRetention:
+    """Test batched retention cleanup."""
+
+    def age_rows(self, store, days):
+        """Backdate every timestamped row by the given number of days."""
+        conn = store._get_connection()
+        modifier = f"-{days} days"
+        conn.execute("UPDATE sms_tasks SET submitted_at = datetime(submitted_at, ?)", (modifier,))
+        conn.execute("UPDATE task_reports SET updated_at = datetime(updated_at, ?)", (modifier,))
+        conn.execute("UPDATE inbox_messages SET received_at = datetime(received_at, ?)", (modifier,))
+        conn.execute("UPDATE delivery_results SET ts = ts - ?", (days * 86400,))
+
+    def test_cleanup_in_batches(self, store):
+        """Old rows are removed across several small batches."""
+        for i in range(25):
+            store.save_inbox_message("s", i, 0, "1A", 0, "+1", "+2", "hi")
+        store.save_sms_task(tid=1, ports=["1A"], to_number="+1", text_hash="a")
+        self.age_rows(store, 40)
+        store.save_inbox_message("s", 99, 0, "1A", 0, "+1", "+2", "fresh")
+
+        result = store.cleanup_old_data(days_to_keep=30, batch_size=10)
+
+        assert result['inbox_deleted'] == 25
+        assert result['tasks_deleted'] == 1
+        assert result['batches'] >= 3
+        assert store.get_stats()['total_inbox'] == 1
+        assert store.check_counters() == {}
+
+    def test_per_table_policies(self, store):
+        """Overrides keep a table longer than the default."""
+        store.save_inbox_message("s", 1, 0, "1A", 0, "+1", "+2", "hi")
+        store.save_sms_task(tid=1, ports=["1A"], to_number="+1", text_hash="a")
+        self.age_rows(store, 40)
+
+        result = store.cleanup_old_data(days_to_keep=30, policies={'inbox_messages': 90})
+
+        assert result['inbox_deleted'] == 0
+        assert result['tasks_deleted'] == 1
+
+    def test_tasks_with_reports_are_kept(self, store):
+        """A task survives while a newer report still references it."""
+        store.save_sms_task(tid=1, ports=["1A"], to_number="+1", text_hash="a")
+        self.age_rows(store, 40)
+        store.save_task_report(SMSTaskReport(tid=1, sent=1))
+
+        result = store.cleanup_old_data(days_to_keep=30)
+
+        assert result['tasks_deleted'] == 0
+        assert store.get_sms_task(1) is not None
+
+    def test_unknown_policy_table(self, store):
+        """Policies for unsupported tables are rejected."""
+        with pytest.raises(ValueError):
+            store.cleanup_old_data(policies={'port_status': 1})
+
+    def test_new_databases_use_incremental_vacuum(self, store):
+        """Space freed by cleanup is released to the filesystem."""
+        conn = store._get_connection()
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        for i in range(500):
+            store.save_inbox_message("s", i, 0, "1A", 0, "+1", "+2", "x" * 500)
+        self.age_rows(store, 40)
+
+        result = store.cleanup_old_data(days_to_keep=30)
+
+        assert result['pages_freed'] > 0
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+
+class TestPortStatusHistory:
+    """Test change-data-capture of port status into history and rollups."""
+
+    def test_only_changes_are_recorded(self, store):
+        """Repeated identical snapshots do not grow the history."""
+        assert store.save_port_status("10.0.0.1", "1A", 3, "Registered", balance="5", ts=HOUR) is True
+        assert store.save_port_status("10.0.0.1", "1A", 3, "Registered", balance="4", ts=HOUR + 30) is False
+        assert store.save_port_status("10.0.0.1", "1A", 6, "Register failed", ts=HOUR + 61) is True
+        assert store.save_port_status("10.0.0.1", "1A", 3, "Registered", ts=HOUR + 62) is True
+
+        history = store.get_port_status_history("10.0.0.1", "1A")
+        assert [h['status_code'] for h in history] == [3, 6, 3]
+        assert store.get_port_status("10.0.0.1", "1A")[0]['balance'] is None
+
+    def test_state_survives_reopen(self, store, temp_dir):
+        """Last known state is reloaded from port_status, not re-recorded."""
+        store.save_port_status("10.0.0.1", "1A", 3, "Registered", ts=HOUR)
+        reopened = EjoinStore(temp_dir / "test.db")
+
+        assert reopened.save_port_status("10.0.0.1", "1A", 3, "Registered", ts=HOUR + 5) is False
+        reopened.close()
+
+    def test_health_rollups(self, store):
+        """Minute and hour rollups count changes and failures per port."""
+        store.save_port_status("10.0.0.1", "1A", 3, "Registered", ts=HOUR)
+        store.save_port_status("10.0.0.1", "1A", 6, "Register failed", ts=HOUR + 10)
+        store.save_port_status("10.0.0.1", "1A", 3, "Registered", ts=HOUR + 70)
+        store.save_port_status("10.0.0.1", "2A", 3, "Registered", ts=HOUR + 80)
+
+        hourly = {h['port']: h for h in store.get_port_health("10.0.0.1")}
+        assert hourly['1A']['changes'] == 3
+        assert hourly['1A']['failures'] == 1
+        assert hourly['1A']['status_code'] == 3
+        assert hourly['2A']['changes'] == 1
+
+        minutely = {h['port']: h for h in store.get_port_health("10.0.0.1", resolution='minute')}
+        assert minutely['1A']['active_buckets'] == 2
+
+        recent = store.get_port_health("10.0.0.1", since_ts=HOUR + 60, resolution='minute')
+        assert {h['port']: h['changes'] for h in recent} == {'1A': 1, '2A': 1}
+
+    def test_rollups_have_longer_retention(self, store):
+        """Raw history expires with the default policy, hourly rollups later."""
+        store.save_port_status("10.0.0.1", "1A", 3, "Registered", ts=int(time.time()) - 40 * 86400)
+
+        result = store.cleanup_old_data(days_to_keep=30)
+
+        assert result['history_deleted'] == 1
+        assert result['minutely_deleted'] == 1
+        assert result['hourly_deleted'] == 0
+        assert len(store.get_port_health("10.0.0.1")) == 1
+
+
+
+@pytest.fixture
+def cli_env(isolated_config, monkeypatch):
+    """Run CLI commands against gateway 10.0.0.7 with a temporary database."""
+    monkeypatch.setenv("EJOIN_HOST", "10.0.0.7")
+
+
+def run_cli(*args):
+    command = typer.main.get_command(cli.app)
+    command.main(args=list(args), prog_name="boxofports", standalone_mode=False)
+
+
+class TestReportIngestion:
+    """Test that posted task reports end up in `report ports`."""
+
+    def test_reports_to_report_ports(self, cli_env, temp_dir, capsys):
+        store = store_module.initialize_store(cli.config_manager.get_config().db_path)
+        store.save_sms_task(tid=42, ports=["1A", "2A"], to_number="+1555", text_hash="abc")
+        # The same task id and port on another gateway must not be counted
+        store.save_task_report(TestDeliveryResults().make_report(), device_ip="10.0.0.8")
+
+        reports = temp_dir / "reports.jsonl"
+        reports.write_text("\n".join(json.dumps(document) for document in [
+            {"type": "status-report", "rpt_num": 1, "rpts": [{
+                "tid": 42, "sent": 1, "failed": 1,
+                "sdr": [[0, "+15550001", "1.01", HOUR + 10]],
+                "fdr": [[1, "+15550002", "1.01", HOUR + 20, "6 Timeout", "0 "]],
+            }]},
+            {"type": "status-report", "rpt_num": 1, "rpts": [{"tid": 99, "sent": 1}]},
+        ]))
+        run_cli("sms", "reports", str(reports))
+        assert "Skipping report for task 99" in capsys.readouterr().out
+
+        run_cli("report", "ports", "--hours", "0", "--json")
+        rows = json.loads(capsys.readouterr().out)
+        assert [(row['Device Alias'], row['Port'], row['Sent'], row['Failed']) for row in rows] == [
+            ("10.0.0.7", "1A", "1", "1"),
+        ]
+
+
+class TestStatusRecording:
+    """Test that fetched device status ends up in `report health`."""
+
+    @pytest.fixture
+    def gateway(self, cli_env, monkeypatch):
+        """A gateway whose status response the test controls."""
+        responses = []
+        monkeypatch.setattr(SyncEjoinClient, "get_json", lambda self, url, **kwargs: responses.pop(0))
+        return responses
+
+    def test_fetch_to_report_health(self, gateway, capsys):
+        gateway.append({"type": "dev-status", "status": [
+            {"port": "1.01", "st": "3", "opr": "Carrier"},
+            {"port": "2.01", "st": "0"},
+        ]})
+        gateway.append({"type": "dev-status", "status": [
+            {"port": "1.01", "st": "6(no service)", "opr": "Carrier"},
+            {"port": "2.01", "st": "0"},
+        ]})
+
+        config = cli.config_manager.get_config()
+        store_module.initialize_store(config.db_path)
+        client = SyncEjoinClient(config)
+        client.get_status()
+        client.get_status()  # served from the status cache
+        client.get_status(max_age=0)
+
+        history = store_module.get_store().get_port_status_history("10.0.0.7", "1A")
+        assert sorted(h['status_code'] for h in history) == [3, 6]
+
+        capsys.readouterr()
+        run_cli("report", "health", "--json")
+        rows = {row['Port']: row for row in json.loads(capsys.readouterr().out)}
+        assert rows['1A']['Changes'] == '2'
+        assert rows['1A']['Failures'] == '1'
+        assert rows['1A']['Status'] == 'Register failed'
+        assert rows['2A']['Changes'] == '1'
+
+    def test_library_use_without_store(self, gateway):
+        gateway.append({"type": "dev-status", "status": [{"port": "1.01", "st": "3"}]})
+        status = SyncEjoinClient(cli.config_manager.get_config()).get_status()
+        assert status["status"][0]["st"] == "3"
+
+
+class TestIterRows:
+    """Test streaming table reads used by exports."""
+
+    def test_rows_stream_in_timestamp_order(self, store):
+        """Rows come back oldest first across fetch batches."""
+        with store._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO delivery_results (tid, port, number, outcome, code, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                [(1, "1A", f"+1555{i:04d}", "sent", 0, HOUR + 25 - i) for i in range(25)],
+            )
+
+        rows = list(store.iter_rows("delivery_results", batch_size=4))
+        assert [row["ts"] for row in rows] == sorted(row["ts"] for row in rows)
+        assert len(rows) == 25
+
+    def test_time_range_is_pushed_down(self, store):
+        """since/until filter on the table's timestamp column."""
+        from datetime import UTC, datetime
+
+        with store._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO delivery_results (tid, port, number, outcome, code, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                [(1, "1A", "+1555", "sent", 0, HOUR + offset) for offset in (0, 10, 20)],
+            )
+
+        rows = list(store.iter_rows(
+            "delivery_results",
+            since=datetime.fromtimestamp(HOUR + 5, UTC),
+            until=datetime.fromtimestamp(HOUR + 20, UTC),
+        ))
+        assert [row["ts"] for row in rows] == [HOUR + 10]
+
+    def test_unknown_table(self, store):
+        """Only exportable tables can be streamed."""
+        with pytest.raises(ValueError):
+            list(store.iter_rows("store_counters"))
+
+    def test_column_filters(self, store):
+        """Equality filters apply to real columns only."""
+        with store._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO delivery_results (tid, port, number, outcome, code, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                [(1, port, "+1555", "sent", 0, HOUR + i) for i, port in enumerate(("1A", "2A", "1A"))],
+            )
+
+        batches = list(store.iter_column_batches("delivery_results", filters={"port": "1A"}))
+        assert batches[0]["port"] == ["1A", "1A"]
+        with pytest.raises(ValueError):
+            list(store.iter_rows("delivery_results", filters={"nope": 1}))
@@ -236,3 +236,13 @@ def test_template_with_only_text(template_engine):
 
     result = template_engine.render(template, {})
     assert result == "This is just plain text"
+
+
+def test_compiled_templates_are_reused(template_engine):
+    """Rendering the same template twice compiles it once."""
+    template = "Hi from {{ port }}"
+
+    assert template_engine.render(template, port="1A") == "Hi from 1A"
+    compiled = template_engine._compiled[template]
+    assert template_engine.render(template, port="2B") == "Hi from 2B"
+    assert template_engine._compiled[template] is compiled